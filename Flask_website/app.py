@@ -1,4 +1,9 @@
+import os
+import sys
 from flask import Flask
+
+# 저장소 루트의 공용 장비 모듈(smu_session, simulated_smu) 사용
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from static.routes import register_blueprints
 
 app = Flask(__name__)
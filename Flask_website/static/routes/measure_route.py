@@ -1,18 +1,17 @@
+import os
 from flask import jsonify, request, Blueprint
-import pyvisa
 import pandas as pd
 import numpy as np
+from smu_session import get_session
 
 measure_route = Blueprint("measure_route", __name__)
 
-rm = pyvisa.ResourceManager()
+# 측정 장비 주소 (SIM::2461::DIODE::INSTR 로 바꾸면 가상 장비 사용)
+VISA_ADDRESS = os.environ.get("SOURCEMETER_VISA_ADDRESS", 'USB0::0x05E6::0x2461::04628945::INSTR')
 
 try:
-    instrument = rm.open_resource('USB0::0x05E6::0x2461::04628945::INSTR')
-    instrument.write_termination = '\n'
-    instrument.read_termination = '\n'
-    instrument.write("*RST")
-    instrument.write("*CLS")
+    instrument = get_session(VISA_ADDRESS)
+    instrument.write("*RST;*CLS")
     instrument_connected = True
 except Exception as e:
     instrument_connected = False
@@ -28,12 +27,13 @@ def measure():
         end_voltage = float(request.form.get("end_voltage", 5))
         step_voltage = float(request.form.get("step_voltage", 0.1))
 
-        instrument.write(":SOURce:FUNCtion VOLTage")          # 전압 소스 모드 설정
-        instrument.write(":SENSe:FUNCtion 'CURRent'")         # 전류 측정 모드 활성화
-        instrument.write(":SOURce:VOLTage:RANGe:AUTO ON")     # 자동 전압 범위 활성화
-        instrument.write(":SENSe:CURRent:RANGe:AUTO ON")      # 자동 전류 범위 활성화
-        instrument.write(":SOURce:VOLTage:ILIMit 0.02")       # 최대 전류 제한 (20mA)
-        instrument.write("OUTP ON")
+        with instrument.batch() as batch:
+            batch.write(":SOURce:FUNCtion VOLTage")          # 전압 소스 모드 설정
+            batch.write(":SENSe:FUNCtion 'CURRent'")         # 전류 측정 모드 활성화
+            batch.write(":SOURce:VOLTage:RANGe:AUTO ON")     # 자동 전압 범위 활성화
+            batch.write(":SENSe:CURRent:RANGe:AUTO ON")      # 자동 전류 범위 활성화
+            batch.write(":SOURce:VOLTage:ILIMit 0.02")       # 최대 전류 제한 (20mA)
+            batch.write("OUTP ON")
 
         voltages = np.arange(start_voltage, end_voltage + step_voltage, step_voltage)
         currents = []
@@ -0,0 +1,176 @@
+"""실시간 측정 모드의 장비 설정 / 샘플 읽기 (Qt 없이 동작)
+
+realtimecurrent.MainWindow 와 mosfetrealtime.MOSFETWindow 가 쓰는 측정 경로로,
+벤치마크나 스크립트에서도 GUI 없이 같은 경로를 호출할 수 있다.
+AcquisitionWorker 는 측정을 GUI 스레드 밖에서 정해진 샘플링 속도로 돌린다.
+"""
+import time
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from binary_transfer import data_format_settings, read_values
+from measurement_profiles import DEFAULT_PROFILE, profile_settings
+from async_smu import lane_for, on_lane
+
+MAX_PENDING_SAMPLES = 100000  # GUI 가 가져가지 않은 샘플 최대 보관 수
+
+# 공용 단조 시계 기준점: time.monotonic() 값을 벽시계 시각으로 바꿀 때 사용
+_CLOCK_ANCHOR = (datetime.now(), time.monotonic())
+
+
+def monotonic_to_datetime(monotonic_time):
+    """time.monotonic() 값을 datetime 으로 (프로세스 안에서 단조 증가 보장)"""
+    wall, mono = _CLOCK_ANCHOR
+    return wall + timedelta(seconds=monotonic_time - mono)
+
+
+# 장비별 소스 전압 레인지 (V)
+SOURCE_VOLTAGE_RANGES = {
+    "2461": 105,
+    "2400": 200,
+    "2410": 1100,
+}
+
+
+def realtime_current_settings(device_model, binary=False, profile=DEFAULT_PROFILE):
+    """실시간 전류 측정 설정 목록 (전압 0 V 소스, 출력 ON, profile: 측정 속도/정확도 프로파일)"""
+    settings = [(":SENS:FUNC", "'CURR'")] + profile_settings(device_model, profile)
+    if device_model == "2461":
+        settings.append((":SENS:CURR:RANG:AUTO", "ON"))
+    else:
+        settings.append((":FORMat:ELEMents", "CURR"))
+    return settings + data_format_settings(device_model, binary) + [
+        (":SOUR:FUNC", "VOLT"),
+        (":SOUR:VOLT:RANG", SOURCE_VOLTAGE_RANGES[device_model]),
+        (":SOUR:VOLT", 0),
+        (":OUTP", "ON"),
+    ]
+
+
+def configure_realtime_current(instrument, device_model, binary=False, profile=DEFAULT_PROFILE):
+    """실시간 전류 측정용 설정 (이전 설정과 달라진 항목만 전송)"""
+    instrument.apply_settings(realtime_current_settings(device_model, binary, profile))
+
+
+def read_current(instrument, device_model, binary=False):
+    """:READ? 한 번으로 전류 한 점을 읽는다"""
+    return float(read_values(instrument, device_model, ":READ?", 1, binary)[0])
+
+
+def mosfet_gate_settings(binary=False, profile=DEFAULT_PROFILE):
+    """실시간 MOSFET 게이트 SMU (2400) 설정 목록"""
+    return [
+        (":SOUR:FUNC", "VOLT"),              # Voltage source
+        (":SENS:FUNC", "'CURR'"),            # Current 측정 활성화
+        (":SENS:CURR:RANGE:AUTO", "ON"),     # Auto range
+        (":SOUR:VOLT:RANG", 200),
+        (":FORM:ELEM", "VOLT,CURR"),         # READ? -> [voltage, current]
+    ] + profile_settings("2400", profile) + data_format_settings("2400", binary) + [(":OUTP", "ON")]
+
+
+def mosfet_drain_settings(binary=False, profile=DEFAULT_PROFILE):
+    """실시간 MOSFET 드레인 SMU (2410) 설정 목록"""
+    return [
+        (":SOUR:FUNC", "VOLT"),
+        (":SOUR:VOLT:RANG", 1100),           # 2410 spec
+        (":FORM:ELEM", "VOLT,CURR"),         # READ? -> [voltage, current]
+    ] + profile_settings("2410", profile) + data_format_settings("2410", binary) + [(":OUTP", "ON")]
+
+
+def configure_mosfet_gate(instrument, binary=False, profile=DEFAULT_PROFILE):
+    """실시간 MOSFET 게이트 SMU (2400) 설정"""
+    instrument.apply_settings(mosfet_gate_settings(binary, profile))
+
+
+def configure_mosfet_drain(instrument, binary=False, profile=DEFAULT_PROFILE):
+    """실시간 MOSFET 드레인 SMU (2410) 설정"""
+    instrument.apply_settings(mosfet_drain_settings(binary, profile))
+
+
+def _timed_read(instrument, device_model, binary):
+    """:READ? 한 번 -> (측정 시각, voltage, current)
+
+    측정 시각은 쿼리 전후 time.monotonic() 의 중간값 (적분 구간의 중심에 가깝다).
+    """
+    start = time.monotonic()
+    data = read_values(instrument, device_model, ":READ?", 2, binary)  # [voltage, current]
+    return (start + time.monotonic()) / 2, float(data[0]), float(data[1])
+
+
+def read_mosfet_sample_timed(gate_instrument, drain_instrument, binary=False):
+    """게이트/드레인 SMU 의 :READ? 를 각 장비의 lane(async_smu) 에서 동시에 보내 두 적분 시간을 겹친다
+
+    반환: ((gate_time, gate_voltage, gate_current), (drain_time, drain_voltage, drain_current))
+    시각은 두 측정이 같은 time.monotonic() 시계 기준이라 서로 비교할 수 있다.
+    """
+    if on_lane():  # lane 안에서 다른 lane 을 기다리면 같은 lane 일 때 멈춤 -> 순서대로
+        return _timed_read(gate_instrument, "2400", binary), _timed_read(drain_instrument, "2410", binary)
+    gate_future = lane_for(gate_instrument).submit(_timed_read, gate_instrument, "2400", binary)
+    drain_future = lane_for(drain_instrument).submit(_timed_read, drain_instrument, "2410", binary)
+    return gate_future.result(), drain_future.result()
+
+
+def read_mosfet_sample(gate_instrument, drain_instrument, binary=False):
+    """게이트/드레인 SMU 를 동시에 읽어
+    (gate_voltage, gate_current, drain_voltage, drain_current) 반환"""
+    (_, gate_voltage, gate_current), (_, drain_voltage, drain_current) = \
+        read_mosfet_sample_timed(gate_instrument, drain_instrument, binary)
+    return gate_voltage, gate_current, drain_voltage, drain_current
+
+
+class AcquisitionWorker(threading.Thread):
+    """read_sample() 을 rate (S/s) 간격으로 호출해 (datetime, 측정값) 을 모으는 측정 스레드
+
+    GUI 는 다시 그릴 때 take_samples() 로 그동안 쌓인 샘플만 가져가므로
+    샘플링 속도가 그리기 시간에 묶이지 않는다. rate <= 0 이면 쉬지 않고 측정한다.
+    장비 접근은 세션 락으로 직렬화되므로 GUI 에서 설정 명령을 보내도 된다.
+    """
+
+    def __init__(self, read_sample, rate=10.0):
+        super().__init__(daemon=True)
+        self.read_sample = read_sample
+        self.rate = rate
+        self.samples_taken = 0
+        self._pending = deque(maxlen=MAX_PENDING_SAMPLES)
+        self._pending_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def set_rate(self, rate):
+        """샘플링 속도 변경 (S/s)"""
+        self.rate = rate
+
+    def run(self):
+        next_time = time.monotonic()
+        last_error = None
+        while not self._stop_event.is_set():
+            try:
+                value = self.read_sample()
+                timestamp = datetime.now()
+                with self._pending_lock:
+                    self._pending.append((timestamp, value))
+                self.samples_taken += 1
+                last_error = None
+            except Exception as e:
+                if str(e) != last_error:  # 같은 오류는 한 번만 출력
+                    print(f"측정 오류: {e}")
+                    last_error = str(e)
+                self._stop_event.wait(0.1)
+
+            interval = 1.0 / self.rate if self.rate and self.rate > 0 else 0.0
+            next_time = max(next_time + interval, time.monotonic() - interval)
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                self._stop_event.wait(delay)
+
+    def take_samples(self):
+        """마지막 호출 이후 쌓인 [(datetime, 측정값), ...] 을 꺼낸다"""
+        with self._pending_lock:
+            samples = list(self._pending)
+            self._pending.clear()
+        return samples
+
+    def stop(self, timeout=2.0):
+        """측정 스레드 종료 (진행 중인 측정 하나는 끝까지 기다린다)"""
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
@@ -0,0 +1,152 @@
+"""asyncio SMU 드라이버 (여러 장비의 VISA I/O 를 겹쳐서 실행)
+
+pyvisa 호출은 블로킹이라 한 스레드에서 장비 여러 대를 쓰면 게이트 write 가 드레인 query 를
+기다린다. AsyncSMU 는 공용 세션(smu_session) 을 감싸서 write / query / read_buffer 등을
+await 할 수 있게 하고, 실제 VISA 호출은 세션 전용 스레드(lane) 에서 실행한다.
+- 같은 장비의 명령은 lane 하나에서 보낸 순서대로 실행된다 (응답이 섞이지 않음)
+- 다른 장비의 명령은 서로 다른 lane 에서 동시에 진행된다
+- lane 은 최대 MAX_LANES 개, 그보다 장비가 많으면 lane 을 나눠 쓴다
+
+    async def main():
+        gate, drain = await asyncio.gather(open_async(GATE), open_async(DRAIN))
+        await asyncio.gather(gate.apply_settings(gate_settings), drain.apply_settings(drain_settings))
+        await gate.write(":SOUR:VOLT 1")
+        currents = await drain.read_buffer(21)
+    asyncio.run(main())
+
+동기 코드(GUI 등)에서는 run_concurrently 로 장비별 함수를 동시에 돌린다.
+
+    run_concurrently((gate, configure_mosfet_gate), (drain, configure_mosfet_drain))
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from smu_session import get_session
+from binary_transfer import read_values
+
+MAX_LANES = 8  # VISA 호출용 스레드 최대 수 (장비 수보다 많을 필요 없음)
+
+_executors = []  # 만든 lane (스레드 1개짜리 executor)
+_lanes = {}      # visa_address -> lane
+_lane_threads = set()  # lane 스레드 ident (lane 안에서 다시 lane 을 기다리지 않도록)
+_lanes_lock = threading.Lock()
+
+
+def _register_lane_thread():
+    with _lanes_lock:
+        _lane_threads.add(threading.get_ident())
+
+
+def on_lane():
+    """현재 스레드가 lane 스레드인지"""
+    return threading.get_ident() in _lane_threads
+
+
+def lane_for(session):
+    """세션 전용 lane - 같은 세션의 호출은 항상 같은 스레드에서 순서대로 실행된다"""
+    with _lanes_lock:
+        lane = _lanes.get(session.visa_address)
+        if lane is None:
+            if len(_executors) < MAX_LANES:
+                lane = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"smu-lane{len(_executors)}",
+                                          initializer=_register_lane_thread)
+                _executors.append(lane)
+            else:
+                lane = _executors[len(_lanes) % MAX_LANES]
+            _lanes[session.visa_address] = lane
+        return lane
+
+
+def shutdown_lanes():
+    """lane 스레드 종료 (실행 중인 호출은 끝날 때까지 기다림)"""
+    with _lanes_lock:
+        executors = list(_executors)
+        _executors.clear()
+        _lanes.clear()
+        _lane_threads.clear()
+    for executor in executors:
+        executor.shutdown(wait=True)
+
+
+class AsyncSMU:
+    """SMU 세션 하나의 awaitable 인터페이스"""
+
+    def __init__(self, session):
+        self.session = session
+        self._lane = lane_for(session)
+
+    @property
+    def visa_address(self):
+        return self.session.visa_address
+
+    async def call(self, func, *args, **kwargs):
+        """func(session, *args, **kwargs) 를 이 장비의 lane 에서 실행
+
+        smu_sweep / acquisition 의 동기 함수를 그대로 쓸 수 있다.
+            await smu.call(run_hardware_sweep, "2461", voltages)
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._lane, functools.partial(func, self.session, *args, **kwargs))
+
+    async def write(self, command):
+        return await self.call(lambda session: session.write(command))
+
+    async def query(self, command):
+        return await self.call(lambda session: session.query(command))
+
+    async def read(self):
+        return await self.call(lambda session: session.read())
+
+    async def identify(self):
+        """모델명 ('2461', '2400', '2410')"""
+        return await self.call(lambda session: session.identify())
+
+    async def apply_settings(self, settings, reset=False):
+        """session.apply_settings 와 같음 (달라진 설정만 전송, 보낸 설정 수 반환)"""
+        return await self.call(lambda session: session.apply_settings(settings, reset))
+
+    async def read_values(self, query, count=0, binary=False):
+        """측정 쿼리 -> float64 배열 (binary_transfer.read_values)"""
+        return await self.call(lambda session: read_values(session, session.identify(), query, count, binary))
+
+    async def read_buffer(self, count, binary=False):
+        """장비 측정 버퍼의 리딩 count 개 (2461 defbuffer1 / 2400 계열 :FETC?)"""
+        def read(session):
+            model = session.identify()
+            if model == "2461":
+                return read_values(session, model, f':TRAC:DATA? 1, {count}, "defbuffer1", READ', count, binary)
+            return read_values(session, model, ":FETC?", count, binary)
+        return await self.call(read)
+
+
+async def open_async(visa_address):
+    """공용 세션을 열어 AsyncSMU 로 (세션 열기도 이벤트 루프를 막지 않음)"""
+    loop = asyncio.get_running_loop()
+    session = await loop.run_in_executor(None, get_session, visa_address)
+    return AsyncSMU(session)
+
+
+def run_concurrently(*calls):
+    """[(session, func, *args), ...] 를 장비별 lane 에서 동시에 실행하고 결과 목록 반환 (동기 코드용)
+
+    하나라도 실패하면 모두 끝난 뒤 첫 예외를 다시 던진다.
+    lane 안에서 (AsyncSMU.call 로 부른 함수 안에서) 또는 이벤트 루프가 돌고 있는 스레드에서
+    부르면 lane 을 기다리다 멈추거나 asyncio.run 이 실패하므로, 현재 스레드에서 순서대로 실행한다.
+    """
+    try:
+        loop_running = asyncio.get_running_loop() is not None
+    except RuntimeError:
+        loop_running = False
+    if loop_running or on_lane():
+        return [func(session, *args) for session, func, *args in calls]
+
+    async def gather():
+        return await asyncio.gather(*(AsyncSMU(session).call(func, *args) for session, func, *args in calls),
+                                    return_exceptions=True)
+
+    results = asyncio.run(gather())
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
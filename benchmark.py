@@ -0,0 +1,317 @@
+"""측정 모드별 처리량 벤치마크 (GUI 없이 실행)
+
+각 모드의 실제 측정 경로(smu_sweep / acquisition)를 가상 장비(SIM::) 또는 실제 VISA 장비로
+돌려서 아래 값을 benchmark_results.json 에 저장한다.
+- points_per_second      : 초당 측정 포인트 수
+- latency_ms             : 포인트당 지연 p50 / p90 / p99
+                           (스윕 모드는 반복 1회의 평균, 실시간 모드는 샘플 1개 단위)
+- round_trips_per_point  : 포인트당 버스 왕복(write/query) 횟수
+- peak_memory_kb         : 측정 중 최대 파이썬 메모리 사용량 (tracemalloc)
+
+    python benchmark.py                          # 모든 모드, 가상 장비
+    python benchmark.py --mode diode_sweep_hw --repeat 10
+    python benchmark.py --profile fast           # 측정 프로파일별 처리량 비교
+    python benchmark.py --ascii                  # ASCII 전송과 비교 (기본은 GUI 와 같이 바이너리)
+    python benchmark.py --baseline old.json      # 이전 결과보다 느려지면 종료 코드 1
+"""
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import contextlib
+from datetime import datetime
+import numpy as np
+
+import simulated_smu
+from smu_session import get_session
+from binary_transfer import supports_binary
+from measurement_profiles import PROFILES, DEFAULT_PROFILE
+from smu_sweep import (
+    configure_voltage_sweep, run_voltage_sweep, run_adaptive_sweep,
+    configure_mosfet_smus, run_output_sweep, run_transfer_sweep,
+)
+from range_planner import run_planned_sweep
+from acquisition import (
+    configure_realtime_current, read_current,
+    configure_mosfet_gate, configure_mosfet_drain, read_mosfet_sample,
+)
+
+DEFAULT_OUTPUT = "benchmark_results.json"
+DEFAULT_DIODE = "SIM::2461::DIODE::INSTR"
+DEFAULT_GATE = "SIM::2400::MOSFET::GATE::INSTR"
+DEFAULT_DRAIN = "SIM::2410::MOSFET::DRAIN::INSTR"
+
+# 각 모드 창의 기본 입력값과 같은 조건
+DIODE_VOLTAGES = np.arange(0, 5 + 0.1, 0.1)
+DIODE_CURRENT_LIMIT = 0.01
+OUTPUT_VGS = np.arange(0, 5 + 0.5, 1)
+OUTPUT_VDS = np.arange(0, 20 + 0.5, 1)
+TRANSFER_VDS = np.arange(0, 10 + 1, 2)
+TRANSFER_VGS = np.arange(0, 5 + 0.05, 0.1)
+
+
+def _percentiles(latencies_s):
+    latencies_ms = np.asarray(latencies_s) * 1000
+    p50, p90, p99 = np.percentile(latencies_ms, [50, 90, 99])
+    return {"p50": round(float(p50), 4), "p90": round(float(p90), 4), "p99": round(float(p99), 4)}
+
+
+# --- 모드별 측정 함수 ---------------------------------------------------------
+# 각 함수는 (설정 함수, 측정 함수, 포인트 수, 측정 1회가 포인트 하나인지) 를 반환한다.
+# 측정 함수가 정수를 반환하면 그 호출에서 실제로 측정한 포인트 수로 쓴다 (적응형 스윕).
+
+def _diode_sweep(sessions, args, hardware_sweep):
+    instrument = sessions["diode"]
+    model = instrument.identify()
+    binary = not args.ascii and supports_binary(instrument.visa_address)
+
+    def setup():
+        configure_voltage_sweep(instrument, model, DIODE_CURRENT_LIMIT, profile=args.profile)
+        instrument.write(":OUTPut ON")
+
+    def measure():
+        run_voltage_sweep(instrument, model, DIODE_VOLTAGES, hardware_sweep, binary)
+
+    return setup, measure, len(DIODE_VOLTAGES), False
+
+
+def _diode_sweep_adaptive(sessions, args):
+    """적응형 스윕 - 포인트 수는 실제로 측정한 점 (같은 해상도 균일 격자 기준은 uniform_points)"""
+    instrument = sessions["diode"]
+    model = instrument.identify()
+    binary = not args.ascii and supports_binary(instrument.visa_address)
+    step = DIODE_VOLTAGES[1] - DIODE_VOLTAGES[0]
+
+    def setup():
+        configure_voltage_sweep(instrument, model, DIODE_CURRENT_LIMIT, profile=args.profile)
+        instrument.write(":OUTPut ON")
+
+    def measure():
+        voltages, _ = run_adaptive_sweep(instrument, model, DIODE_VOLTAGES[0], DIODE_VOLTAGES[-1], step,
+                                         binary=binary, grid=DIODE_VOLTAGES)
+        return len(voltages)
+
+    return setup, measure, len(DIODE_VOLTAGES), False
+
+
+def _diode_sweep_planned(sessions, args):
+    """구간별 고정 레인지 스윕 (워밍업 측정이 다음 측정의 기준 곡선이 됨)"""
+    instrument = sessions["diode"]
+    model = instrument.identify()
+    binary = not args.ascii and supports_binary(instrument.visa_address)
+
+    def setup():
+        configure_voltage_sweep(instrument, model, DIODE_CURRENT_LIMIT, profile=args.profile)
+        instrument.write(":OUTPut ON")
+
+    def measure():
+        run_planned_sweep(instrument, model, DIODE_VOLTAGES, DIODE_CURRENT_LIMIT, binary=binary)
+
+    return setup, measure, len(DIODE_VOLTAGES), False
+
+
+def _output_sweep(sessions, args, trigger_link=False):
+    gate, drain = sessions["gate"], sessions["drain"]
+    binary = not args.ascii and supports_binary(gate.visa_address) and supports_binary(drain.visa_address)
+
+    def setup():
+        configure_mosfet_smus(gate, drain, 0.01, 0.1, binary, profile=args.profile)
+
+    def measure():
+        run_output_sweep(gate, drain, OUTPUT_VGS, OUTPUT_VDS, binary, trigger_link)
+
+    return setup, measure, len(OUTPUT_VGS) * len(OUTPUT_VDS), False
+
+
+def _transfer_sweep(sessions, args, trigger_link=False):
+    gate, drain = sessions["gate"], sessions["drain"]
+    binary = not args.ascii and supports_binary(gate.visa_address) and supports_binary(drain.visa_address)
+
+    def setup():
+        configure_mosfet_smus(gate, drain, 0.01, 0.1, binary, profile=args.profile)
+
+    def measure():
+        run_transfer_sweep(gate, drain, TRANSFER_VDS, TRANSFER_VGS, binary, trigger_link)
+
+    return setup, measure, len(TRANSFER_VDS) * len(TRANSFER_VGS), False
+
+
+def _realtime_current(sessions, args):
+    instrument = sessions["diode"]
+    model = instrument.identify()
+    binary = not args.ascii and supports_binary(instrument.visa_address)
+
+    def setup():
+        configure_realtime_current(instrument, model, binary, args.profile)
+
+    def measure():
+        read_current(instrument, model, binary)
+
+    return setup, measure, 1, True
+
+
+def _realtime_mosfet(sessions, args):
+    gate, drain = sessions["gate"], sessions["drain"]
+    binary = not args.ascii and supports_binary(gate.visa_address) and supports_binary(drain.visa_address)
+
+    def setup():
+        configure_mosfet_gate(gate, binary, args.profile)
+        configure_mosfet_drain(drain, binary, args.profile)
+
+    def measure():
+        read_mosfet_sample(gate, drain, binary)
+
+    return setup, measure, 1, True
+
+
+MODES = {
+    "diode_sweep_hw": (("diode",), lambda s, a: _diode_sweep(s, a, True)),
+    "diode_sweep_point": (("diode",), lambda s, a: _diode_sweep(s, a, False)),
+    "diode_sweep_adaptive": (("diode",), _diode_sweep_adaptive),
+    "diode_sweep_planned": (("diode",), _diode_sweep_planned),
+    "output_sweep": (("gate", "drain"), _output_sweep),
+    "transfer_sweep": (("gate", "drain"), _transfer_sweep),
+    "output_sweep_tlink": (("gate", "drain"), lambda s, a: _output_sweep(s, a, True)),
+    "transfer_sweep_tlink": (("gate", "drain"), lambda s, a: _transfer_sweep(s, a, True)),
+    "realtime_current": (("diode",), _realtime_current),
+    "realtime_mosfet": (("gate", "drain"), _realtime_mosfet),
+}
+
+
+def run_mode(name, sessions, args):
+    """모드 하나를 측정하고 결과 딕셔너리를 반환"""
+    roles, factory = MODES[name]
+    instruments = [sessions[role] for role in roles]
+    setup, measure, points_per_call, realtime = factory(sessions, args)
+    calls = args.samples if realtime else args.repeat
+
+    # 측정 루프의 디버그 print 는 시간 측정에서 제외
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup()
+        measure()  # 워밍업 (첫 호출의 포맷 설정 등 제외)
+
+        transactions_before = sum(inst.transactions for inst in instruments)
+        tracemalloc.start()
+        latencies = []
+        total_points = 0
+        start = time.perf_counter()
+        for _ in range(calls):
+            t0 = time.perf_counter()
+            measured = measure()
+            points = measured if isinstance(measured, int) else points_per_call
+            latencies.append((time.perf_counter() - t0) / points)
+            total_points += points
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        transactions = sum(inst.transactions for inst in instruments) - transactions_before
+
+        for inst in instruments:
+            inst.write(":OUTP OFF")
+
+    result = {
+        "mode": name,
+        "profile": args.profile,
+        "addresses": [inst.visa_address for inst in instruments],
+        "points": total_points,
+        "elapsed_s": round(elapsed, 6),
+        "points_per_second": round(total_points / elapsed, 3) if elapsed > 0 else None,
+        "latency_ms": _percentiles(latencies),
+        "round_trips_per_point": round(transactions / total_points, 3),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+    if total_points != calls * points_per_call:
+        result["uniform_points"] = calls * points_per_call  # 같은 해상도 균일 스윕의 포인트 수
+    return result
+
+
+def compare_with_baseline(results, baseline_path, tolerance):
+    """이전 결과 파일과 points_per_second 를 비교해 느려진 모드 목록을 반환"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["mode"]: r for r in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        old = baseline.get(result["mode"])
+        if not old or not old.get("points_per_second") or not result["points_per_second"]:
+            continue
+        ratio = result["points_per_second"] / old["points_per_second"]
+        if ratio < 1 - tolerance:
+            regressions.append((result["mode"], old["points_per_second"], result["points_per_second"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keithley SMU 측정 모드 처리량 벤치마크")
+    parser.add_argument("--mode", action="append", choices=list(MODES),
+                        help="측정할 모드 (여러 번 지정 가능, 기본: 전체)")
+    parser.add_argument("--diode", default=DEFAULT_DIODE, help="다이오드/실시간 전류 장비 주소")
+    parser.add_argument("--gate", default=DEFAULT_GATE, help="MOSFET 게이트 SMU 주소")
+    parser.add_argument("--drain", default=DEFAULT_DRAIN, help="MOSFET 드레인 SMU 주소")
+    parser.add_argument("--repeat", type=int, default=5, help="스윕 모드 반복 횟수")
+    parser.add_argument("--samples", type=int, default=200, help="실시간 모드 샘플 수")
+    parser.add_argument("--ascii", action="store_true",
+                        help="바이너리 전송 끄기 (기본은 GUI 처럼 ASRL 이 아닌 주소면 바이너리)")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=list(PROFILES),
+                        help="측정 프로파일 (NPLC / 필터 / 오토제로, 기본: normal)")
+    parser.add_argument("--latency", type=float, help="가상 장비 버스 지연 (s)")
+    parser.add_argument("--time-scale", type=float, help="가상 장비 지연 배율 (0 = 지연 없음)")
+    parser.add_argument("--seed", type=int, default=0, help="가상 장비 노이즈 시드")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="결과 JSON 파일")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="baseline 대비 허용 속도 저하 비율 (기본 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    sim_config = {"seed": args.seed}
+    if args.latency is not None:
+        sim_config["latency"] = args.latency
+    if args.time_scale is not None:
+        sim_config["time_scale"] = args.time_scale
+    simulated_smu.configure(**sim_config)
+
+    modes = args.mode or list(MODES)
+    addresses = {"diode": args.diode, "gate": args.gate, "drain": args.drain}
+    sessions = {}
+    results = []
+    for name in modes:
+        try:
+            for role in MODES[name][0]:
+                if role not in sessions:
+                    sessions[role] = get_session(addresses[role])
+            result = run_mode(name, sessions, args)
+        except Exception as e:
+            print(f"{name}: 측정 실패 - {e}")
+            continue
+        results.append(result)
+        latency = result["latency_ms"]
+        print(f"{name:20s} {result['points_per_second']:>10.1f} pts/s  "
+              f"p50 {latency['p50']:.3f} ms  p99 {latency['p99']:.3f} ms  "
+              f"{result['round_trips_per_point']:.2f} trips/pt  "
+              f"{result['peak_memory_kb']:.1f} KB")
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "simulation": dict(simulated_smu.SIM_CONFIG),
+        "binary": not args.ascii,  # ASRL 주소는 이 값과 상관없이 ASCII
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"결과 저장: {args.output}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+        for mode, old, new in regressions:
+            print(f"속도 저하: {mode} {old:.1f} -> {new:.1f} pts/s")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
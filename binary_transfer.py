@@ -0,0 +1,53 @@
+"""측정값 바이너리 전송 (IEEE-754 REAL/SREAL)
+
+ASCII 응답(`strip().split(',')` + `float()`) 대신 장비를 바이너리 포맷으로 바꾸고
+버퍼 전체를 블록 전송 한 번으로 NumPy 배열에 받는다.
+- 2400/2410 : :FORM:DATA SREAL (single, 4 byte) + :FORM:BORD SWAP (little-endian)
+              GPIB 전용 - RS-232(ASRL)에서는 ASCII만 지원
+- 2461      : :FORM:DATA REAL (double, 8 byte) + :FORM:BORD SWAP
+"""
+import numpy as np
+
+
+def supports_binary(visa_address):
+    """바이너리 포맷을 쓸 수 있는 연결인지 확인 (2400 계열은 시리얼에서 ASCII만 가능)"""
+    return not str(visa_address).upper().startswith("ASRL")
+
+
+def binary_datatype(device_model):
+    """struct 포맷 문자 ('d' = REAL 64bit, 'f' = SREAL 32bit)"""
+    return "d" if device_model == "2461" else "f"
+
+
+def data_format_settings(device_model, binary):
+    """응답 포맷 설정 목록 [(헤더, 값), ...] (session.apply_settings 용)"""
+    if binary:
+        return [(":FORM:DATA", "REAL" if device_model == "2461" else "SREAL"),
+                (":FORM:BORD", "SWAP")]
+    return [(":FORM:DATA", "ASC")]
+
+
+def set_data_format(instrument, device_model, binary):
+    """READ?/FETC?/MEAS?/TRAC:DATA? 응답 포맷 설정"""
+    for header, value in data_format_settings(device_model, binary):
+        instrument.write(f"{header} {value}")
+
+
+def read_values(instrument, device_model, query, count=0, binary=False):
+    """측정 쿼리를 보내고 응답을 float64 NumPy 배열로 반환
+
+    count 는 응답에 들어있는 값의 개수(리딩 수 x 엘리먼트 수)로,
+    2400 계열의 '#0' 헤더(길이 미표기) 블록을 읽을 때 필요하다.
+    """
+    if binary:
+        values = instrument.query_binary_values(
+            query,
+            datatype=binary_datatype(device_model),
+            is_big_endian=False,
+            container=np.array,
+            data_points=count,
+        )
+        return values.astype(np.float64)
+
+    response = instrument.query(query)
+    return np.array(response.strip().split(','), dtype=float)
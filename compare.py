@@ -7,12 +7,18 @@ from PyQt5.QtWidgets import (
     QPushButton, QFileDialog, QMessageBox, QHBoxLayout, QSpacerItem, QSizePolicy
 )
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from record_cache import load_csv_array
+from downsample import downsample_visible
+
+LOD_POINTS_PER_PIXEL = 2   # 화면 가로 픽셀당 남길 점 수 (다운샘플링 목표)
+MARKER_MAX_POINTS = 200    # 보이는 점이 이보다 적을 때만 marker 'o' 표시
+LEGEND_MAX_CURVES = 40     # 곡선이 이보다 많으면 범례 생략
 
 
 class DiodeComparisonApp(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.setWindowTitle("6 graph Comparison")
+        self.setWindowTitle("Graph Comparison")
         self.setGeometry(500, 100, 1500, 1200)  # 창 크기 조정
 
         # Central widget and layout
@@ -60,53 +66,71 @@ class DiodeComparisonApp(QMainWindow):
 
         # Data storage for loaded files
         self.loaded_files = []
+        self.lines = []  # loaded_files 와 같은 순서의 Line2D (다운샘플링한 데이터만 가짐)
+        self.original_xlim = None
+        self.original_ylim = None
+        self.canvas.mpl_connect('resize_event', lambda event: self.update_lod())
 
     def load_csv_files(self):
-        """Load up to 6 CSV files and plot their data."""
+        """Load CSV files (개수 제한 없음) and plot their data."""
         try:
             # Open file dialog to select CSV files
             file_dialog = QFileDialog()
             file_paths, _ = file_dialog.getOpenFileNames(
-                self, "Select up to 6 CSV Files", "", "CSV Files (*.csv)"
+                self, "Select CSV Files", "", "CSV Files (*.csv)"
             )
 
             if len(file_paths) == 0:
                 QMessageBox.warning(self, "No File Selected", "No files were selected.")
                 return
 
-            if len(file_paths) > 6:
-                QMessageBox.warning(self, "Too Many Files", "Please select up to 6 files.")
-                return
-
             # Clear previous data and plot
             self.loaded_files = []
+            self.lines = []
             self.canvas.figure.clf()
             ax = self.canvas.figure.add_subplot(111)
 
+            # 곡선 수에 맞춰 색 선택 (6개 이하는 기존 색 그대로)
+            if len(file_paths) <= 6:
+                colors = ['b', 'g', 'r', 'c', 'm', 'y']
+            elif len(file_paths) <= 20:
+                colors = plt.cm.tab20(np.linspace(0, 1, 20))
+            else:
+                colors = plt.cm.turbo(np.linspace(0, 1, len(file_paths)))
+
             # Load and plot each file
-            colors = ['b', 'g', 'r', 'c', 'm', 'y']  # Colors for up to 6 diodes
             for i, file_path in enumerate(file_paths):
-                data = np.loadtxt(file_path, delimiter=",", skiprows=1)  # Skip header row
+                data = load_csv_array(file_path)  # Skip header row (파싱 결과는 캐시에서 재사용)
                 voltages = data[:, 0]
                 currents = data[:, 1]
                 label = os.path.basename(file_path).replace(".csv", "")  # Use filename as label
 
-                # Plot data
-                ax.plot(voltages, currents, marker='o', linestyle='-', color=colors[i % len(colors)], label=label)
+                # 선은 빈 데이터로 만들고 update_lod 에서 보이는 구간만 다운샘플링해서 채움
+                line, = ax.plot([], [], linestyle='-', color=colors[i % len(colors)], label=label)
+                self.lines.append(line)
 
-                # Store loaded data for future use (optional)
+                # Store loaded data (원본 전체)
                 self.loaded_files.append((file_path, voltages, currents))
-                # Save original axes limits for reset functionality
-                self.original_xlim = ax.get_xlim()
-                self.original_ylim = ax.get_ylim()
+                ax.update_datalim(np.column_stack([voltages, currents])[np.isfinite(data[:, :2]).all(axis=1)])
 
+            ax.autoscale_view()
+            # Save original axes limits for reset functionality
+            self.original_xlim = ax.get_xlim()
+            self.original_ylim = ax.get_ylim()
 
             # Configure plot appearance
             ax.set_title("Diode I-V Characteristics Comparison", fontsize=18)
             ax.set_xlabel("Voltage (V)", fontsize=14)
             ax.set_ylabel("Current (A)", fontsize=14)
             ax.grid(True)
-            ax.legend(fontsize=12)
+            if len(self.lines) <= 6:
+                ax.legend(fontsize=12)
+            elif len(self.lines) <= LEGEND_MAX_CURVES:
+                ax.legend(fontsize=8, ncol=(len(self.lines) + 19) // 20)
+
+            # 줌 / 팬으로 x 범위가 바뀔 때마다 다시 다운샘플링
+            ax.callbacks.connect('xlim_changed', lambda changed_ax: self.update_lod())
+            self.update_lod()
 
             # Update canvas
             self.canvas.draw()
@@ -114,6 +138,18 @@ class DiodeComparisonApp(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"An error occurred: {e}")
 
+    def update_lod(self):
+        """보이는 x 구간의 데이터를 화면 픽셀 수에 맞게 LTTB 로 다운샘플링해서 선에 넣는다"""
+        if not self.lines:
+            return
+        ax = self.lines[0].axes
+        left, right = ax.get_xlim()
+        threshold = max(int(ax.bbox.width * LOD_POINTS_PER_PIXEL), 3)
+        for line, (_, voltages, currents) in zip(self.lines, self.loaded_files):
+            x, y = downsample_visible(voltages, currents, left, right, threshold)
+            line.set_data(x, y)
+            line.set_marker('o' if len(x) <= MARKER_MAX_POINTS and len(self.lines) <= 6 else 'None')
+
     def enable_zoom(self):
         """Enable zoom functionality."""
         QMessageBox.information(self, "Zoom Mode", "Use your mouse wheel to zoom in/out.")
@@ -0,0 +1,82 @@
+"""전류 제한(compliance) 에 걸린 스윕 곡선의 조기 종료 정책
+
+DUT 가 전류 제한에 걸리면 그 뒤의 더 높은 전압 포인트는 제한값만 읽히는데도 모두 측정하게 된다.
+리딩마다 compliance 상태 비트를 같이 읽어서, 연속 hits 번 걸리면 action 에 따라 처리한다.
+- continue : 기록만 하고 계속 측정 (기존 동작)
+- skip     : 이 곡선(다이오드 스윕 / Vgs 또는 Vds 한 줄)의 나머지 포인트를 건너뜀
+- coarse   : 이 곡선의 나머지는 coarse_stride 포인트 간격으로만 측정
+- abort    : 스윕 전체 중단 (MOSFET 스윕의 남은 곡선도 측정하지 않음)
+
+상태 비트: 2400/2410 은 :FORM:ELEM 의 STAT 원소, 2461 은 버퍼의 SOURSTAT 원소
+(포인트 단위 측정은 :SOUR:VOLT:ILIM:TRIP?) 의 bit 3 (소스 제한).
+
+    policy = CompliancePolicy("skip", hits=3)
+    values, currents, aborted = run_compliance_curve(measure, voltages, policy)
+"""
+import numpy as np
+
+COMPLIANCE_BIT = 1 << 3        # 2400/2410 STAT, 2461 SOURSTAT 의 compliance 비트
+COMPLIANCE_CHUNK_POINTS = 16   # 정책이 있을 때 하드웨어 스윕을 나누는 크기 (판정 간격)
+COMPLIANCE_ACTIONS = ("continue", "skip", "coarse", "abort")
+
+
+def is_compliance(status):
+    """상태 워드(float 로 읽힌 값) 에 compliance 비트가 있는지"""
+    return bool(int(status) & COMPLIANCE_BIT)
+
+
+class CompliancePolicy:
+    """연속 compliance 리딩이 hits 번이면 action 실행"""
+
+    def __init__(self, action="skip", hits=3, coarse_stride=4):
+        if action not in COMPLIANCE_ACTIONS:
+            raise ValueError(f"Unknown compliance action: {action}")
+        if hits < 1 or coarse_stride < 1:
+            raise ValueError("hits 와 coarse_stride 는 1 이상이어야 합니다")
+        self.action = action
+        self.hits = int(hits)
+        self.coarse_stride = int(coarse_stride)
+
+    def __repr__(self):
+        return f"CompliancePolicy({self.action!r}, hits={self.hits}, coarse_stride={self.coarse_stride})"
+
+
+def run_compliance_curve(measure, values, policy, chunk_points=1):
+    """곡선 하나를 compliance 정책에 따라 측정
+
+    measure(values 배열) -> (currents, compliance 플래그) 를 chunk_points 개씩 부른다
+    (포인트 단위 측정은 1, 하드웨어 스윕은 COMPLIANCE_CHUNK_POINTS).
+    이미 측정한 청크의 리딩은 정책이 걸린 뒤의 것도 그대로 결과에 넣는다.
+    반환: (측정한 values, currents, aborted) - aborted 는 action "abort" 로 멈췄을 때 True
+    """
+    values = np.asarray(values, dtype=float)
+    taken, currents = [], []
+    streak = 0
+    stride = 1
+    index = 0
+    while index < len(values):
+        indices = np.arange(index, len(values), stride)[:max(int(chunk_points), 1)]
+        readings, flags = measure(values[indices])
+        triggered = False
+        for current, flag in zip(readings, flags):
+            currents.append(float(current))
+            streak = streak + 1 if flag else 0
+            triggered |= streak >= policy.hits
+        taken.extend(indices.tolist())
+        index = int(indices[-1]) + stride
+
+        if not triggered or policy.action == "continue":
+            continue
+        if policy.action == "abort":
+            print(f"Compliance {policy.hits} 포인트 연속: 스윕 중단")
+            return values[taken], currents, True
+        if index >= len(values):
+            continue
+        if policy.action == "skip":
+            print(f"Compliance {policy.hits} 포인트 연속: 나머지 {len(values) - index} 포인트 생략")
+            return values[taken], currents, False
+        if stride == 1:  # coarse
+            print(f"Compliance {policy.hits} 포인트 연속: {policy.coarse_stride} 포인트 간격으로 측정")
+            stride = policy.coarse_stride
+            index = int(indices[-1]) + stride
+    return values[taken], currents, False
@@ -0,0 +1,50 @@
+"""측정 기록 CSV 형식 (GUI 저장 버튼과 recipe_runner 가 같은 형식으로 쓰도록 한 곳에 모음)
+
+- 다이오드 스윕      : data_<시각>.csv            "Voltage (V), Current (A)"
+- MOSFET Id-Vds     : MOSFET_IdVds_<시각>.csv    "Vgs(V),Vds(V),Id(A)"
+- MOSFET Id-Vgs     : MOSFET_IdVgs_<시각>.csv    "Vds(V),Vgs(V),Id(A)"
+- 실시간 전류/MOSFET : current_data_<시각>.csv    (recorder.CSVRecorder + 아래 헤더)
+
+    save_diode_csv("data.csv", voltages, currents)
+    save_output_csv("MOSFET_IdVds.csv", run_output_sweep(gate, drain, vgs_values, vds_values))
+"""
+from datetime import datetime
+import numpy as np
+
+REALTIME_CURRENT_HEADER = ["Timestamp", "Source Voltage (V)", "Current Limit (A)", "Current (A)"]
+REALTIME_MOSFET_HEADER = ["Timestamp", "Gate Voltage (V)", "Drain Voltage (V)",
+                          "Gate Current (A)", "Drain Current (A)", "Current Limit (A)"]
+
+
+def sweep_timestamp(now=None):
+    """스윕 기록 파일 이름의 시각 (YYYY-MM-DD_HH-MM-SS)"""
+    return (now or datetime.now()).strftime("%Y-%m-%d_%H-%M-%S")
+
+
+def realtime_timestamp(now=None):
+    """실시간 기록 파일 이름의 시각 (YYYYMMDD_HHMMSS)"""
+    return (now or datetime.now()).strftime("%Y%m%d_%H%M%S")
+
+
+def save_diode_csv(path, voltages, currents):
+    """다이오드 I-V 스윕 (전압, 전류 두 열)"""
+    data = np.column_stack((voltages, currents))
+    np.savetxt(path, data, delimiter=",", header="Voltage (V), Current (A)", comments="")
+
+
+def save_output_csv(path, output_data):
+    """Id-Vds 출력 특성 {vgs: (vds 배열, id 배열)}"""
+    with open(path, "w") as f:
+        f.write("Vgs(V),Vds(V),Id(A)\n")
+        for vgs, (vds_arr, ids_arr) in output_data.items():
+            for vds, ids in zip(vds_arr, ids_arr):
+                f.write(f"{vgs},{vds},{ids}\n")
+
+
+def save_transfer_csv(path, transfer_data):
+    """Id-Vgs 전달 특성 {vds: (vgs 배열, id 배열)}"""
+    with open(path, "w") as f:
+        f.write("Vds(V),Vgs(V),Id(A)\n")
+        for vds, (vgs_arr, ids_arr) in transfer_data.items():
+            for vgs, ids in zip(vgs_arr, ids_arr):
+                f.write(f"{vds},{vgs},{ids}\n")
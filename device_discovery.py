@@ -0,0 +1,123 @@
+"""장비 탐색 및 *IDN? 식별 (병렬 + 디스크 캐시)
+
+- 모든 VISA 주소를 짧은 타임아웃으로 동시에 조회해서 죽은 주소 하나가
+  전체를 VISA 타임아웃만큼 붙잡지 않게 한다.
+- 주소 -> 모델 결과는 device_cache.json 에 저장해 다음 실행 때 바로 사용하고,
+  캐시에서 꺼낸 주소는 프로세스당 한 번 백그라운드에서 다시 확인한다.
+- 응답이 없던 주소는 캐시에 남기지 않는다 (나중에 켜진 장비는 다음 조회 때 바로 다시 확인).
+"""
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from smu_session import get_session
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "device_cache.json")
+PROBE_TIMEOUT = 2000  # ms, 장비 하나를 조회할 때의 타임아웃
+
+_cache = None          # {address: {"model": "2400", "checked": epoch seconds}} (식별된 주소만)
+_verified = set()      # 이번 실행에서 확인했거나 확인을 예약한 주소
+_cache_lock = threading.Lock()
+
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        try:
+            with open(CACHE_PATH, encoding="utf-8") as f:
+                _cache = json.load(f)
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+
+def _save_cache():
+    try:
+        tmp_path = CACHE_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(_cache, f, indent=2)
+        os.replace(tmp_path, CACHE_PATH)
+    except OSError as e:
+        print(f"장비 캐시 저장 오류: {e}")
+
+
+def probe_device(visa_address, timeout=PROBE_TIMEOUT):
+    """짧은 타임아웃으로 *IDN? 을 보내 모델명을 반환 (응답 없으면 None)"""
+    try:
+        session = get_session(visa_address)
+        with session.lock:
+            previous_timeout = session.timeout
+            session.timeout = timeout
+            try:
+                return session.identify(refresh=True)
+            finally:
+                session.timeout = previous_timeout
+    except Exception as e:
+        print(f"장비 식별 실패 ({visa_address}): {e}")
+        return None
+
+
+def probe_devices(visa_addresses, timeout=PROBE_TIMEOUT):
+    """여러 주소를 동시에 조회하고 캐시를 갱신"""
+    visa_addresses = list(visa_addresses)
+    if not visa_addresses:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=len(visa_addresses)) as executor:
+        models = list(executor.map(lambda addr: probe_device(addr, timeout), visa_addresses))
+
+    result = dict(zip(visa_addresses, models))
+    with _cache_lock:
+        cache = _load_cache()
+        now = time.time()
+        for addr, model in result.items():
+            if model is None:
+                cache.pop(addr, None)  # 실패는 저장하지 않음 (다음에 다시 조회)
+            else:
+                cache[addr] = {"model": model, "checked": now}
+            _verified.add(addr)
+        _save_cache()
+    return result
+
+
+def revalidate_async(visa_addresses, timeout=PROBE_TIMEOUT):
+    """이번 실행에서 아직 확인하지 않은 주소만 백그라운드에서 다시 조회 (없으면 None)"""
+    with _cache_lock:
+        pending = [addr for addr in visa_addresses if addr not in _verified]
+        _verified.update(pending)
+    if not pending:
+        return None
+    thread = threading.Thread(target=probe_devices, args=(pending, timeout), daemon=True)
+    thread.start()
+    return thread
+
+
+def find_device_models(visa_addresses, timeout=PROBE_TIMEOUT):
+    """주소 -> 모델명 딕셔너리 반환
+
+    캐시에 있는 주소는 바로 반환하고(이번 실행에서 아직 확인하지 않았으면
+    백그라운드 재검증 예약), 캐시에 없는(또는 모델이 없는) 주소만 병렬로 조회한다.
+    """
+    visa_addresses = list(visa_addresses)
+    with _cache_lock:
+        cache = _load_cache()
+        result = {addr: cache[addr]["model"] for addr in visa_addresses
+                  if cache.get(addr, {}).get("model")}
+        stale = [addr for addr in result if addr not in _verified]
+
+    missing = [addr for addr in visa_addresses if addr not in result]
+    if missing:
+        result.update(probe_devices(missing, timeout))
+    if stale:
+        revalidate_async(stale, timeout)
+    return result
+
+
+def invalidate(visa_address):
+    """캐시에서 주소를 지운다 (장비가 바뀌었거나 응답이 없을 때)"""
+    with _cache_lock:
+        cache = _load_cache()
+        if cache.pop(visa_address, None) is not None:
+            _save_cache()
+        _verified.discard(visa_address)
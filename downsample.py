@@ -0,0 +1,92 @@
+"""그래프 표시용 다운샘플링 (LTTB: Largest-Triangle-Three-Buckets)
+
+화면 픽셀 수보다 많은 점은 그려 봐야 겹치기만 하므로, 곡선 모양(피크/꺾임)을
+유지하면서 점 수를 threshold 개로 줄인다.
+첫 점과 마지막 점은 항상 남기고, 가운데는 threshold-2 개의 버킷마다 한 점을 고른다.
+
+원래 LTTB 는 버킷마다 이전 버킷에서 고른 점을 기준으로 삼아 순서대로 계산하지만,
+여기서는 파이썬 반복문을 피하려고 두 번에 나눠 벡터 연산으로 계산한다.
+1차: 이전 버킷의 평균점을 기준으로 고르고, 2차: 1차에서 고른 이전 버킷의 점을 기준으로 다시 고른다.
+
+    idx = lttb_indices(x, y, 1000)
+    line.set_data(x[idx], y[idx])
+"""
+import numpy as np
+
+
+def _bucket_argmax(values, bucket_ids, starts, counts):
+    """버킷마다 values 가 가장 큰 원소의 전체 인덱스"""
+    maxima = np.maximum.reduceat(values, starts)
+    hits = np.flatnonzero(values == np.repeat(maxima, counts))
+    _, first = np.unique(bucket_ids[hits], return_index=True)  # 같은 값이면 앞쪽 점
+    return hits[first]
+
+
+def lttb_indices(x, y, threshold):
+    """(x, y) 에서 남길 점의 인덱스 배열 (오름차순, 최대 threshold 개)
+
+    x 는 정렬돼 있다고 가정한다. threshold 가 점 수 이상이면 전체 인덱스를 돌려준다.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    threshold = int(threshold)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # 가운데 점들(1 ~ n-2)을 threshold-2 개 버킷으로 나눈다
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    starts = edges[:-1]
+    counts = np.diff(edges)
+    buckets = len(starts)
+    bucket_ids = np.repeat(np.arange(buckets), counts)
+    mid_x, mid_y = x[1:n - 1], y[1:n - 1]
+    local_starts = starts - 1
+
+    # 버킷 평균점 (다음 버킷 기준점으로 사용, 마지막 버킷의 다음은 끝점)
+    mean_x = np.add.reduceat(mid_x, local_starts) / counts
+    mean_y = np.add.reduceat(mid_y, local_starts) / counts
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    def select(anchor_x, anchor_y):
+        ax = np.repeat(anchor_x, counts)
+        ay = np.repeat(anchor_y, counts)
+        cx = np.repeat(next_x, counts)
+        cy = np.repeat(next_y, counts)
+        area = np.abs((ax - cx) * (mid_y - ay) - (ax - mid_x) * (cy - ay))
+        return _bucket_argmax(area, bucket_ids, local_starts, counts) + 1
+
+    # 1차: 이전 버킷의 평균점을 기준점으로
+    chosen = select(np.insert(mean_x[:-1], 0, x[0]), np.insert(mean_y[:-1], 0, y[0]))
+    # 2차: 1차에서 고른 이전 버킷의 점을 기준점으로 (원래 LTTB 와 거의 같은 결과)
+    chosen = select(np.insert(x[chosen[:-1]], 0, x[0]), np.insert(y[chosen[:-1]], 0, y[0]))
+
+    return np.concatenate(([0], chosen, [n - 1]))
+
+
+def visible_slice(x, left, right):
+    """정렬된 x 에서 [left, right] 구간 + 양쪽 한 점씩 (선이 화면 끝까지 이어지도록)"""
+    start = max(int(np.searchsorted(x, left, side="left")) - 1, 0)
+    stop = min(int(np.searchsorted(x, right, side="right")) + 1, len(x))
+    return slice(start, stop)
+
+
+def downsample_visible(x, y, left, right, threshold):
+    """화면에 보이는 구간만 잘라서 threshold 개 이하로 다운샘플링한 (x, y)
+
+    x 가 정렬돼 있지 않으면 (왕복 스윕 등) 구간을 자르지 않고 전체를 그대로 쓴다.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    finite = np.isfinite(x) & np.isfinite(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    if len(x) > 1 and np.all(x[1:] >= x[:-1]):
+        if left > right:
+            left, right = right, left
+        part = visible_slice(x, left, right)
+        x, y = x[part], y[part]
+        idx = lttb_indices(x, y, threshold)
+        return x[idx], y[idx]
+    return x, y
@@ -0,0 +1,189 @@
+"""긴 실시간 측정 히스토리용 다중 해상도 min/max 피라미드
+
+level 0 은 원본 샘플, level k 는 원본 factor**k 개씩 묶은 블록의 (시작 시각, 최소, 최대).
+샘플이 들어올 때마다 완성된 블록만 위 레벨로 올려서 갱신 비용은 샘플당 O(1) (분할 상환).
+조회할 때는 보이는 구간의 블록 수가 max_points 이하가 되는 가장 촘촘한 레벨을 골라서,
+측정 시간이 몇 시간이든 그리는 점 수와 시간은 화면 크기에만 비례한다.
+아직 다 차지 않은 마지막 블록은 조회할 때 아래 레벨에서 바로 계산해 붙인다.
+레벨마다 최근 max_rows 행(의 1~2 배)만 메모리에 두고 앞쪽은 버린다. 원본 샘플(level 0)은
+최근 max_rows 개만 남지만, 위 레벨은 행 수가 적어 처음부터의 min/max 를 계속 갖고 있으므로
+1 kS/s 로 몇 시간을 측정해도 메모리는 레벨 수(log)에 비례해서만 늘어난다.
+조회 구간의 시작을 덮지 못하는(앞쪽을 버린) 레벨은 건너뛰고 더 거친 레벨을 쓴다.
+
+    pyramid = MinMaxPyramid(channels=2)
+    pyramid.extend(times, values)             # times: (n,), values: (n, channels)
+    t, lo, hi = pyramid.query(t0, t1, 2000)   # lo/hi: (channels, m)
+"""
+import numpy as np
+
+MAX_LEVEL_ROWS = 1 << 18  # 레벨마다 보관하는 최근 행 수 (level 0 = 1 kS/s 에서 약 4분의 원본 샘플)
+
+
+class _GrowableArray:
+    """뒤에 덧붙이는 2차원 float64 배열 (용량 2배씩 증가, trim 으로 앞쪽을 버림)"""
+
+    def __init__(self, rows, capacity=1024, max_rows=None):
+        self._data = np.empty((rows, capacity), dtype=np.float64)
+        self.size = 0
+        self.dropped = 0  # 앞에서 버린 행 수 (절대 인덱스 = dropped + data 의 인덱스)
+        self.max_rows = max_rows
+
+    @property
+    def total(self):
+        """지금까지 덧붙인 전체 행 수"""
+        return self.dropped + self.size
+
+    def trim(self, keep_from):
+        """max_rows 의 2 배를 넘으면 최근 max_rows 행만 남긴다 (절대 인덱스 keep_from 이후는 항상 남김)"""
+        if self.max_rows is None or self.size <= 2 * self.max_rows:
+            return
+        start = min(self.size - self.max_rows, keep_from - self.dropped)
+        if start <= 0:
+            return
+        self._data[:, :self.size - start] = self._data[:, start:self.size]
+        self.size -= start
+        self.dropped += start
+
+    def extend(self, block):
+        """block: (rows, n)"""
+        n = block.shape[1]
+        if self.size + n > self._data.shape[1]:
+            capacity = max(self._data.shape[1] * 2, self.size + n)
+            data = np.empty((self._data.shape[0], capacity), dtype=np.float64)
+            data[:, :self.size] = self._data[:, :self.size]
+            self._data = data
+        self._data[:, self.size:self.size + n] = block
+        self.size += n
+
+    @property
+    def data(self):
+        return self._data[:, :self.size]
+
+
+class MinMaxPyramid:
+    """채널 여러 개의 (시각, 값) 스트림을 레벨별 min/max 블록으로 보관"""
+
+    def __init__(self, channels=1, factor=4, max_rows=MAX_LEVEL_ROWS):
+        if factor < 2:
+            raise ValueError("factor 는 2 이상이어야 합니다")
+        if max_rows < factor:
+            raise ValueError("max_rows 는 factor 이상이어야 합니다")
+        self.channels = channels
+        self.factor = factor
+        self.max_rows = max_rows
+        # level 0: [시각, 값...], level k: [블록 시작 시각, 최소..., 최대...]
+        self._levels = [_GrowableArray(1 + channels, max_rows=max_rows)]
+
+    def __len__(self):
+        """지금까지 받은 샘플 수 (메모리에 남은 원본 샘플은 최근 max_rows 개 정도)"""
+        return self._levels[0].total
+
+    @property
+    def levels(self):
+        return len(self._levels)
+
+    def time_range(self):
+        """(첫 샘플 시각, 마지막 샘플 시각), 비어 있으면 None"""
+        if not len(self):
+            return None
+        # 가장 위 레벨은 앞쪽을 버리지 않았으므로 첫 블록 시각 = 첫 샘플 시각
+        return float(self._levels[-1].data[0, 0]), float(self._levels[0].data[0, -1])
+
+    def clear(self):
+        self._levels = [_GrowableArray(1 + self.channels, max_rows=self.max_rows)]
+
+    def append(self, time, *values):
+        self.extend([time], [values])
+
+    def extend(self, times, values):
+        """times: (n,), values: (n,) 또는 (n, channels)"""
+        times = np.asarray(times, dtype=np.float64)
+        if not len(times):
+            return
+        values = np.asarray(values, dtype=np.float64).reshape(len(times), self.channels)
+        self._levels[0].extend(np.vstack([times, values.T]))
+
+        # 아래 레벨에서 새로 완성된 블록만 위 레벨로 올린다
+        c = self.channels
+        level = 1
+        while True:
+            below = self._levels[level - 1]
+            if level == len(self._levels):
+                if below.total < self.factor:
+                    break
+                self._levels.append(_GrowableArray(1 + 2 * c, max_rows=self.max_rows))
+            current = self._levels[level]
+            done = current.total * self.factor
+            complete = below.total // self.factor * self.factor
+            if complete == done:
+                break
+            data = below.data[:, done - below.dropped:complete - below.dropped]
+            blocks = (complete - done) // self.factor
+            grouped = data.reshape(data.shape[0], blocks, self.factor)
+            if level == 1:
+                lows = grouped[1:].min(axis=2)
+                highs = grouped[1:].max(axis=2)
+            else:
+                lows = grouped[1:1 + c].min(axis=2)
+                highs = grouped[1 + c:].max(axis=2)
+            current.extend(np.vstack([grouped[0, :, 0], lows, highs]))
+            level += 1
+
+        # 위 레벨로 올라간 행만 버릴 수 있다
+        for level in range(len(self._levels) - 1):
+            self._levels[level].trim(self._levels[level + 1].total * self.factor)
+
+    def _unrepresented(self, level):
+        """level 의 완성된 블록에 아직 포함되지 않은 샘플들의 (시작 시각, 최소, 최대) 또는 None"""
+        c = self.channels
+        below = self._levels[level - 1]
+        rest = below.data[:, self._levels[level].total * self.factor - below.dropped:]
+        parts = []
+        if rest.shape[1]:
+            if level == 1:
+                parts.append((rest[0, 0], rest[1:].min(axis=1), rest[1:].max(axis=1)))
+            else:
+                parts.append((rest[0, 0], rest[1:1 + c].min(axis=1), rest[1 + c:].max(axis=1)))
+        if level > 1:
+            lower = self._unrepresented(level - 1)  # 아래 레벨에도 아직 안 올라간 샘플
+            if lower is not None:
+                parts.append(lower)
+        if not parts:
+            return None
+        return (parts[0][0],
+                np.min([p[1] for p in parts], axis=0),
+                np.max([p[2] for p in parts], axis=0))
+
+    def query(self, t0, t1, max_points):
+        """[t0, t1] 구간을 max_points 개 이하의 블록으로 -> (시각, 최소, 최대)
+
+        반환: t (m,), lo (channels, m), hi (channels, m). level 0 이면 lo == hi (원본 샘플).
+        구간 양쪽 바깥 블록 하나씩을 포함해 선이 화면 끝까지 이어지게 한다.
+        """
+        c = self.channels
+        if not len(self):
+            empty = np.empty((c, 0))
+            return np.empty(0), empty, empty
+        if t0 > t1:
+            t0, t1 = t1, t0
+
+        for level, array in enumerate(self._levels):
+            data = array.data
+            covers = array.dropped == 0 or data[0, 0] <= t0  # 앞쪽을 버린 레벨은 t0 를 덮을 때만
+            start = max(int(np.searchsorted(data[0], t0, side="right")) - 1, 0)
+            stop = min(int(np.searchsorted(data[0], t1, side="right")) + 1, array.size)
+            if (covers and stop - start <= max_points) or level == len(self._levels) - 1:
+                break
+
+        part = data[:, start:stop]
+        if level == 0:
+            times, lows, highs = part[0], part[1:], part[1:]
+        else:
+            times, lows, highs = part[0], part[1:1 + c], part[1 + c:]
+            # 마지막 블록까지 보이면 아직 다 차지 않은 블록도 붙인다
+            tail = self._unrepresented(level) if stop == array.size else None
+            if tail is not None and tail[0] <= t1:
+                times = np.append(times, tail[0])
+                lows = np.column_stack([lows, tail[1]])
+                highs = np.column_stack([highs, tail[2]])
+        return times, lows, highs
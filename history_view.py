@@ -0,0 +1,143 @@
+"""실시간 측정의 전체 히스토리 창 (MinMaxPyramid 기반, 스크롤 / 줌 가능)
+
+실시간 그래프(최근 20 포인트)와 별도로, 측정 시작부터 지금까지를 보여 주는 그래프.
+- 마우스 휠  : 커서 위치 기준 x 줌 (몇 시간 전체 <-> 샘플 하나하나)
+- 드래그     : x 이동 (이동하면 최신 따라가기가 꺼짐)
+- 더블 클릭  : 전체 보기 + 최신 따라가기 다시 켜기
+보이는 구간은 가로 픽셀 수만큼의 min/max 블록으로 그리므로 측정 길이와 관계없이 그리는 시간이 일정하다.
+블록마다 (t, 최소), (t, 최대) 를 번갈아 잇는 선이라 촘촘하면 min/max 띠로 보인다.
+"""
+import time
+from datetime import datetime
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from history_pyramid import MinMaxPyramid
+
+HISTORY_REDRAW_INTERVAL = 0.5  # s, 새 샘플이 들어와도 이 간격보다 자주 다시 그리지 않음
+ZOOM_STEP = 1.25
+
+
+class HistoryCanvas(FigureCanvas):
+    """채널마다 subplot 하나 (x 축 공유, 시간은 matplotlib 날짜 숫자)"""
+
+    def __init__(self, parent=None, channels=(("Current (A)", "b"),), title="History"):
+        self.fig = Figure(figsize=(20, 4))
+        super().__init__(self.fig)
+        self.setParent(parent)
+        self.pyramid = MinMaxPyramid(channels=len(channels))
+        self.follow = True  # 새 샘플이 오면 전체 구간이 보이도록 x 범위를 따라감
+        self._dirty = False
+        self._last_draw = 0.0
+        self._drag_start = None
+        self._updating = False
+
+        self.axes = []
+        self.lines = []
+        for i, (ylabel, color) in enumerate(channels):
+            ax = self.fig.add_subplot(len(channels), 1, i + 1, sharex=self.axes[0] if self.axes else None)
+            ax.set_ylabel(ylabel)
+            ax.grid(True)
+            line, = ax.plot([], [], color=color, linewidth=0.8)
+            self.axes.append(ax)
+            self.lines.append(line)
+            if i < len(channels) - 1:
+                ax.tick_params(labelbottom=False)
+        self.axes[0].set_title(title)
+        # 기본 x 범위(0~1일)에서는 날짜 눈금이 너무 많이 생기므로 현재 시각 기준 2초로 시작
+        now = mdates.date2num(datetime.now())
+        self.axes[0].set_xlim(now, now + 2 / 86400)
+        x_axis = self.axes[-1].xaxis
+        x_axis.set_major_locator(mdates.AutoDateLocator(minticks=3, maxticks=12))
+        x_axis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
+        self.fig.tight_layout()
+
+        self.axes[0].callbacks.connect('xlim_changed', self._on_xlim_changed)
+        self.mpl_connect('scroll_event', self._on_scroll)
+        self.mpl_connect('button_press_event', self._on_press)
+        self.mpl_connect('button_release_event', self._on_release)
+        self.mpl_connect('motion_notify_event', self._on_motion)
+
+    def extend(self, times, values):
+        """새 샘플 추가 (times: 날짜 숫자 (n,), values: (n, channels))"""
+        self.pyramid.extend(times, values)
+        self._dirty = True
+
+    def clear(self):
+        self.pyramid.clear()
+        self.follow = True
+        self._dirty = True
+
+    def refresh(self, force=False):
+        """새 샘플이 있으면 (최대 HISTORY_REDRAW_INTERVAL 마다) 다시 그린다. 측정 타이머에서 호출."""
+        now = time.monotonic()
+        if not force and (not self._dirty or now - self._last_draw < HISTORY_REDRAW_INTERVAL):
+            return
+        if not len(self.pyramid):
+            return
+        self._dirty = False
+        self._last_draw = now
+        if self.follow:
+            start, end = self.pyramid.time_range()
+            span = max(end - start, 1 / 86400)
+            self.axes[0].set_xlim(start, end + span * 0.02)  # xlim_changed -> _render
+        else:
+            self._render()
+        self.draw_idle()
+
+    def _on_xlim_changed(self, ax):
+        if not self._updating:
+            self._render()
+
+    def _render(self):
+        """보이는 x 구간을 픽셀 수만큼의 min/max 블록으로 조회해서 선 갱신"""
+        left, right = self.axes[0].get_xlim()
+        max_points = max(int(self.axes[0].bbox.width), 10)
+        times, lows, highs = self.pyramid.query(left, right, max_points)
+        x = np.repeat(times, 2)
+        self._updating = True
+        try:
+            for i, (ax, line) in enumerate(zip(self.axes, self.lines)):
+                y = np.column_stack([lows[i], highs[i]]).ravel()
+                line.set_data(x, y)
+                finite = y[np.isfinite(y)]
+                if len(finite):
+                    y_min, y_max = finite.min(), finite.max()
+                    pad = (y_max - y_min) * 0.1 or abs(y_max) * 0.1 or 1e-12
+                    ax.set_ylim(y_min - pad, y_max + pad)
+        finally:
+            self._updating = False
+
+    def _on_scroll(self, event):
+        if event.xdata is None:
+            return
+        scale = 1 / ZOOM_STEP if event.button == 'up' else ZOOM_STEP
+        left, right = self.axes[0].get_xlim()
+        self.follow = False
+        self.axes[0].set_xlim(event.xdata + (left - event.xdata) * scale,
+                              event.xdata + (right - event.xdata) * scale)
+        self.draw_idle()
+
+    def _on_press(self, event):
+        if event.button != 1 or event.xdata is None:
+            return
+        if event.dblclick:
+            self.follow = True
+            self.refresh(force=True)
+            return
+        self._drag_start = (event.x, self.axes[0].get_xlim())
+
+    def _on_release(self, event):
+        if event.button == 1:
+            self._drag_start = None
+
+    def _on_motion(self, event):
+        if self._drag_start is None:
+            return
+        start_x, (left, right) = self._drag_start
+        width = self.axes[0].bbox.width or 1
+        shift = (event.x - start_x) / width * (right - left)  # 픽셀 이동량 -> 시간
+        self.follow = False
+        self.axes[0].set_xlim(left - shift, right - shift)
+        self.draw_idle()
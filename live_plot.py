@@ -0,0 +1,84 @@
+"""블리팅 기반 실시간 그래프 갱신
+
+매 프레임 ax.clear() + plot() + canvas.draw() 대신
+- 선(Line2D)은 animated=True 로 한 번만 만들고 set_data() 로 데이터만 바꾼다.
+- 축/제목/눈금이 그려진 배경을 저장해 두고, 프레임마다 배경 복원 + 선만 다시 그려 blit.
+- 데이터가 축 범위를 벗어나거나 범위가 너무 넓어졌을 때만 전체 다시 그리기(canvas.draw).
+x 축은 오른쪽에 여유(x_headroom)를 두고 늘려서 시간축이 흘러가도 몇 초에 한 번만 다시 그린다.
+"""
+import numpy as np
+
+
+class LivePlot:
+    """canvas 위의 animated 선들을 블리팅으로 갱신"""
+
+    def __init__(self, canvas, lines, x_headroom=0.5, y_margin=0.1, min_x_span=1.0, y_shrink=0.2):
+        self.canvas = canvas
+        self.lines = list(lines)
+        self.x_headroom = x_headroom  # x 범위를 다시 잡을 때 오른쪽에 더할 여유 (표시 구간 대비)
+        self.y_margin = y_margin      # y 범위 위아래 여백 (데이터 범위 대비)
+        self.min_x_span = min_x_span  # 포인트가 하나뿐일 때의 x 범위
+        self.y_shrink = y_shrink      # 데이터 범위가 y 범위의 이 비율보다 작아지면 y 축을 줄인다
+        self.axes = []
+        for line in self.lines:
+            line.set_animated(True)
+            if line.axes not in self.axes:
+                self.axes.append(line.axes)
+        self.background = None
+        self.full_redraws = 0
+        self._cid = canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        """전체 다시 그리기(리사이즈 포함) 뒤 배경을 새로 저장하고 선을 그린다"""
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self):
+        figure = self.canvas.figure
+        for line in self.lines:
+            figure.draw_artist(line)
+
+    def update(self, x, ys):
+        """x (공통) 와 선마다의 y 배열로 갱신"""
+        for line, y in zip(self.lines, ys):
+            line.set_data(x, y)
+
+        if self._update_limits(x, ys) or self.background is None:
+            self.full_redraws += 1
+            self.canvas.draw()  # draw_event 에서 배경 저장 + 선 그리기
+        else:
+            self.canvas.restore_region(self.background)
+            self._draw_lines()
+        self.canvas.blit(self.canvas.figure.bbox)
+
+    def _update_limits(self, x, ys):
+        """데이터가 현재 축 범위에 맞지 않으면 범위를 다시 잡고 True"""
+        if len(x) == 0:
+            return False
+        changed = False
+
+        x_min, x_max = float(np.min(x)), float(np.max(x))
+        for ax in self.axes:
+            left, right = ax.get_xlim()
+            if x_min < left or x_max > right:
+                span = max(x_max - x_min, self.min_x_span)
+                ax.set_xlim(x_min, x_min + span * (1 + self.x_headroom))
+                changed = True
+
+        for ax in self.axes:
+            values = [np.asarray(y) for line, y in zip(self.lines, ys) if line.axes is ax]
+            values = np.concatenate(values) if values else np.empty(0)
+            values = values[np.isfinite(values)]
+            if not len(values):
+                continue
+            y_min, y_max = float(values.min()), float(values.max())
+            pad = (y_max - y_min) * self.y_margin or abs(y_max) * self.y_margin or 1e-12
+            bottom, top = ax.get_ylim()
+            too_loose = (y_max - y_min + 2 * pad) < self.y_shrink * (top - bottom)
+            if y_min < bottom or y_max > top or too_loose:
+                ax.set_ylim(y_min - pad, y_max + pad)
+                changed = True
+        return changed
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self._cid)
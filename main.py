@@ -1,11 +1,58 @@
 import sys
+import time
+import importlib
+
+_START = time.perf_counter()  # 시작 시간 측정 기준
+
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QPushButton, QLabel, QMessageBox, QComboBox, QLineEdit
-from realtimecurrent import MainWindow as RealtimeCurrentWindow
-from mosfetrealtime import MOSFETWindow as RealTimeMosfetWindow
-from sweepvoltage import VoltageSweepApp as SweepVoltageWindow
-from mosfetsweep import MOSFETCharacterizationApp as MosfetSweepWindow
-from compare import DiodeComparisonApp as CompareWindow
-import pyvisa
+
+# 모드 창은 처음 열 때 import 한다 (matplotlib / pyvisa 로딩을 제어판이 뜬 뒤로 미룸)
+MODE_WINDOWS = {
+    "realtime": ("realtimecurrent", "MainWindow"),
+    "realtime_mosfet": ("mosfetrealtime", "MOSFETWindow"),
+    "sweep": ("sweepvoltage", "VoltageSweepApp"),
+    "mosfet": ("mosfetsweep", "MOSFETCharacterizationApp"),
+    "compare": ("compare", "DiodeComparisonApp"),
+}
+_window_classes = {}
+startup_times = []  # [(단계, 시작 후 경과 s), ...]
+
+
+def mark_startup(stage):
+    """시작 단계 시각 기록 (startup_report 로 출력)"""
+    startup_times.append((stage, time.perf_counter() - _START))
+
+
+def startup_report():
+    """'Startup: imports 52 ms, window 12 ms, ...' (단계별 소요 시간 + 합계)"""
+    parts = []
+    previous = 0.0
+    for stage, elapsed in startup_times:
+        parts.append(f"{stage} {(elapsed - previous) * 1000:.0f} ms")
+        previous = elapsed
+    return f"Startup: {', '.join(parts)} (total {previous * 1000:.0f} ms)"
+
+
+def configure_matplotlib():
+    """모든 모드 창 공통 그래프 폰트 (한글 제목 / 음수 부호)"""
+    import matplotlib
+    matplotlib.rcParams['font.family'] = 'Malgun Gothic'
+    matplotlib.rcParams['axes.unicode_minus'] = False
+
+
+def load_window_class(mode):
+    """모드 창 클래스 (처음 부를 때 모듈 import, 걸린 시간 출력)"""
+    window_class = _window_classes.get(mode)
+    if window_class is None:
+        module_name, class_name = MODE_WINDOWS[mode]
+        start = time.perf_counter()
+        if not _window_classes:
+            configure_matplotlib()
+        window_class = getattr(importlib.import_module(module_name), class_name)
+        _window_classes[mode] = window_class
+        print(f"{module_name} 로딩: {(time.perf_counter() - start) * 1000:.0f} ms")
+    return window_class
 
 class MainApp(QMainWindow):
     def __init__(self):
@@ -28,7 +75,7 @@ class MainApp(QMainWindow):
         # VISA 주소 선택 콤보박스
         self.visa_label = QLabel("장비 VISA 주소 선택:")
         self.visa_combobox = QComboBox()
-        self.refresh_devices()  # 콤보박스에 장비 추가
+        self.visa_combobox.addItem("장비 검색 중...")  # 창이 뜬 뒤 refresh_devices 로 채움
 
         # 새로고침 버튼
         self.refresh_button = QPushButton("장비 새로고침")
@@ -68,6 +115,14 @@ class MainApp(QMainWindow):
         self.mosfet_window = None
         self.compare_window = None
 
+        # 장비 검색(pyvisa 로딩 포함)은 창을 먼저 그린 뒤에
+        QTimer.singleShot(0, self.initial_refresh)
+
+    def initial_refresh(self):
+        mark_startup("shown")
+        self.refresh_devices()
+        mark_startup("devices")
+        print(startup_report())
 
     def refresh_devices(self):
         """연결된 장비 목록을 새로고침"""
@@ -76,6 +131,8 @@ class MainApp(QMainWindow):
             self.visa_combobox.clear()  # 기존 항목 제거
             if devices:
                 self.visa_combobox.addItems(devices)  # 새 항목 추가
+                from device_discovery import revalidate_async
+                revalidate_async(devices)  # 아직 확인하지 않은 주소만 백그라운드에서 미리 식별
             else:
                 self.visa_combobox.addItem("연결된 장비 없음")
         except Exception as e:
@@ -83,11 +140,13 @@ class MainApp(QMainWindow):
             self.visa_combobox.addItem(f"오류: {str(e)}")
     
     def get_device_model(self, visa_address):
+        import pyvisa
+        from device_discovery import find_device_models, invalidate
         try:
-            rm = pyvisa.ResourceManager()
-            with rm.open_resource(visa_address) as device:
-                idn = device.query("*IDN?").strip()
-                return idn.split(',')[1].replace("MODEL", "").strip()
+            model = find_device_models([visa_address]).get(visa_address)  # 캐시 우선
+            if model is None:
+                invalidate(visa_address)  # 다음 시도 때 다시 조회
+            return model
         except pyvisa.errors.VisaIOError as e:
             print(f"장비 통신 오류 ({visa_address}): {e}")
             return None
@@ -109,7 +168,7 @@ class MainApp(QMainWindow):
             self.realtime_window.deleteLater()  # Qt 이벤트 루프에서 제거
             self.realtime_window = None
 
-        self.realtime_window = RealtimeCurrentWindow(visa_address, self.device_model)
+        self.realtime_window = load_window_class("realtime")(visa_address, self.device_model)
         self.realtime_window.show()
 
         if self.realtime_mosfet_window:
@@ -124,19 +183,16 @@ class MainApp(QMainWindow):
     def show_realtime_mosfet(self):
         visa_addresses = [self.visa_combobox.itemText(i) for i in range(self.visa_combobox.count())]
         
-        # 장비 모델 식별
+        # 장비 모델 식별 (전체 주소 병렬 조회 + 캐시)
+        from device_discovery import find_device_models
         gate_visa = None
         drain_visa = None
         
-        for addr in visa_addresses:
-            try:
-                model = self.get_device_model(addr)
-                if model == "2400":
-                    gate_visa = addr
-                elif model == "2410":
-                    drain_visa = addr
-            except Exception as e:
-                print(f"장비 식별 오류 ({addr}): {e}")
+        for addr, model in find_device_models(visa_addresses).items():
+            if model == "2400":
+                gate_visa = addr
+            elif model == "2410":
+                drain_visa = addr
         
         # 연결 확인
         if not gate_visa or not drain_visa:
@@ -154,7 +210,7 @@ class MainApp(QMainWindow):
         if self.realtime_mosfet_window:
             self.realtime_mosfet_window.close()
         
-        self.realtime_mosfet_window = RealTimeMosfetWindow(
+        self.realtime_mosfet_window = load_window_class("realtime_mosfet")(
             gate_visa=gate_visa,
             drain_visa=drain_visa
         )
@@ -178,7 +234,7 @@ class MainApp(QMainWindow):
             self.sweep_window.deleteLater()
             self.sweep_window = None
         
-        self.sweep_window = SweepVoltageWindow(visa_address, self.device_model)
+        self.sweep_window = load_window_class("sweep")(visa_address, self.device_model)
         self.sweep_window.show()
 
         if self.realtime_window:
@@ -197,10 +253,10 @@ class MainApp(QMainWindow):
             QMessageBox.critical(self, "오류", "MOSFET 측정에는 두 개의 장비가 필요합니다.")
             return
 
-        # 두 장비의 모델명을 확인
+        # 두 장비의 모델명을 확인 (전체 주소 병렬 조회 + 캐시)
+        from device_discovery import find_device_models
         model_map = {}
-        for addr in visa_addresses[:2]:  # 콤보박스에서 2개만 사용한다고 가정
-            model = self.get_device_model(addr)
+        for addr, model in find_device_models(visa_addresses).items():
             model_map[model] = addr
 
         try:
@@ -216,7 +272,7 @@ class MainApp(QMainWindow):
             self.mosfet_window.deleteLater()
             self.mosfet_window = None
 
-        self.mosfet_window = MosfetSweepWindow(gate_visa, drain_visa)
+        self.mosfet_window = load_window_class("mosfet")(gate_visa, drain_visa)
         self.mosfet_window.show()
 
         # 다른 창 닫기 (옵션)
@@ -231,7 +287,7 @@ class MainApp(QMainWindow):
 
     def show_compare_mode(self):
         if self.compare_window is None:
-            self.compare_window = CompareWindow()
+            self.compare_window = load_window_class("compare")()
         self.compare_window.show()
         if self.realtime_window is not None:
             self.realtime_window.close()
@@ -244,11 +300,16 @@ class MainApp(QMainWindow):
 
 def get_connected_devices():
     """PyVISA를 사용해 연결된 장비 검색"""
-    rm = pyvisa.ResourceManager()
-    return rm.list_resources()
+    from smu_session import list_resources
+    return list_resources()
 
 if __name__ == "__main__":
+    mark_startup("imports")
     app = QApplication(sys.argv)
     main_app = MainApp()
+    mark_startup("window")
     main_app.show()
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+    if "smu_session" in sys.modules:
+        sys.modules["smu_session"].close_all_sessions()  # 공용 세션 풀의 VISA 연결 정리
+    sys.exit(exit_code)
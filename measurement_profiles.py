@@ -0,0 +1,130 @@
+"""측정 속도 / 정확도 프로파일 (NPLC, 디지털 필터, 오토제로)
+
+*RST 기본값(NPLC 1, 필터 OFF, 오토제로 ON)은 거친 사전 스윕에는 느리고 sub-nA 누설 전류에는
+노이즈가 크다. 프로파일 하나가 세 설정을 장비별 SCPI 로 한꺼번에 정한다.
+- fast          : NPLC 0.1, 필터 OFF, 오토제로 OFF (짧은 사전 측정용 - 오래 돌리면 오프셋이 흐를 수 있음)
+- normal        : NPLC 1, 필터 OFF, 오토제로 ON (*RST 기본값과 같음)
+- high_accuracy : NPLC 10, repeat 필터 4회, 오토제로 ON
+
+프로파일 설정은 각 모드의 설정 목록(voltage_sweep_settings 등)에 들어가서 apply_settings 가
+달라진 값만 보내고, 스윕 중간에 구간별로 바꿀 때는 apply_profile 을 쓴다.
+
+    settings = profile_settings("2461", "fast")
+    apply_profile(instrument, "2400", "high_accuracy")
+    print(describe_profile("2461", "normal", points=51))   # "≈ 34.3 ms/pt, 51 pts ≈ 1.8 s"
+"""
+import math
+from smu_session import setting_key, normalize_argument
+
+PROFILES = {
+    "fast": {"nplc": 0.1, "filter_count": 1, "autozero": False},
+    "normal": {"nplc": 1.0, "filter_count": 1, "autozero": True},
+    "high_accuracy": {"nplc": 10.0, "filter_count": 4, "autozero": True},
+}
+DEFAULT_PROFILE = "normal"
+
+LINE_FREQUENCY = 60.0     # Hz, NPLC -> 적분 시간 환산 (국내 전원)
+READING_OVERHEAD = 0.001  # s, 리딩 하나당 적분 외 처리 시간 (대략)
+# 오토제로 ON 일 때 적분 시간 배수 (2461 은 리딩마다 기준/영점 측정을 따로 한다)
+AUTOZERO_FACTOR = {"2461": 2.0, "2400": 1.0, "2410": 1.0}
+MAX_ESTIMATE_POINTS = 1000000  # 이보다 많은 포인트 수는 잘못 입력한 값으로 보고 예상 시간에서 뺀다
+
+
+def get_profile(name):
+    """프로파일 이름 -> 설정 dict (모르는 이름이면 ValueError)"""
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown measurement profile: {name}") from None
+
+
+def profile_settings(device_model, name=DEFAULT_PROFILE):
+    """프로파일의 [(헤더, 값), ...] - 전류 측정 기준, 어떤 프로파일이든 헤더 목록은 같다"""
+    profile = get_profile(name)
+    count = profile["filter_count"]
+    filter_state = "ON" if count > 1 else "OFF"
+    autozero = "ON" if profile["autozero"] else "OFF"
+    if device_model == "2461":
+        return [
+            (":SENS:CURR:NPLC", profile["nplc"]),
+            (":SENS:CURR:AVER:TCON", "REP"),
+            (":SENS:CURR:AVER:COUN", count),
+            (":SENS:CURR:AVER", filter_state),
+            (":SENS:CURR:AZER", autozero),
+        ]
+    return [
+        (":SENS:CURR:NPLC", profile["nplc"]),
+        (":SENS:AVER:TCON", "REP"),
+        (":SENS:AVER:COUN", count),
+        (":SENS:AVER", filter_state),
+        (":SYST:AZER", autozero),
+    ]
+
+
+def apply_profile(instrument, device_model, name):
+    """스윕 도중 프로파일 변경 - 설정 캐시(instrument.state)와 다른 항목만 한 메시지로 전송"""
+    state = getattr(instrument, "state", None) or {}
+    changed = [f"{header} {value}" for header, value in profile_settings(device_model, name)
+               if state.get(setting_key(header)) != normalize_argument(value)]
+    if changed:
+        instrument.write(";".join(changed))
+    return len(changed)
+
+
+def point_time(device_model, nplc, filter_count=1, autozero=True, line_frequency=LINE_FREQUENCY):
+    """리딩 하나의 예상 시간 (s) - 적분 x 필터 횟수 x 오토제로 배수 + 처리 시간"""
+    seconds = nplc / line_frequency * max(filter_count, 1)
+    if autozero:
+        seconds *= AUTOZERO_FACTOR.get(device_model, 1.0)
+    return seconds + READING_OVERHEAD
+
+
+def estimate_point_time(device_model, name=DEFAULT_PROFILE, line_frequency=LINE_FREQUENCY):
+    """프로파일로 측정할 때 포인트당 예상 시간 (s, 소스 settling / 버스 지연 제외)"""
+    profile = get_profile(name)
+    return point_time(device_model, profile["nplc"], profile["filter_count"], profile["autozero"],
+                      line_frequency)
+
+
+def state_point_time(instrument, device_model):
+    """설정 캐시에 기록된 NPLC / 필터 / 오토제로로 계산한 포인트당 예상 시간 (모르면 *RST 기본값)"""
+    state = getattr(instrument, "state", None) or {}
+    if device_model == "2461":
+        keys = ("SENS:CURR:AVER:COUN", "SENS:CURR:AVER", "SENS:CURR:AZER")
+    else:
+        keys = ("SENS:AVER:COUN", "SENS:AVER", "SYST:AZER")
+    count_key, filter_key, autozero_key = keys
+    on = normalize_argument("ON")
+    nplc = float(state.get("SENS:CURR:NPLC", 1.0))
+    count = int(float(state.get(count_key, 1))) if state.get(filter_key) == on else 1
+    return point_time(device_model, nplc, count, state.get(autozero_key, on) == on)
+
+
+def sweep_point_count(start, end, step):
+    """start ~ end (끝 포함) 를 step 간격으로 나눈 포인트 수 - 배열을 만들지 않고 계산
+
+    값이 잘못됐거나 (step <= 0, inf/nan) MAX_ESTIMATE_POINTS 를 넘으면 None.
+    """
+    if not all(math.isfinite(value) for value in (start, end, step)) or step <= 0:
+        return None
+    if end < start:
+        return 0
+    count = int((end - start) / step + 1e-9) + 1
+    return count if count <= MAX_ESTIMATE_POINTS else None
+
+
+def format_seconds(seconds):
+    if seconds < 1:
+        return f"{seconds * 1000:.1f} ms"
+    if seconds < 120:
+        return f"{seconds:.1f} s"
+    return f"{seconds / 60:.1f} min"
+
+
+def describe_profile(device_model, name=DEFAULT_PROFILE, points=None):
+    """측정 전에 보여 줄 예상 시간 문자열 ('≈ 34.3 ms/pt, 51 pts ≈ 1.8 s')"""
+    seconds = estimate_point_time(device_model, name)
+    text = f"≈ {format_seconds(seconds)}/pt"
+    if points:
+        text += f", {points} pts ≈ {format_seconds(seconds * points)}"
+    return text
@@ -3,19 +3,35 @@ import pyvisa
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.animation import FuncAnimation
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout,
-    QWidget, QLabel, QLineEdit, QPushButton, QMessageBox
+    QWidget, QLabel, QLineEdit, QPushButton, QMessageBox, QCheckBox, QComboBox
 )
 from datetime import datetime, timedelta
-import csv
+from smu_session import get_session
+from binary_transfer import supports_binary
+from acquisition import (
+    configure_mosfet_gate, configure_mosfet_drain, read_mosfet_sample_timed, monotonic_to_datetime
+)
+from ring_buffer import RingBuffer
+from live_plot import LivePlot
+from recorder import CSVRecorder, BinaryRecorder
+from csv_records import REALTIME_MOSFET_HEADER, realtime_timestamp
+from history_view import HistoryCanvas
+from measurement_profiles import PROFILES, DEFAULT_PROFILE, apply_profile, describe_profile
+from async_smu import run_concurrently
+
+HISTORY_CAPACITY = 100000  # 창마다 보관하는 최근 샘플 수 (고정 메모리, 약 8 MB)
+PLOT_POINTS = 20           # 그래프에 표시할 최근 포인트 수
+REFRESH_INTERVAL = 200     # ms, 측정 + 그래프 갱신 간격
 
 class MOSFETWindow(QMainWindow):
     def __init__(self, gate_visa, drain_visa):
         super().__init__()
 
         # Initialize devices
+        self.binary_transfer = supports_binary(gate_visa) and supports_binary(drain_visa)
         self.gate_keithley = None
         self.drain_keithley = None
         self.init_gate_device(gate_visa)
@@ -63,19 +79,33 @@ class MOSFETWindow(QMainWindow):
         current_limit_layout.addWidget(self.current_limit_input)
         current_limit_layout.addWidget(self.set_current_button)
 
+        # 측정 프로파일 (게이트/드레인 공통, 두 장비는 동시에 적분하므로 샘플당 시간은 한 장비 기준)
+        profile_layout = QVBoxLayout()
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItems(PROFILES)
+        self.profile_combo.setCurrentText(DEFAULT_PROFILE)
+        self.profile_combo.currentTextChanged.connect(self.set_profile)
+        self.estimate_label = QLabel(describe_profile("2400", DEFAULT_PROFILE))
+        profile_layout.addWidget(QLabel("Profile:"))
+        profile_layout.addWidget(self.profile_combo)
+        profile_layout.addWidget(self.estimate_label)
+
         # Recording controls
         self.start_record_button = QPushButton("Start Record")
         self.start_record_button.clicked.connect(self.start_record)
         self.stop_record_button = QPushButton("Stop Record")
         self.stop_record_button.clicked.connect(self.stop_record)
         self.stop_record_button.setEnabled(False)
+        self.binary_record_checkbox = QCheckBox("Binary Record (.smurec)")  # 장시간 측정용 압축 바이너리 기록
 
         # Add to control panel
         control_panel.addLayout(gate_layout)
         control_panel.addLayout(drain_layout)
         control_panel.addLayout(current_limit_layout)
+        control_panel.addLayout(profile_layout)
         control_panel.addWidget(self.start_record_button)
         control_panel.addWidget(self.stop_record_button)
+        control_panel.addWidget(self.binary_record_checkbox)
 
         layout.addLayout(control_panel)
 
@@ -98,47 +128,51 @@ class MOSFETWindow(QMainWindow):
 
         # Plot
         self.canvas = MplCanvas(self)
-        layout.addWidget(self.canvas)
+        layout.addWidget(self.canvas, 3)
 
-        # Data
-        self.time_stamps = []
-        self.gate_currents = []
-        self.drain_currents = []
-        self.gate_voltages = []
-        self.drain_voltages = []
+        # 측정 시작부터의 전체 히스토리 (휠: 줌, 드래그: 이동, 더블 클릭: 최신 따라가기)
+        self.history_canvas = HistoryCanvas(
+            self, [("Gate Current (A)", "r"), ("Drain Current (A)", "b")], "Current History")
+        layout.addWidget(self.history_canvas, 2)
+
+        # Data (time = matplotlib 날짜 숫자)
+        self.history = RingBuffer(
+            HISTORY_CAPACITY,
+            ("time", "gate_current", "drain_current", "gate_voltage", "drain_voltage"),
+        )
 
         # Recording
         self.is_recording = False
-        self.recording_file = None
-        self.csv_writer = None
+        self.recorder = None  # 백그라운드 CSV 기록 스레드
 
         # Animation
         self.start_animation()
 
     def init_gate_device(self, visa_address):
         try:
-            rm = pyvisa.ResourceManager()
-            self.gate_keithley = rm.open_resource(visa_address)
-            self.gate_keithley.write("*RST")
-            self.gate_keithley.write(":SOUR:FUNC VOLT")  # Voltage source
-            self.gate_keithley.write(":SENS:FUNC 'CURR'")  # Current 측정 활성화 
-            self.gate_keithley.write(":SENS:CURR:RANGE:AUTO ON")  # Auto range
-            self.gate_keithley.write(":SOUR:VOLT:RANG 200")
-            self.gate_keithley.write(":OUTP ON")
+            self.gate_keithley = get_session(visa_address)
+            configure_mosfet_gate(self.gate_keithley, self.binary_transfer)
         except Exception as e:
             QMessageBox.critical(self, "Gate Device Error", f"게이트 장비 연결 실패: {e}")
 
     def init_drain_device(self, visa_address):
         try:
-            rm = pyvisa.ResourceManager()
-            self.drain_keithley = rm.open_resource(visa_address)
-            self.drain_keithley.write("*RST")
-            self.drain_keithley.write(":SOUR:FUNC VOLT")
-            self.drain_keithley.write(":SOUR:VOLT:RANG 1100")  # 2410 spec
-            self.drain_keithley.write(":OUTP ON")
+            self.drain_keithley = get_session(visa_address)
+            configure_mosfet_drain(self.drain_keithley, self.binary_transfer)
         except Exception as e:
             QMessageBox.critical(self, "Drain Device Error", f"Drain device connection failed: {e}")
 
+    def set_profile(self, name):
+        """측정 프로파일 변경 (게이트 2400 / 드레인 2410 에 달라진 설정만 전송)"""
+        self.estimate_label.setText(describe_profile("2400", name))
+        calls = [(instrument, apply_profile, device_model, name)
+                 for instrument, device_model in ((self.gate_keithley, "2400"), (self.drain_keithley, "2410"))
+                 if instrument is not None]
+        try:
+            run_concurrently(*calls)
+        except Exception as e:
+            print(f"측정 프로파일 설정 오류: {e}")
+
     def set_gate_voltage(self):
         try:
             voltage = float(self.gate_voltage_input.text())
@@ -174,16 +208,14 @@ class MOSFETWindow(QMainWindow):
 
     def start_record(self):
         try:
-            self.recording_file = open(
-                f"C:/Users/LG/Desktop/2461_SourceMeter/mosfet_realtime_record/current_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mode='w', newline=''
+            recorder_class, extension = ((BinaryRecorder, ".smurec") if self.binary_record_checkbox.isChecked()
+                                         else (CSVRecorder, ".csv"))
+            self.recorder = recorder_class(
+                f"C:/Users/LG/Desktop/2461_SourceMeter/mosfet_realtime_record/current_data_{realtime_timestamp()}{extension}",
+                REALTIME_MOSFET_HEADER,
             )
-            self.csv_writer = csv.writer(self.recording_file)
-            self.csv_writer.writerow([
-                "Timestamp", "Gate Voltage (V)", "Drain Voltage (V)",
-                "Gate Current (A)", "Drain Current (A)", "Current Limit (A)"
-            ])
             self.is_recording = True
+            self.binary_record_checkbox.setEnabled(False)
             self.start_record_button.setEnabled(False)
             self.stop_record_button.setEnabled(True)
         except Exception as e:
@@ -192,35 +224,27 @@ class MOSFETWindow(QMainWindow):
     def stop_record(self):
         try:
             if self.is_recording:
-                self.recording_file.close()
                 self.is_recording = False
+                self.recorder.close()  # 남은 샘플 기록 후 파일 닫기
+                self.recorder = None
+                self.binary_record_checkbox.setEnabled(True)
                 self.start_record_button.setEnabled(True)
                 self.stop_record_button.setEnabled(False)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error stopping recording: {e}")
 
     # update_graph 함수 수정
-    def update_graph(self, frame):
+    def update_graph(self, frame=None):
         try:
-            # 게이트 측정
-            gate_response = self.gate_keithley.query(":READ?")
-            gate_data = gate_response.strip().split(',')
-            gate_current = float(gate_data[1])  # 2400: [current, voltage, ...]
-            gate_voltage = float(gate_data[0])
-
-            # 드레인 측정 (drain_data[1]이 전류)
-            drain_response = self.drain_keithley.query(":READ?")
-            drain_data = drain_response.strip().split(',')
-            drain_current = float(drain_data[1])  # [voltage, current, ...]라면
-            drain_voltage = float(drain_data[0])
-
-            # 데이터 저장
-            now = datetime.now()
-            self.time_stamps.append(now)
-            self.gate_currents.append(gate_current)
-            self.drain_currents.append(drain_current)
-            self.gate_voltages.append(gate_voltage)
-            self.drain_voltages.append(drain_voltage)
+            # 게이트 / 드레인 동시 측정 (두 SMU 의 적분 시간이 겹침)
+            (gate_time, gate_voltage, gate_current), (drain_time, drain_voltage, drain_current) = \
+                read_mosfet_sample_timed(self.gate_keithley, self.drain_keithley, self.binary_transfer)
+
+            # 데이터 저장 (두 측정 시각의 중간, 공용 단조 시계 기준)
+            now = monotonic_to_datetime((gate_time + drain_time) / 2)
+            self.history.append(mdates.date2num(now), gate_current, drain_current,
+                                gate_voltage, drain_voltage)
+            self.history_canvas.extend([mdates.date2num(now)], [(gate_current, drain_current)])
 
             # UI 업데이트
             self.gate_voltage_display.setText(f"Gate Voltage: {gate_voltage:.2f} V")
@@ -230,41 +254,18 @@ class MOSFETWindow(QMainWindow):
                 f"Drain Current: {drain_current:.3e} A"
             )
 
-            # 최근 20개 포인트만 사용
-            ts = self.time_stamps[-20:]
-            gate_curr = self.gate_currents[-20:]
-            drain_curr = self.drain_currents[-20:]
-
-            # 두 개 subplot에 각각 그리기
-            self.canvas.ax_gate.clear()
-            self.canvas.ax_gate.plot(ts, gate_curr, 'r-', marker='o', label='Gate Current')
-            self.canvas.ax_gate.set_ylabel("Current (A)")
-            self.canvas.ax_gate.set_title("Gate Current")
-            self.canvas.ax_gate.grid(True)
-            self.canvas.ax_gate.legend(loc='upper right')
-
-            self.canvas.ax_drain.clear()
-            self.canvas.ax_drain.plot(ts, drain_curr, 'b-', marker='s', label='Drain Current')
-            self.canvas.ax_drain.set_xlabel("Time")
-            self.canvas.ax_drain.set_ylabel("Current (A)")
-            self.canvas.ax_drain.set_title("Drain Current")
-            self.canvas.ax_drain.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
-            self.canvas.ax_drain.tick_params(axis='x', rotation=45)
-            self.canvas.ax_drain.grid(True)
-            self.canvas.ax_drain.legend(loc='upper right')
-
-            self.canvas.draw()
+            # 최근 20개 포인트만 사용 (복사 없는 view)
+            ts, gate_curr, drain_curr, _, _ = self.history.latest(PLOT_POINTS)
+
+            # 두 subplot 의 선 데이터만 바꾸고 블리팅
+            self.live_plot.update(ts, [gate_curr, drain_curr])
+            self.history_canvas.refresh()  # 0.5초에 한 번만 다시 그림
 
             # 데이터 기록
             if self.is_recording:
-                self.csv_writer.writerow([
-                    now.strftime('%Y-%m-%d %H:%M:%S.%f'),
-                    gate_voltage,
-                    drain_voltage,
-                    gate_current,
-                    drain_current,
-                    self.current_limit
-                ])
+                # 큐에 넣기만 하고 파일 쓰기는 기록 스레드에서
+                self.recorder.record(now, gate_voltage, drain_voltage,
+                                     gate_current, drain_current, self.current_limit)
 
         except pyvisa.errors.VisaIOError as e:
             QMessageBox.critical(self, "측정 오류", f"장비 통신 오류: {str(e)}")
@@ -273,17 +274,16 @@ class MOSFETWindow(QMainWindow):
             print(f"Graph update error: {str(e)}")
 
     def start_animation(self):
-        self.ani = FuncAnimation(
-            self.canvas.fig,
-            self.update_graph,
-            interval=200,
-            cache_frame_data=False
-        )
+        self.live_plot = LivePlot(self.canvas, [self.canvas.gate_line, self.canvas.drain_line],
+                                  min_x_span=1 / 86400)  # 1초 (날짜 숫자 단위 = 일)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.update_graph)
+        self.timer.start(REFRESH_INTERVAL)
 
     def closeEvent(self, event):
         try:
-            if hasattr(self, 'ani') and self.ani.event_source:
-                self.ani.event_source.stop()
+            if hasattr(self, 'timer'):
+                self.timer.stop()
             if self.gate_keithley is not None:
                 try:
                     self.gate_keithley.write(":OUTP OFF")
@@ -300,8 +300,9 @@ class MOSFETWindow(QMainWindow):
                 finally:
                     self.drain_keithley.close()
                     self.drain_keithley = None
-            if self.recording_file:
-                self.recording_file.close()
+            if self.recorder is not None:
+                self.recorder.close()
+                self.recorder = None
         except Exception as e:
             print(f"Resource cleanup error: {e}")
         finally:
@@ -319,6 +320,18 @@ class MplCanvas(FigureCanvas):
         self.ax_drain.set_xlabel("Time")
         self.ax_drain.set_ylabel("Current (A)")
         self.ax_drain.grid(True)
+        now = mdates.date2num(datetime.now())
+        self.ax_drain.set_xlim(now, now + 2 / 86400)
+        self.ax_drain.xaxis_date()
+        self.ax_drain.xaxis.set_major_locator(mdates.AutoDateLocator())
+        self.ax_drain.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
+        self.ax_drain.tick_params(axis='x', rotation=45)
+
+        # 실시간 선은 한 번만 만들고 LivePlot 이 데이터만 갱신
+        self.gate_line, = self.ax_gate.plot([], [], 'r-', marker='o', label='Gate Current')
+        self.drain_line, = self.ax_drain.plot([], [], 'b-', marker='s', label='Drain Current')
+        self.ax_gate.legend(loc='upper right')
+        self.ax_drain.legend(loc='upper right')
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -1,21 +1,21 @@
 import sys
-import pyvisa
 import numpy as np
 import matplotlib.pyplot as plt
-plt.rc('font', family='Malgun Gothic') 
-plt.rcParams['axes.unicode_minus'] =False
-
 from matplotlib.figure import Figure
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QLineEdit,
     QPushButton, QHBoxLayout, QMessageBox, QTabWidget, QGroupBox, QGridLayout,
-    QRadioButton, QComboBox
+    QRadioButton, QComboBox, QCheckBox
 )
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from datetime import datetime
+from smu_session import get_session
+from binary_transfer import supports_binary
+from smu_sweep import configure_mosfet_smus, run_output_sweep, run_transfer_sweep, check_mosfet_sweep_modes
+from measurement_profiles import PROFILES, DEFAULT_PROFILE, describe_profile, sweep_point_count
+from compliance import CompliancePolicy, COMPLIANCE_ACTIONS
+from csv_records import save_output_csv, save_transfer_csv, sweep_timestamp
 
-# VISA 리소스 매니저
-rm = pyvisa.ResourceManager('@py')
+# 장비 세션 (공용 세션 풀에서 가져옴)
 gate_instrument = None
 drain_instrument = None
 
@@ -27,6 +27,7 @@ class MOSFETCharacterizationApp(QMainWindow):
         
         self.gate_visa = gate_visa    # 게이트용 SMU (2400)
         self.drain_visa = drain_visa  # 드레인용 SMU (2410)
+        self.binary_transfer = supports_binary(gate_visa) and supports_binary(drain_visa)
         
         # 중앙 위젯과 레이아웃
         central_widget = QWidget()
@@ -48,6 +49,31 @@ class MOSFETCharacterizationApp(QMainWindow):
         self.setup_transfer_tab()
         
         main_layout.addWidget(self.tabs)
+
+        # 측정 프로파일 (NPLC / 필터 / 오토제로, 게이트/드레인 공통) + 예상 측정 시간
+        profile_layout = QHBoxLayout()
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItems(PROFILES)
+        self.profile_combo.setCurrentText(DEFAULT_PROFILE)
+        self.estimate_label = QLabel()
+        profile_layout.addWidget(QLabel("측정 프로파일:"))
+        profile_layout.addWidget(self.profile_combo)
+        profile_layout.addWidget(self.estimate_label)
+
+        # 드레인 전류 제한에 연속 N 포인트 걸리면: continue / skip (다음 곡선으로) / coarse / abort (전체 중단)
+        self.compliance_combo = QComboBox()
+        self.compliance_combo.addItems(COMPLIANCE_ACTIONS)
+        self.compliance_hits_input = QLineEdit("3")
+        self.compliance_hits_input.setMaximumWidth(40)
+        profile_layout.addWidget(QLabel("Compliance 시:"))
+        profile_layout.addWidget(self.compliance_combo)
+        profile_layout.addWidget(QLabel("연속 포인트:"))
+        profile_layout.addWidget(self.compliance_hits_input)
+        profile_layout.addStretch()
+        main_layout.addLayout(profile_layout)
+        self.profile_combo.currentTextChanged.connect(self.update_estimate)
+        self.tabs.currentChanged.connect(self.update_estimate)
+        self.update_estimate()
         
         # 데이터 저장용 플롯
         self.output_data = {}  # Id-Vds 데이터 저장 (각 Vgs 별)
@@ -113,6 +139,11 @@ class MOSFETCharacterizationApp(QMainWindow):
         self.output_save_button.clicked.connect(lambda: self.save_data("output"))
         button_layout.addWidget(self.output_save_button)
         
+        # Trigger Link 동기 스윕 (게이트/드레인 Trigger Link 케이블 연결 시)
+        self.output_tlink_checkbox = QCheckBox("Trigger Link Sweep")
+        self.output_tlink_checkbox.setChecked(False)
+        button_layout.addWidget(self.output_tlink_checkbox)
+        
         layout.addLayout(button_layout)
         
         # 그래프 캔버스
@@ -190,12 +221,39 @@ class MOSFETCharacterizationApp(QMainWindow):
         self.transfer_save_button.clicked.connect(lambda: self.save_data("transfer"))
         button_layout.addWidget(self.transfer_save_button)
         
+        # Trigger Link 동기 스윕 (게이트/드레인 Trigger Link 케이블 연결 시)
+        self.transfer_tlink_checkbox = QCheckBox("Trigger Link Sweep")
+        self.transfer_tlink_checkbox.setChecked(False)
+        button_layout.addWidget(self.transfer_tlink_checkbox)
+        
         layout.addLayout(button_layout)
         
         # 그래프 캔버스
         self.transfer_canvas = FigureCanvas(Figure(figsize=(7, 6)))
         layout.addWidget(self.transfer_canvas)
 
+    def update_estimate(self):
+        """현재 탭의 포인트 수 (Vgs x Vds) 와 프로파일로 예상 측정 시간 표시 (드레인 2410 기준)"""
+        if self.tabs.currentIndex() == 0:
+            fields = (self.vgs_start, self.vgs_end, self.vgs_step, self.vds_start, self.vds_end, self.vds_step)
+        else:
+            fields = (self.vds_transfer_start, self.vds_transfer_end, self.vds_transfer_step,
+                      self.vgs_transfer_start, self.vgs_transfer_end, self.vgs_transfer_step)
+        try:
+            values = [float(field.text()) for field in fields]
+            counts = (sweep_point_count(*values[:3]), sweep_point_count(*values[3:]))
+            points = counts[0] * counts[1] if None not in counts else None
+        except ValueError:
+            points = None
+        self.estimate_label.setText(describe_profile("2410", self.profile_combo.currentText(), points))
+
+    def compliance_policy(self):
+        """선택한 compliance 처리 정책 (continue 이면 None - 상태 비트를 읽지 않음)"""
+        action = self.compliance_combo.currentText()
+        if action == "continue":
+            return None
+        return CompliancePolicy(action, hits=int(self.compliance_hits_input.text()))
+
     def perform_output_sweep(self):
         """Id-Vds 출력 특성 측정 수행"""
         try:
@@ -214,24 +272,17 @@ class MOSFETCharacterizationApp(QMainWindow):
             vgs_values = np.arange(vgs_start, vgs_end + vgs_step/2, vgs_step)
             vds_values = np.arange(vds_start, vds_end + vds_step/2, vds_step)
             
+            # Trigger Link 와 같이 쓸 수 없는 compliance 정책이면 장비를 건드리기 전에 거부
+            check_mosfet_sweep_modes(self.output_tlink_checkbox.isChecked(), self.compliance_policy())
+            
             # 장비 초기화
             global gate_instrument, drain_instrument
-            gate_instrument = rm.open_resource(self.gate_visa)
-            drain_instrument = rm.open_resource(self.drain_visa)
-            
-            # 게이트 SMU (2400) 설정
-            gate_instrument.write("*RST")
-            gate_instrument.write(":SOUR:FUNC VOLT")
-            gate_instrument.write(":SENS:FUNC 'CURR'")
-            gate_instrument.write(":FORMat:ELEMents CURR")
-            gate_instrument.write(f":SENS:CURR:PROT {gate_ilimit}")
-            
-            # 드레인 SMU (2410) 설정
-            drain_instrument.write("*RST")
-            drain_instrument.write(":SOUR:FUNC VOLT")
-            drain_instrument.write(":SENS:FUNC 'CURR'")
-            drain_instrument.write(":FORMat:ELEMents CURR")
-            drain_instrument.write(f":SENS:CURR:PROT {drain_ilimit}")
+            gate_instrument = get_session(self.gate_visa)
+            drain_instrument = get_session(self.drain_visa)
+            
+            # 게이트(2400) / 드레인(2410) SMU 설정
+            configure_mosfet_smus(gate_instrument, drain_instrument, gate_ilimit, drain_ilimit,
+                                  self.binary_transfer, profile=self.profile_combo.currentText())
             
             # 데이터 초기화
             self.output_data = {}
@@ -244,30 +295,14 @@ class MOSFETCharacterizationApp(QMainWindow):
             colors = plt.cm.jet(np.linspace(0, 1, len(vgs_values)))
             
             # 각 게이트 전압(Vgs)에 대해 드레인 전압(Vds) 스윕
-            for idx, vgs in enumerate(vgs_values):
-                # 게이트 전압 설정
-                gate_instrument.write(f":SOUR:VOLT {vgs}")
-                gate_instrument.write(":OUTP ON")
-                
-                # 드레인 전류 측정을 위한 배열
-                ids_values = []
-                
-                # 드레인 전압 스윕
-                for vds in vds_values:
-                    # 드레인 전압 설정
-                    drain_instrument.write(f":SOUR:VOLT {vds}")
-                    drain_instrument.write(":OUTP ON")
-                    
-                    # 드레인 전류 측정
-                    drain_instrument.query("*OPC?")  # 작업 완료 대기
-                    current = float(drain_instrument.query(":MEAS:CURR?"))
-                    ids_values.append(current)
-                    
-                # 데이터 저장
-                self.output_data[vgs] = (vds_values.copy(), np.array(ids_values))
-                
-                # 그래프 플로팅
-                ax.plot(vds_values, ids_values, marker='o', markersize=4, 
+            self.output_data = run_output_sweep(gate_instrument, drain_instrument,
+                                                vgs_values, vds_values, self.binary_transfer,
+                                                trigger_link=self.output_tlink_checkbox.isChecked(),
+                                                compliance=self.compliance_policy())
+            
+            # 그래프 플로팅
+            for idx, (vgs, (vds_arr, ids_arr)) in enumerate(self.output_data.items()):
+                ax.plot(vds_arr, ids_arr, marker='o', markersize=4, 
                         color=colors[idx], label=f"Vgs = {vgs:.1f}V")
             
             # 그래프 설정
@@ -284,7 +319,7 @@ class MOSFETCharacterizationApp(QMainWindow):
             gate_instrument.write(":OUTP OFF")
             drain_instrument.write(":OUTP OFF")
             
-            # 장비 연결 종료
+            # 세션을 풀에 반환 (연결 유지)
             gate_instrument.close()
             drain_instrument.close()
             
@@ -319,24 +354,17 @@ class MOSFETCharacterizationApp(QMainWindow):
             vds_values = np.arange(vds_start, vds_end + vds_step/2, vds_step)
             vgs_values = np.arange(vgs_start, vgs_end + vgs_step/2, vgs_step)
             
+            # Trigger Link 와 같이 쓸 수 없는 compliance 정책이면 장비를 건드리기 전에 거부
+            check_mosfet_sweep_modes(self.transfer_tlink_checkbox.isChecked(), self.compliance_policy())
+            
             # 장비 초기화
             global gate_instrument, drain_instrument
-            gate_instrument = rm.open_resource(self.gate_visa)
-            drain_instrument = rm.open_resource(self.drain_visa)
-            
-            # 게이트 SMU (2400) 설정
-            gate_instrument.write("*RST")
-            gate_instrument.write(":SOUR:FUNC VOLT")
-            gate_instrument.write(":SENS:FUNC 'CURR'")
-            gate_instrument.write(":FORMat:ELEMents CURR")
-            gate_instrument.write(f":SENS:CURR:PROT {gate_ilimit}")
-            
-            # 드레인 SMU (2410) 설정
-            drain_instrument.write("*RST")
-            drain_instrument.write(":SOUR:FUNC VOLT")
-            drain_instrument.write(":SENS:FUNC 'CURR'")
-            drain_instrument.write(":FORMat:ELEMents CURR")
-            drain_instrument.write(f":SENS:CURR:PROT {drain_ilimit}")
+            gate_instrument = get_session(self.gate_visa)
+            drain_instrument = get_session(self.drain_visa)
+            
+            # 게이트(2400) / 드레인(2410) SMU 설정
+            configure_mosfet_smus(gate_instrument, drain_instrument, gate_ilimit, drain_ilimit,
+                                  self.binary_transfer, profile=self.profile_combo.currentText())
             
             # 데이터 초기화
             self.transfer_data = {}
@@ -349,39 +377,22 @@ class MOSFETCharacterizationApp(QMainWindow):
             colors = plt.cm.jet(np.linspace(0, 1, len(vds_values)))
             
             # 각 드레인 전압(Vds)에 대해 게이트 전압(Vgs) 스윕
-            for idx, vds in enumerate(vds_values):
-                # 드레인 전압 설정
-                drain_instrument.write(f":SOUR:VOLT {vds}")
-                drain_instrument.write(":OUTP ON")
-                
-                # 드레인 전류 측정을 위한 배열
-                ids_values = []
-                
-                # 게이트 전압 스윕
-                for vgs in vgs_values:
-                    # 게이트 전압 설정
-                    gate_instrument.write(f":SOUR:VOLT {vgs}")
-                    gate_instrument.write(":OUTP ON")
-                    
-                    # 드레인 전류 측정
-                    drain_instrument.query("*OPC?")  # 작업 완료 대기
-                    response = drain_instrument.query(":READ?")
-                    current = float(response.strip().split(',')[0])
-                    ids_values.append(current)
-                
-                # 데이터 저장
-                self.transfer_data[vds] = (vgs_values.copy(), np.array(ids_values))
-                
+            self.transfer_data = run_transfer_sweep(gate_instrument, drain_instrument,
+                                                    vds_values, vgs_values, self.binary_transfer,
+                                                    trigger_link=self.transfer_tlink_checkbox.isChecked(),
+                                                    compliance=self.compliance_policy())
+            
+            for idx, (vds, (vgs_arr, ids_arr)) in enumerate(self.transfer_data.items()):
                 # 그래프 플로팅 (선형 또는 로그)
                 if self.linear_plot.isChecked():
-                    ax.plot(vgs_values, ids_values, marker='o', markersize=4, 
+                    ax.plot(vgs_arr, ids_arr, marker='o', markersize=4, 
                             color=colors[idx], label=f"Vds = {vds:.1f}V")
                 else:
                     # 로그 스케일 (음수 값 처리)
-                    log_ids = np.array(ids_values)
+                    log_ids = np.array(ids_arr)
                     # 음수 값 또는 0을 작은 양수로 대체
                     log_ids[log_ids <= 0] = 1e-12
-                    ax.semilogy(vgs_values, log_ids, marker='o', markersize=4,
+                    ax.semilogy(vgs_arr, log_ids, marker='o', markersize=4,
                                color=colors[idx], label=f"Vds = {vds:.1f}V")
             
             # 그래프 설정
@@ -401,7 +412,7 @@ class MOSFETCharacterizationApp(QMainWindow):
             gate_instrument.write(":OUTP OFF")
             drain_instrument.write(":OUTP OFF")
             
-            # 장비 연결 종료
+            # 세션을 풀에 반환 (연결 유지)
             gate_instrument.close()
             drain_instrument.close()
             
@@ -421,7 +432,7 @@ class MOSFETCharacterizationApp(QMainWindow):
     def save_data(self, data_type):
         """측정 데이터 저장"""
         try:
-            now = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            now = sweep_timestamp()
             
             if data_type == "output":
                 # Id-Vds 데이터 저장
@@ -434,14 +445,7 @@ class MOSFETCharacterizationApp(QMainWindow):
                 
                 # CSV 데이터 저장
                 csv_filename = f"C:/Users/LG/Desktop/2461_SourceMeter/mosfet_sweep_record/MOSFET_IdVds_{now}.csv"
-                with open(csv_filename, "w") as f:
-                    # 헤더 작성
-                    f.write("Vgs(V),Vds(V),Id(A)\n")
-                    
-                    # 데이터 작성
-                    for vgs, (vds_arr, ids_arr) in self.output_data.items():
-                        for vds, ids in zip(vds_arr, ids_arr):
-                            f.write(f"{vgs},{vds},{ids}\n")
+                save_output_csv(csv_filename, self.output_data)
                 
                 QMessageBox.information(self, "저장 완료", 
                                         f"Id-Vds 데이터가 저장되었습니다.\n그래프: {img_filename}\n데이터: {csv_filename}")
@@ -457,14 +461,7 @@ class MOSFETCharacterizationApp(QMainWindow):
                 
                 # CSV 데이터 저장
                 csv_filename = f"MOSFET_IdVgs_{now}.csv"
-                with open(csv_filename, "w") as f:
-                    # 헤더 작성
-                    f.write("Vds(V),Vgs(V),Id(A)\n")
-                    
-                    # 데이터 작성
-                    for vds, (vgs_arr, ids_arr) in self.transfer_data.items():
-                        for vgs, ids in zip(vgs_arr, ids_arr):
-                            f.write(f"{vds},{vgs},{ids}\n")
+                save_transfer_csv(csv_filename, self.transfer_data)
                 
                 QMessageBox.information(self, "저장 완료", 
                                         f"Id-Vgs 데이터가 저장되었습니다.\n그래프: {img_filename}\n데이터: {csv_filename}")
@@ -474,6 +471,8 @@ class MOSFETCharacterizationApp(QMainWindow):
 
 
 if __name__ == "__main__":
+    from main import configure_matplotlib  # 그래프 폰트 설정은 main 한 곳에서
+    configure_matplotlib()
     app = QApplication(sys.argv)
     window = MOSFETCharacterizationApp()
     window.show()
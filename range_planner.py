@@ -0,0 +1,171 @@
+"""다이오드 I-V 스윕의 전류 측정 레인지 계획 (오토레인지 대신 구간별 고정 레인지)
+
+오토레인지는 nA -> mA 로 올라가는 다이오드 스윕에서 여러 포인트마다 레인지를 바꾸며
+settling 시간을 쓴다. 여기서는 같은 DUT 의 이전 스윕(또는 거친 사전 측정)에서
+각 전압의 전류를 예측해 포인트마다 고정 레인지를 정하고, 같은 레인지가 이어지는 구간을
+하나의 하드웨어 스윕으로 측정한다. 레인지는 구간 경계에서만 바뀐다.
+예측이 빗나가 레인지를 넘은 포인트(2461 overflow / 2400 레인지 끝 리딩)는 오토레인지로 다시 측정한다.
+
+    voltages, currents = run_planned_sweep(instrument, "2461", voltages, current_limit=0.01)
+"""
+import numpy as np
+from smu_sweep import run_voltage_sweep
+from measurement_profiles import DEFAULT_PROFILE, apply_profile
+
+# 모델별 전류 측정 레인지 (A)
+CURRENT_RANGES = {
+    "2461": [1e-8, 1e-7, 1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, 4.0],
+    "2400": [1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0],
+    "2410": [1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0],
+}
+RANGE_HEADROOM = 3.0      # 예측 전류 x 3 이 들어가는 레인지 선택 (DUT 편차 / 노이즈 여유)
+MIN_SEGMENT_POINTS = 4    # 이보다 짧은 구간은 이웃의 큰 레인지에 합친다 (스윕 횟수 줄이기)
+PRESCAN_STRIDE = 8        # 기준 스윕이 없을 때 사전 측정 간격 (포인트 수)
+CURRENT_FLOOR = 1e-13     # log 보간용 전류 바닥값 (A)
+LOW_CURRENT_RANGE = 1e-6  # 이 레인지 이하 구간은 low_current_profile 로 측정 (누설 전류 구간)
+
+_reference_sweeps = {}    # visa_address -> (voltages, currents) 같은 DUT 의 최근 스윕
+
+
+def remember_sweep(visa_address, voltages, currents):
+    """다음 스윕의 레인지 계획에 쓸 기준 곡선 저장"""
+    voltages = np.asarray(voltages, dtype=float)
+    currents = np.asarray(currents, dtype=float)
+    if len(voltages) >= 2 and len(voltages) == len(currents):
+        order = np.argsort(voltages)
+        _reference_sweeps[visa_address] = (voltages[order], currents[order])
+
+
+def forget_sweep(visa_address):
+    """DUT 를 바꿨을 때 기준 곡선 삭제"""
+    _reference_sweeps.pop(visa_address, None)
+
+
+def reference_for(visa_address, voltages):
+    """voltages 범위를 덮는 기준 곡선이 있으면 (voltages, currents), 없으면 None"""
+    reference = _reference_sweeps.get(visa_address)
+    if reference is None:
+        return None
+    ref_v = reference[0]
+    if ref_v[0] > np.min(voltages) or ref_v[-1] < np.max(voltages):
+        return None
+    return reference
+
+
+def range_for(device_model, current):
+    """|current| 를 담을 수 있는 가장 작은 레인지"""
+    ranges = CURRENT_RANGES[device_model]
+    for full_scale in ranges:
+        if abs(current) <= full_scale:
+            return full_scale
+    return ranges[-1]
+
+
+def plan_ranges(device_model, voltages, reference_voltages, reference_currents,
+                current_limit=None, headroom=RANGE_HEADROOM, min_segment=MIN_SEGMENT_POINTS):
+    """포인트별 레인지 계획 -> [(시작 인덱스, 끝 인덱스(미포함), 레인지), ...]
+
+    기준 곡선의 log10|I| 를 전압에 대해 선형 보간해서 예측하고, 예측값 x headroom 이
+    들어가는 가장 작은 레인지를 고른다 (전류 제한이 들어가는 레인지보다 크게는 잡지 않음).
+    """
+    ref_log = np.log10(np.abs(np.asarray(reference_currents, dtype=float)) + CURRENT_FLOOR)
+    predicted = np.interp(voltages, reference_voltages, ref_log)
+    ranges = [range_for(device_model, 10 ** p * headroom) for p in predicted]
+    if current_limit:
+        top = range_for(device_model, current_limit)
+        ranges = [min(r, top) for r in ranges]
+
+    segments = []
+    for index, full_scale in enumerate(ranges):
+        if segments and segments[-1][2] == full_scale:
+            segments[-1][1] = index + 1
+        else:
+            segments.append([index, index + 1, full_scale])
+
+    # 짧은 구간은 이웃 구간 중 큰 레인지 쪽에 합친다 (레인지를 키우는 쪽만 허용)
+    merged = True
+    while merged and len(segments) > 1:
+        merged = False
+        for i, (start, stop, full_scale) in enumerate(segments):
+            if stop - start >= min_segment:
+                continue
+            neighbors = [j for j in (i - 1, i + 1) if 0 <= j < len(segments)]
+            j = max(neighbors, key=lambda k: segments[k][2])
+            if segments[j][2] < full_scale:
+                segments[j][2] = full_scale
+            segments[j][0] = min(segments[j][0], start)
+            segments[j][1] = max(segments[j][1], stop)
+            del segments[i]
+            merged = True
+            break
+    # 합친 뒤 같은 레인지가 이어지면 하나로
+    result = []
+    for start, stop, full_scale in segments:
+        if result and result[-1][2] == full_scale:
+            result[-1] = (result[-1][0], stop, full_scale)
+        else:
+            result.append((start, stop, full_scale))
+    return result
+
+
+def _over_range(currents, full_scale):
+    return np.abs(np.asarray(currents, dtype=float)) >= full_scale
+
+
+def run_planned_sweep(instrument, device_model, voltages, current_limit=None,
+                      hardware_sweep=True, binary=False, profile=DEFAULT_PROFILE, low_current_profile=None):
+    """레인지 계획에 따라 구간별 고정 레인지로 스윕하고 (voltages, currents) 반환
+
+    같은 장비 주소의 이전 스윕이 전압 범위를 덮으면 그것을 기준으로, 아니면
+    PRESCAN_STRIDE 포인트마다 오토레인지로 먼저 측정해서 기준으로 삼는다
+    (사전 측정한 포인트는 그 값을 그대로 결과에 쓴다).
+    low_current_profile 을 주면 레인지가 LOW_CURRENT_RANGE 이하인 구간만 그 측정 프로파일로
+    (예: "high_accuracy"), 나머지 구간과 사전 측정은 profile 로 측정한다.
+    """
+    voltages = np.asarray(voltages, dtype=float)
+    currents = np.full(len(voltages), np.nan)
+    todo = np.ones(len(voltages), dtype=bool)
+
+    try:
+        reference = reference_for(instrument.visa_address, voltages)
+        if reference is None:
+            prescan = np.unique(np.append(np.arange(0, len(voltages), PRESCAN_STRIDE), len(voltages) - 1))
+            currents[prescan] = run_voltage_sweep(instrument, device_model, voltages[prescan],
+                                                  hardware_sweep=hardware_sweep, binary=binary)
+            todo[prescan] = False
+            reference = (voltages[prescan], currents[prescan])
+
+        plan = plan_ranges(device_model, voltages, reference[0], reference[1], current_limit)
+        retry = []
+        for start, stop, full_scale in plan:
+            indices = np.flatnonzero(todo[start:stop]) + start
+            if not len(indices):
+                continue
+            if low_current_profile:
+                apply_profile(instrument, device_model,
+                              low_current_profile if full_scale <= LOW_CURRENT_RANGE else profile)
+            instrument.write(f":SENS:CURR:RANG {full_scale:g}")
+            readings = np.asarray(run_voltage_sweep(instrument, device_model, voltages[indices],
+                                                    hardware_sweep=hardware_sweep, binary=binary), dtype=float)
+            currents[indices] = readings
+            if not current_limit or full_scale < current_limit:  # 전류 제한 레인지의 끝 리딩은 compliance
+                retry.extend(indices[_over_range(readings, full_scale)].tolist())
+        print(f"Planned ranges: {[f'{r:g}' for _, _, r in plan]}")  # Debugging output
+
+        # 레인지를 넘은 포인트는 오토레인지로 다시 측정
+        if low_current_profile:
+            apply_profile(instrument, device_model, profile)
+        instrument.write(":SENS:CURR:RANG:AUTO ON")
+        if retry:
+            print(f"레인지 초과 {len(retry)} 포인트 오토레인지로 재측정")
+            currents[retry] = run_voltage_sweep(instrument, device_model, voltages[retry],
+                                                hardware_sweep=hardware_sweep, binary=binary)
+    finally:
+        try:
+            instrument.write(":SENS:CURR:RANG:AUTO ON")  # 다른 측정은 오토레인지 기준 (설정 캐시와 일치)
+        except Exception as e:
+            instrument.invalidate_state()
+            print(f"오토레인지 복구 오류: {e}")
+
+    remember_sweep(instrument.visa_address, voltages, currents)
+    return voltages, list(currents)
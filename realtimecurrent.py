@@ -4,11 +4,25 @@ import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from matplotlib.ticker import MaxNLocator
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.animation import FuncAnimation
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, 
-                           QWidget, QLabel, QLineEdit, QPushButton)
-from datetime import datetime, timedelta
-import csv
+                           QWidget, QLabel, QLineEdit, QPushButton, QCheckBox, QComboBox)
+from datetime import datetime
+from smu_session import get_session
+from binary_transfer import supports_binary
+from acquisition import configure_realtime_current, read_current, AcquisitionWorker
+from ring_buffer import RingBuffer
+from live_plot import LivePlot
+from recorder import CSVRecorder, BinaryRecorder
+from csv_records import REALTIME_CURRENT_HEADER, realtime_timestamp
+from history_view import HistoryCanvas
+from measurement_profiles import PROFILES, DEFAULT_PROFILE, apply_profile, describe_profile
+
+DEFAULT_SAMPLE_RATE = 10.0  # S/s (기존 100 ms 그리기 간격과 같은 속도)
+MAX_SAMPLE_RATE = 1000.0
+HISTORY_CAPACITY = 100000  # 창마다 보관하는 최근 샘플 수 (고정 메모리, 약 3 MB)
+PLOT_POINTS = 20           # 그래프에 표시할 최근 포인트 수
+REFRESH_INTERVAL = 50      # ms, 그래프 갱신 간격 (20 Hz)
 
 class MainWindow(QMainWindow):
     def __init__(self, visa_address, device_model):
@@ -16,7 +30,11 @@ class MainWindow(QMainWindow):
         self.device_model = device_model
         # Initialize Keithley and create canvas
         self.visa_address = visa_address
+        self.binary_transfer = supports_binary(visa_address)  # 측정값 바이너리 전송 사용 여부
         self.keithley = None
+        self.worker = None
+        # 측정 히스토리 (time = matplotlib 날짜 숫자, current = A)
+        self.history = RingBuffer(HISTORY_CAPACITY, ("time", "current"))
         self.init_keithley()
 
         self.setWindowTitle("Keithley Realtime Curr")
@@ -62,6 +80,30 @@ class MainWindow(QMainWindow):
         current_limit_layout.addWidget(self.set_current_button)
         control_panel.addLayout(current_limit_layout)
         
+        # Sample rate control widgets
+        sample_rate_layout = QVBoxLayout()
+        sample_rate_label = QLabel("Sample Rate (S/s):")
+        self.sample_rate_input = QLineEdit(f"{DEFAULT_SAMPLE_RATE:g}")
+        self.sample_rate_input.setMaximumWidth(100)
+        self.set_rate_button = QPushButton("Set Sample Rate")
+        self.set_rate_button.clicked.connect(self.set_sample_rate)
+        sample_rate_layout.addWidget(sample_rate_label)
+        sample_rate_layout.addWidget(self.sample_rate_input)
+        sample_rate_layout.addWidget(self.set_rate_button)
+        control_panel.addLayout(sample_rate_layout)
+
+        # 측정 프로파일 (NPLC / 필터 / 오토제로) - 바꾸면 측정 중에도 바로 적용
+        profile_layout = QVBoxLayout()
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItems(PROFILES)
+        self.profile_combo.setCurrentText(DEFAULT_PROFILE)
+        self.profile_combo.currentTextChanged.connect(self.set_profile)
+        self.estimate_label = QLabel(describe_profile(self.device_model, DEFAULT_PROFILE))
+        profile_layout.addWidget(QLabel("Profile:"))
+        profile_layout.addWidget(self.profile_combo)
+        profile_layout.addWidget(self.estimate_label)
+        control_panel.addLayout(profile_layout)
+
         # Add start and stop record buttons
         self.start_record_button = QPushButton("Start Record")
         self.start_record_button.clicked.connect(self.start_record)
@@ -72,6 +114,10 @@ class MainWindow(QMainWindow):
         self.stop_record_button.setEnabled(False)  # Initially disabled
         control_panel.addWidget(self.stop_record_button)
 
+        # 장시간 측정용 압축 바이너리 기록 (.smurec, record_format.py 로 CSV 변환)
+        self.binary_record_checkbox = QCheckBox("Binary Record (.smurec)")
+        control_panel.addWidget(self.binary_record_checkbox)
+
         # Add control panel to main layout
         layout.addLayout(control_panel)
         
@@ -83,47 +129,68 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.current_display)
 
         self.canvas = MplCanvas(self)
-        layout.addWidget(self.canvas)
-        
-        # Start animation for real-time updates
-        self.start_animation()
+        layout.addWidget(self.canvas, 3)
 
+        # 측정 시작부터의 전체 히스토리 (휠: 줌, 드래그: 이동, 더블 클릭: 최신 따라가기)
+        self.history_canvas = HistoryCanvas(self, [("Current (A)", "b")], "Current History")
+        layout.addWidget(self.history_canvas, 1)
+        
         # Initialize recording state
         self.is_recording = False
-        self.recording_file = None  # File object for the CSV file
-        self.csv_writer = None      # CSV writer object
+        self.recorder = None  # 백그라운드 CSV 기록 스레드
+
+        # 측정 스레드 시작 (GUI 는 그릴 때 쌓인 샘플만 가져감)
+        self.start_acquisition()
+
+        # Start animation for real-time updates
+        self.start_animation()
         
     def init_keithley(self):
         """Initialize the Keithley SourceMeter"""
         try:
-            if self.keithley:  # 기존 연결이 있으면 해제
-                self.keithley.close()
-
-            rm = pyvisa.ResourceManager()
-            self.keithley = rm.open_resource(self.visa_address)
-            self.keithley.write("*RST")
-            self.keithley.write(":SENS:FUNC 'CURR'")
+            self.keithley = get_session(self.visa_address)  # 공용 세션 풀에서 가져오기
+            configure_realtime_current(self.keithley, self.device_model, self.binary_transfer)
+        except Exception as e:
+            print(f"장비 연결 오류: {e}")
+            self.keithley = None
 
-            if self.device_model == "2461":
-                self.keithley.write(":SENS:CURR:RANG:AUTO ON")
-            else:
-                self.keithley.write(":FORMat:ELEMents CURR")
+    def start_acquisition(self):
+        """측정 스레드 시작"""
+        if self.keithley is None:
+            return
+        self.worker = AcquisitionWorker(
+            lambda: read_current(self.keithley, self.device_model, self.binary_transfer),
+            DEFAULT_SAMPLE_RATE,
+        )
+        self.worker.start()
 
-            self.keithley.write(":FORM:DATA ASC")
-            self.keithley.write(":SOUR:FUNC VOLT")
+    def stop_acquisition(self):
+        """측정 스레드 종료"""
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
 
-            if self.device_model == "2461":
-                self.keithley.write(":SOUR:VOLT:RANG 105")
-            elif self.device_model == "2400":
-                self.keithley.write(":SOUR:VOLT:RANG 200")
-            elif self.device_model == "2410":
-                self.keithley.write(":SOUR:VOLT:RANG 1100")
+    def set_sample_rate(self):
+        """Set the acquisition rate (samples per second)"""
+        try:
+            rate = float(self.sample_rate_input.text())
+            if 0 < rate <= MAX_SAMPLE_RATE:
+                if self.worker is not None:
+                    self.worker.set_rate(rate)
+            else:
+                print(f"샘플링 속도 범위를 벗어났습니다! (0 ~ {MAX_SAMPLE_RATE:g} S/s)")
+        except ValueError as e:
+            print(f"Invalid sample rate value: {e}")
 
-            self.keithley.write(":SOUR:VOLT 0")
-            self.keithley.write(":OUTP ON")
+    def set_profile(self, name):
+        """측정 프로파일 변경 (달라진 NPLC / 필터 / 오토제로 설정만 전송)"""
+        self.estimate_label.setText(describe_profile(self.device_model, name))
+        if self.keithley is None:
+            return
+        try:
+            apply_profile(self.keithley, self.device_model, name)
         except Exception as e:
-            print(f"장비 연결 오류: {e}")
-            self.keithley = None
+            print(f"측정 프로파일 설정 오류: {e}")
 
     def set_voltage(self):
         """Set the source voltage"""
@@ -173,18 +240,20 @@ class MainWindow(QMainWindow):
     def start_record(self):
         """Start recording data to a CSV file."""
         try:
-            # Open a new CSV file for writing
-            self.recording_file = open(f"C:/Users/LG/Desktop/2461_SourceMeter/diode_realtime_record/current_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", mode='w', newline='')
-            self.csv_writer = csv.writer(self.recording_file)
-            
-            # Write headers
-            self.csv_writer.writerow(["Timestamp", "Source Voltage (V)", "Current Limit (A)", "Current (A)"])
+            # Open a new CSV file (헤더는 바로 쓰고, 샘플은 기록 스레드가 모아서 씀)
+            recorder_class, extension = ((BinaryRecorder, ".smurec") if self.binary_record_checkbox.isChecked()
+                                         else (CSVRecorder, ".csv"))
+            self.recorder = recorder_class(
+                f"C:/Users/LG/Desktop/2461_SourceMeter/diode_realtime_record/current_data_{realtime_timestamp()}{extension}",
+                REALTIME_CURRENT_HEADER,
+            )
             
             # Update recording state
             self.is_recording = True
             print("Recording started.")
             
             # Enable/Disable buttons
+            self.binary_record_checkbox.setEnabled(False)
             self.start_record_button.setEnabled(False)
             self.stop_record_button.setEnabled(True)
         except Exception as e:
@@ -194,95 +263,77 @@ class MainWindow(QMainWindow):
         """Stop recording data."""
         try:
             if self.is_recording:
-                # Close the CSV file
-                self.recording_file.close()
+                # 남은 샘플을 모두 쓰고 CSV 파일 닫기
                 self.is_recording = False
-                print("Recording stopped.")
+                self.recorder.close()
+                print(f"Recording stopped. ({self.recorder.rows_written} rows)")
+                self.recorder = None
                 
                 # Enable/Disable buttons
+                self.binary_record_checkbox.setEnabled(True)
                 self.start_record_button.setEnabled(True)
                 self.stop_record_button.setEnabled(False)
         except Exception as e:
             print(f"Error stopping recording: {e}")
 
-    def update_graph(self, frame):
+    def update_graph(self, frame=None):
         try:
-            # Read current value from Keithley
-            if self.device_model == "2461":
-                current = float(self.keithley.query(":READ?"))
-            else:
-                response = self.keithley.query(":READ?")
-                current_str = response.strip().split(',')[0]
-                current = float(current_str)
-
-            time_stamps.append(datetime.now())
-            current_values.append(current)
+            # 측정 스레드가 모아 둔 샘플 가져오기 (새 샘플이 없으면 다시 그리지 않음)
+            samples = self.worker.take_samples() if self.worker is not None else []
+            if not samples:
+                return
+
+            times = [mdates.date2num(timestamp) for timestamp, _ in samples]
+            values = [value for _, value in samples]
+            for t, value in zip(times, values):
+                self.history.append(t, value)
+            self.history_canvas.extend(times, values)
+            current = samples[-1][1]
 
             # Update QLabel with the latest voltage and current values
             self.voltage_display.setText(f"Voltage: {self.source_voltage:.2f} V")
             self.current_display.setText(f"Current: {current:.6f} A")
 
-            # Limit data to the last 20 points for display
-            time_stamps_limited = time_stamps[-20:]
-            current_values_limited = current_values[-20:]
-
-            # Clear and redraw the plot
-            self.canvas.ax.clear()
-            self.canvas.ax.plot(time_stamps_limited, current_values_limited, 
-                                marker='o', linestyle='-', color='b')
-
-            # Update axis properties
-            self.canvas.ax.set_title("Real-Time Current Measurement")
-            self.canvas.ax.set_xlabel("Time")
-            self.canvas.ax.set_ylabel("Current (A)")
-            
-            # Dynamically adjust x-axis limits
-            if len(time_stamps_limited) > 1:
-                self.canvas.ax.set_xlim(time_stamps_limited[0], time_stamps_limited[-1])
-            else:
-                single_time = time_stamps_limited[0]
-                self.canvas.ax.set_xlim(single_time, single_time + timedelta(seconds=1))
+            # Limit data to the last 20 points for display (복사 없는 view)
+            time_stamps_limited, current_values_limited = self.history.latest(PLOT_POINTS)
 
-            # Format x-axis for HH:MM:SS only
-            self.canvas.ax.xaxis.set_major_locator(mdates.SecondLocator(interval=1))  # Show ticks every second
-            self.canvas.ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))  # Exclude milliseconds
-            
-            # Rotate x-axis tick labels for better readability
-            self.canvas.ax.tick_params(axis='x', rotation=45)
-            
-            # Redraw canvas to reflect updates
-            self.canvas.draw()
+            # 선 데이터만 바꾸고 블리팅 (축 범위가 바뀔 때만 전체 다시 그리기)
+            self.live_plot.update(time_stamps_limited, [current_values_limited])
+            self.history_canvas.refresh()  # 0.5초에 한 번만 다시 그림
 
-            # Append data to CSV if recording is active
+            # Append data to CSV if recording is active (그리기 사이의 샘플도 모두 기록)
+            # 큐에 넣기만 하고 파일 쓰기는 기록 스레드에서
             if self.is_recording:
-                self.csv_writer.writerow([
-                    time_stamps[-1].strftime('%Y-%m-%d %H:%M:%S.%f'), 
-                    self.source_voltage, 
-                    self.current_limit, 
-                    current
-                ])
+                self.recorder.record_many(
+                    (timestamp, (self.source_voltage, self.current_limit, value))
+                    for timestamp, value in samples
+                )
         
         except Exception as e:
             print(f"Error updating graph: {e}")
 
     def start_animation(self):
-        """애니메이션 새로 시작"""
-        if hasattr(self, 'ani') and self.ani.event_source:
-            self.ani.event_source.stop()  # 기존 애니메이션 중지
-
-        self.ani = FuncAnimation(
-            self.canvas.fig,
-            self.update_graph,
-            interval=100,
-            cache_frame_data=False
-        )
+        """그래프 갱신 타이머 새로 시작"""
+        if hasattr(self, 'timer'):
+            self.timer.stop()  # 기존 타이머 중지
+
+        self.live_plot = LivePlot(self.canvas, [self.canvas.line], min_x_span=1 / 86400)  # 1초 (날짜 숫자 단위 = 일)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.update_graph)
+        self.timer.start(REFRESH_INTERVAL)
 
     def closeEvent(self, event):
         """창 닫을 때 리소스 정리"""
         try:
-            if hasattr(self, 'ani') and self.ani.event_source:
-                self.ani.event_source.stop()
-                
+            if hasattr(self, 'timer'):
+                self.timer.stop()
+
+            # 측정 스레드를 먼저 멈춘 뒤 출력 OFF
+            self.stop_acquisition()
+            if self.recorder is not None:
+                self.recorder.close()  # 남은 샘플 기록
+                self.recorder = None
+
             # 장비 연결 상태 확인 후 정리
             if self.keithley is not None:
                 try:
@@ -290,7 +341,7 @@ class MainWindow(QMainWindow):
                 except pyvisa.errors.InvalidSession:
                     pass  # 이미 종료된 세션은 무시
                 finally:
-                    self.keithley.close()
+                    self.keithley.close()  # 세션을 풀에 반환 (연결 유지)
                     self.keithley = None
         except Exception as e:
             print(f"리소스 정리 오류: {e}")
@@ -308,11 +359,18 @@ class MplCanvas(FigureCanvas):
         self.ax.set_ylabel("Current (A)")
         self.ax.grid(True)
 
+        # Format x-axis for HH:MM:SS only
+        # 샘플링 속도에 따라 표시 구간이 달라지므로 눈금 간격은 자동 (1초 이상)
+        now = mdates.date2num(datetime.now())
+        self.ax.set_xlim(now, now + 2 / 86400)
+        self.ax.xaxis_date()
+        self.ax.xaxis.set_major_locator(mdates.AutoDateLocator(minticks=3, maxticks=12))
+        self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))  # Exclude milliseconds
+        self.ax.tick_params(axis='x', rotation=45)  # Rotate x-axis tick labels for better readability
+
+        # 실시간 선은 한 번만 만들고 LivePlot 이 데이터만 갱신
+        self.line, = self.ax.plot([], [], marker='o', linestyle='-', color='b')
 
-# Global variables
-rm = pyvisa.ResourceManager()
-time_stamps = []
-current_values = []
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,445 @@
+"""레시피(JSON) 로 측정을 순서대로 돌리는 명령줄 실행기 (Qt / matplotlib 없이 동작)
+
+GUI 없이 다이오드 스윕, MOSFET 출력/전달 특성 스윕, 정해진 시간 동안의 실시간 측정을
+밤새 돌리고, 결과는 GUI 저장 버튼과 같은 CSV 형식(csv_records)으로 남긴다.
+단계 하나가 실패하면 출력을 끄고 다음 단계로 넘어간다 ("stop_on_error": true 이면 중단).
+
+    python recipe_runner.py night.json               # 실행
+    python recipe_runner.py night.json --check       # 레시피 검사 + 예상 시간만 출력
+    python recipe_runner.py night.json --output-dir D:/records
+
+레시피 예:
+    {
+      "instruments": {"diode": "USB0::...::INSTR", "gate": "GPIB0::24::INSTR", "drain": "GPIB0::25::INSTR"},
+      "output_dir": ".",
+      "profile": "normal",
+      "repeat": 1,
+      "steps": [
+        {"type": "diode_sweep", "start": 0, "end": 5, "step": 0.1, "current_limit": 0.01,
+         "compliance": {"action": "skip", "hits": 3}},
+        {"type": "output_sweep", "vgs": {"start": 0, "end": 5, "step": 1},
+         "vds": {"start": 0, "end": 20, "step": 1}, "gate_limit": 0.01, "drain_limit": 0.1},
+        {"type": "transfer_sweep", "vds": [1, 5, 10], "vgs": {"start": 0, "end": 5, "step": 0.1}},
+        {"type": "realtime_current", "duration": 600, "rate": 10, "voltage": 0.5},
+        {"type": "realtime_mosfet", "duration": 600, "gate_voltage": 3, "drain_voltage": 5, "format": "smurec"},
+        {"type": "wait", "seconds": 1800}
+      ]
+    }
+
+단계 공통 키: "name" (파일 이름에 붙음), "repeat", "profile", "instrument" (instruments 의 이름 또는 VISA 주소).
+전압 목록은 {"start", "end", "step"} (끝 값 포함) 또는 값 리스트로 쓴다.
+diode_sweep 의 "adaptive" / "planned_range" / "compliance" 는 하나만 쓸 수 있고,
+"trigger_link" 스윕의 compliance 는 "abort" 만 쓸 수 있다 (--check 에서 거부).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+from smu_session import get_session, close_all_sessions
+from binary_transfer import supports_binary
+from measurement_profiles import PROFILES, DEFAULT_PROFILE, estimate_point_time, format_seconds, sweep_point_count
+from compliance import CompliancePolicy
+from smu_sweep import (
+    configure_voltage_sweep, run_voltage_sweep, run_adaptive_sweep, run_compliance_sweep, check_diode_sweep_modes,
+    configure_mosfet_smus, run_output_sweep, run_transfer_sweep, check_mosfet_sweep_modes,
+)
+from range_planner import run_planned_sweep, remember_sweep
+from acquisition import (
+    configure_realtime_current, read_current, configure_mosfet_gate, configure_mosfet_drain,
+    read_mosfet_sample_timed, monotonic_to_datetime, AcquisitionWorker,
+)
+from async_smu import run_concurrently
+from recorder import CSVRecorder, BinaryRecorder
+from csv_records import (
+    REALTIME_CURRENT_HEADER, REALTIME_MOSFET_HEADER, save_diode_csv, save_output_csv, save_transfer_csv,
+    sweep_timestamp, realtime_timestamp,
+)
+
+# 단계 종류 -> (필수 키, 기본 장비 역할)
+STEP_TYPES = {
+    "diode_sweep": (("start", "end", "step"), ("diode",)),
+    "output_sweep": (("vgs", "vds"), ("gate", "drain")),
+    "transfer_sweep": (("vds", "vgs"), ("gate", "drain")),
+    "realtime_current": (("duration",), ("diode",)),
+    "realtime_mosfet": (("duration",), ("gate", "drain")),
+    "wait": (("seconds",), ()),
+}
+# GUI 저장 버튼과 같은 하위 폴더
+RECORD_DIRS = {
+    "diode_sweep": "diode_sweep_record",
+    "output_sweep": "mosfet_sweep_record",
+    "transfer_sweep": "mosfet_sweep_record",
+    "realtime_current": "diode_realtime_record",
+    "realtime_mosfet": "mosfet_realtime_record",
+}
+DEFAULT_RATE = 10.0         # S/s, 실시간 측정 기본 샘플링 속도 (GUI 와 같음)
+DRAIN_POLL_INTERVAL = 0.5   # s, 실시간 측정 중 측정 스레드의 샘플을 기록기로 옮기는 간격
+MAX_RECIPE_POINTS = 100000  # 전압 목록 하나의 최대 포인트 수 (step 오타로 수십 GB 를 만들지 않도록)
+
+
+# --- 레시피 읽기 / 검사 -------------------------------------------------------
+
+def voltage_values(spec):
+    """{"start", "end", "step"} (끝 값 포함) 또는 값 리스트 -> 전압 배열"""
+    if isinstance(spec, dict):
+        start, end, step = float(spec["start"]), float(spec["end"]), float(spec["step"])
+        count = sweep_point_count(start, end, step)  # 배열을 만들기 전에 포인트 수 확인
+        if not count or count > MAX_RECIPE_POINTS:
+            raise ValueError(f"잘못된 전압 범위 (포인트 수 {count}, 최대 {MAX_RECIPE_POINTS}): {spec}")
+        return np.arange(start, end + step / 2, step)
+    values = np.asarray(spec, dtype=float)
+    if values.ndim != 1 or not len(values):
+        raise ValueError(f"잘못된 전압 목록: {spec}")
+    return values
+
+
+def compliance_policy(spec):
+    """레시피의 compliance ({"action", "hits", "coarse_stride"} 또는 action 문자열) -> 정책 (없으면 None)"""
+    if not spec:
+        return None
+    if isinstance(spec, str):
+        spec = {"action": spec}
+    if spec.get("action", "skip") == "continue":
+        return None
+    return CompliancePolicy(**spec)
+
+
+def check_step(step, recipe):
+    """단계 하나 검사 (문제가 있으면 ValueError)"""
+    step_type = step.get("type")
+    if step_type not in STEP_TYPES:
+        raise ValueError(f"알 수 없는 단계 종류: {step_type!r} (가능: {', '.join(STEP_TYPES)})")
+    required, roles = STEP_TYPES[step_type]
+    missing = [key for key in required if key not in step]
+    if missing:
+        raise ValueError(f"필수 항목 없음: {', '.join(missing)}")
+    profile = step.get("profile", recipe.get("profile", DEFAULT_PROFILE))
+    for name in (profile, step.get("segment_profile")):
+        if name and name != "same" and name not in PROFILES:
+            raise ValueError(f"Unknown measurement profile: {name}")
+    for role in roles:
+        instrument_address(step, recipe, role)
+    compliance_policy(step.get("compliance"))
+    if step_type == "diode_sweep":
+        voltage_values({key: step[key] for key in required})
+        check_diode_sweep_modes(step.get("adaptive"), step.get("planned_range"),
+                                compliance_policy(step.get("compliance")))
+    elif step_type in ("output_sweep", "transfer_sweep"):
+        voltage_values(step["vgs"])
+        voltage_values(step["vds"])
+        check_mosfet_sweep_modes(step.get("trigger_link"), compliance_policy(step.get("compliance")))
+    elif step_type.startswith("realtime") and float(step["duration"]) <= 0:
+        raise ValueError("duration 은 0 보다 커야 합니다")
+
+
+def load_recipe(path):
+    """레시피 파일을 읽고 모든 단계를 미리 검사 (밤새 돌리다 중간에 오타로 멈추지 않도록)"""
+    with open(path, encoding="utf-8") as f:
+        recipe = json.load(f)
+    steps = recipe.get("steps")
+    if not isinstance(steps, list) or not steps:
+        raise ValueError(f"{path}: steps 목록이 없습니다")
+    for index, step in enumerate(steps, 1):
+        try:
+            check_step(step, recipe)
+        except (ValueError, TypeError, KeyError) as e:
+            raise ValueError(f"{path}: 단계 {index} ({step.get('type')}): {e}") from None
+    return recipe
+
+
+def instrument_address(step, recipe, role):
+    """단계가 쓸 장비 주소 (단계의 role 키 > "instrument" > 레시피 instruments[role])"""
+    instruments = recipe.get("instruments", {})
+    name = step.get(role) or (step.get("instrument") if role == "diode" else None) or role
+    address = instruments.get(name, name)
+    if address == role:
+        raise ValueError(f"{role} 장비 주소가 없습니다 (instruments.{role})")
+    return address
+
+
+def estimate_step(step, recipe):
+    """단계의 예상 시간 (s, 측정 적분 시간 기준 - 버스 / settling 제외)"""
+    step_type = step["type"]
+    if step_type == "wait":
+        return float(step["seconds"])
+    if step_type.startswith("realtime"):
+        return float(step["duration"])
+    profile = step.get("profile", recipe.get("profile", DEFAULT_PROFILE))
+    if step_type == "diode_sweep":
+        points = len(voltage_values({key: step[key] for key in ("start", "end", "step")}))
+        model = "2461"
+    else:
+        points = len(voltage_values(step["vgs"])) * len(voltage_values(step["vds"]))
+        model = "2410"
+    return points * estimate_point_time(model, profile)
+
+
+# --- 단계 실행 ----------------------------------------------------------------
+
+def record_path(output_dir, step_type, prefix, stamp, name=None, extension=".csv"):
+    """기록 파일 경로 (GUI 와 같은 하위 폴더 / 이름, 같은 초에 겹치면 _2, _3 ...)"""
+    folder = os.path.join(output_dir, RECORD_DIRS[step_type])
+    os.makedirs(folder, exist_ok=True)
+    base = f"{prefix}_{name}_{stamp}" if name else f"{prefix}_{stamp}"
+    path = os.path.join(folder, base + extension)
+    count = 2
+    while os.path.exists(path):
+        path = os.path.join(folder, f"{base}_{count}{extension}")
+        count += 1
+    return path
+
+
+def _outputs_off(*instruments):
+    for instrument in instruments:
+        try:
+            instrument.write(":OUTP OFF")
+        except Exception as e:
+            print(f"출력 OFF 오류 ({instrument.visa_address}): {e}")
+
+
+def run_diode_step(step, recipe, output_dir):
+    """다이오드 I-V 스윕 (sweepvoltage.perform_voltage_sweep 과 같은 경로)"""
+    instrument = get_session(instrument_address(step, recipe, "diode"))
+    model = instrument.identify()
+    binary = step.get("binary", True) and supports_binary(instrument.visa_address)
+    hardware_sweep = step.get("hardware_sweep", True)
+    profile = step.get("profile", recipe.get("profile", DEFAULT_PROFILE))
+    segment_profile = step.get("segment_profile")
+    if segment_profile == "same":
+        segment_profile = None
+    current_limit = float(step.get("current_limit", 0.01))
+    compliance = compliance_policy(step.get("compliance"))
+    check_diode_sweep_modes(step.get("adaptive"), step.get("planned_range"), compliance)
+    voltages = voltage_values({key: step[key] for key in ("start", "end", "step")})
+
+    try:
+        configure_voltage_sweep(instrument, model, current_limit, profile=profile)
+        instrument.write(":OUTPut ON")
+        if step.get("adaptive"):
+            # 균일 스윕과 같은 격자 (끝 값을 다시 arange 하면 반올림 때문에 한 점 더 생길 수 있음)
+            voltages, currents = run_adaptive_sweep(instrument, model, float(step["start"]), float(step["end"]),
+                                                    float(step["step"]), hardware_sweep=hardware_sweep,
+                                                    binary=binary, profile=profile,
+                                                    coarse_profile=segment_profile, grid=voltages)
+        elif step.get("planned_range"):
+            voltages, currents = run_planned_sweep(instrument, model, voltages, current_limit,
+                                                   hardware_sweep=hardware_sweep, binary=binary,
+                                                   profile=profile, low_current_profile=segment_profile)
+        elif compliance is not None:
+            voltages, currents = run_compliance_sweep(instrument, model, voltages, compliance,
+                                                      hardware_sweep=hardware_sweep, binary=binary)
+        else:
+            currents = run_voltage_sweep(instrument, model, voltages, hardware_sweep=hardware_sweep, binary=binary)
+        remember_sweep(instrument.visa_address, voltages, currents)
+    finally:
+        _outputs_off(instrument)
+
+    path = record_path(output_dir, "diode_sweep", "data", sweep_timestamp(), step.get("name"))
+    save_diode_csv(path, voltages, currents)
+    return path
+
+
+def run_mosfet_sweep_step(step, recipe, output_dir):
+    """MOSFET 출력(Id-Vds) / 전달(Id-Vgs) 특성 스윕"""
+    gate = get_session(instrument_address(step, recipe, "gate"))
+    drain = get_session(instrument_address(step, recipe, "drain"))
+    binary = step.get("binary", True) and supports_binary(gate.visa_address) and supports_binary(drain.visa_address)
+    profile = step.get("profile", recipe.get("profile", DEFAULT_PROFILE))
+    vgs_values = voltage_values(step["vgs"])
+    vds_values = voltage_values(step["vds"])
+    trigger_link = step.get("trigger_link", False)
+    compliance = compliance_policy(step.get("compliance"))
+
+    try:
+        configure_mosfet_smus(gate, drain, float(step.get("gate_limit", 0.01)), float(step.get("drain_limit", 0.1)),
+                              binary, profile=profile)
+        if step["type"] == "output_sweep":
+            data = run_output_sweep(gate, drain, vgs_values, vds_values, binary,
+                                    trigger_link=trigger_link, compliance=compliance)
+        else:
+            data = run_transfer_sweep(gate, drain, vds_values, vgs_values, binary,
+                                      trigger_link=trigger_link, compliance=compliance)
+    finally:
+        _outputs_off(gate, drain)
+
+    if step["type"] == "output_sweep":
+        path = record_path(output_dir, "output_sweep", "MOSFET_IdVds", sweep_timestamp(), step.get("name"))
+        save_output_csv(path, data)
+    else:
+        path = record_path(output_dir, "transfer_sweep", "MOSFET_IdVgs", sweep_timestamp(), step.get("name"))
+        save_transfer_csv(path, data)
+    return path
+
+
+def _capture(worker, recorder, duration, to_record):
+    """duration 동안 측정 스레드의 샘플을 기록기로 옮긴다"""
+    deadline = time.monotonic() + duration
+    worker.start()
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            time.sleep(min(max(remaining, 0.0), DRAIN_POLL_INTERVAL))
+            recorder.record_many(to_record(sample) for sample in worker.take_samples())
+            if remaining <= DRAIN_POLL_INTERVAL:
+                break
+    finally:
+        worker.stop()
+        recorder.record_many(to_record(sample) for sample in worker.take_samples())
+        recorder.close()
+    if recorder.error is not None:
+        raise recorder.error
+    return worker.samples_taken
+
+
+def _recorder(step, output_dir, header):
+    """실시간 기록기 ("format": "csv" (기본) 또는 "smurec")"""
+    if step.get("format", "csv") == "smurec":
+        recorder_class, extension = BinaryRecorder, ".smurec"
+    else:
+        recorder_class, extension = CSVRecorder, ".csv"
+    path = record_path(output_dir, step["type"], "current_data", realtime_timestamp(), step.get("name"), extension)
+    return recorder_class(path, header)
+
+
+def active_current_limit(instrument, device_model):
+    """장비에 걸려 있는 전류 제한 (A) - 레시피에 없을 때도 기록에는 실제 값을 남긴다"""
+    header = ":SOURce:VOLTage:ILIMit?" if device_model == "2461" else ":SENSe:CURRent:PROTection?"
+    return float(instrument.query(header))
+
+
+def run_realtime_current_step(step, recipe, output_dir):
+    """duration 초 동안 고정 전압에서 전류를 rate (S/s) 로 기록 (realtimecurrent 와 같은 CSV)"""
+    instrument = get_session(instrument_address(step, recipe, "diode"))
+    model = instrument.identify()
+    binary = step.get("binary", True) and supports_binary(instrument.visa_address)
+    voltage = float(step.get("voltage", 0))
+    current_limit = step.get("current_limit")
+
+    try:
+        configure_realtime_current(instrument, model, binary, step.get("profile", recipe.get("profile", DEFAULT_PROFILE)))
+        instrument.write(f":SOUR:VOLT {voltage}")
+        if current_limit is not None:
+            limit_header = ":SOURce:VOLTage:ILIMit" if model == "2461" else "SENS:CURR:PROT"
+            instrument.write(f"{limit_header} {float(current_limit)}")
+        limit_value = active_current_limit(instrument, model)
+        recorder = _recorder(step, output_dir, REALTIME_CURRENT_HEADER)
+        worker = AcquisitionWorker(lambda: read_current(instrument, model, binary), float(step.get("rate", DEFAULT_RATE)))
+        count = _capture(worker, recorder, float(step["duration"]),
+                         lambda sample: (sample[0], (voltage, limit_value, sample[1])))
+    finally:
+        _outputs_off(instrument)
+    print(f"  {count} 샘플")
+    return recorder.path
+
+
+def run_realtime_mosfet_step(step, recipe, output_dir):
+    """duration 초 동안 게이트 / 드레인 전압 고정, 두 SMU 를 동시에 읽어 기록 (mosfetrealtime 과 같은 CSV)"""
+    gate = get_session(instrument_address(step, recipe, "gate"))
+    drain = get_session(instrument_address(step, recipe, "drain"))
+    binary = step.get("binary", True) and supports_binary(gate.visa_address) and supports_binary(drain.visa_address)
+    profile = step.get("profile", recipe.get("profile", DEFAULT_PROFILE))
+    current_limit = step.get("current_limit")
+    limit_value = None  # 설정 후 드레인에서 읽음
+
+    def to_record(sample):
+        (gate_time, gate_voltage, gate_current), (drain_time, drain_voltage, drain_current) = sample[1]
+        return (monotonic_to_datetime((gate_time + drain_time) / 2),
+                (gate_voltage, drain_voltage, gate_current, drain_current, limit_value))
+
+    try:
+        run_concurrently((gate, configure_mosfet_gate, binary, profile), (drain, configure_mosfet_drain, binary, profile))
+        gate.write(f":SOUR:VOLT {float(step.get('gate_voltage', 0))}")
+        drain.write(f":SOUR:VOLT {float(step.get('drain_voltage', 0))}")
+        if current_limit is not None:
+            drain.write(f"SENS:CURR:PROT {float(current_limit)}")
+        limit_value = active_current_limit(drain, "2410")
+        recorder = _recorder(step, output_dir, REALTIME_MOSFET_HEADER)
+        worker = AcquisitionWorker(lambda: read_mosfet_sample_timed(gate, drain, binary),
+                                   float(step.get("rate", DEFAULT_RATE)))
+        count = _capture(worker, recorder, float(step["duration"]), to_record)
+    finally:
+        _outputs_off(gate, drain)
+    print(f"  {count} 샘플")
+    return recorder.path
+
+
+def run_wait_step(step, recipe, output_dir):
+    time.sleep(float(step["seconds"]))
+    return None
+
+
+STEP_RUNNERS = {
+    "diode_sweep": run_diode_step,
+    "output_sweep": run_mosfet_sweep_step,
+    "transfer_sweep": run_mosfet_sweep_step,
+    "realtime_current": run_realtime_current_step,
+    "realtime_mosfet": run_realtime_mosfet_step,
+    "wait": run_wait_step,
+}
+
+
+def run_recipe(recipe, output_dir=None):
+    """레시피의 모든 단계를 실행하고 실패한 단계 수 반환"""
+    output_dir = output_dir or recipe.get("output_dir", ".")
+    stop_on_error = recipe.get("stop_on_error", False)
+    failures = 0
+    for cycle in range(int(recipe.get("repeat", 1))):
+        for index, step in enumerate(recipe["steps"], 1):
+            for _ in range(int(step.get("repeat", 1))):
+                label = f"[{cycle + 1}.{index}] {step['type']}" + (f" ({step['name']})" if step.get("name") else "")
+                print(f"{label} 시작")
+                start = time.monotonic()
+                try:
+                    path = STEP_RUNNERS[step["type"]](step, recipe, output_dir)
+                except Exception as e:
+                    failures += 1
+                    print(f"{label} 오류: {e}")
+                    if stop_on_error:
+                        return failures
+                    continue
+                saved = f" -> {path}" if path else ""
+                print(f"{label} 완료 {format_seconds(time.monotonic() - start)}{saved}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="레시피 파일로 SMU 측정을 GUI 없이 실행")
+    parser.add_argument("recipes", nargs="+", help="레시피 JSON 파일 (여러 개면 순서대로)")
+    parser.add_argument("--output-dir", help="기록 폴더 (레시피의 output_dir 보다 우선)")
+    parser.add_argument("--check", action="store_true", help="레시피 검사와 예상 시간만 출력")
+    args = parser.parse_args(argv)
+
+    try:
+        recipes = [load_recipe(path) for path in args.recipes]
+    except (OSError, ValueError) as e:
+        print(f"레시피 오류: {e}")
+        return 2
+
+    if args.check:
+        for path, recipe in zip(args.recipes, recipes):
+            total = 0.0
+            for index, step in enumerate(recipe["steps"], 1):
+                seconds = estimate_step(step, recipe) * int(step.get("repeat", 1))
+                total += seconds
+                print(f"{path} [{index}] {step['type']:<16} ≈ {format_seconds(seconds)}")
+            print(f"{path}: 합계 ≈ {format_seconds(total * int(recipe.get('repeat', 1)))}")
+        return 0
+
+    failures = 0
+    try:
+        for recipe in recipes:
+            failures += run_recipe(recipe, args.output_dir)
+    except KeyboardInterrupt:
+        print("중단됨")
+        return 130
+    finally:
+        close_all_sessions()
+    print(f"완료 (실패한 단계 {failures} 개)" if failures else "완료")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
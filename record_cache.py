@@ -0,0 +1,155 @@
+"""측정 기록 CSV 파싱 결과 캐시 (compare.py 등에서 같은 파일을 다시 열 때 사용)
+
+np.loadtxt 로 파싱한 배열을 .npy 파일로 저장해 두고, 다음에 같은 파일을 열면
+파싱 없이 바로 읽는다. 캐시 키는 (절대 경로, 파일 크기, 수정 시각) 이라서
+CSV 를 다시 저장하면 자동으로 새로 파싱한다.
+
+- 디스크 캐시 : CACHE_DIR 아래 <키 해시>.npy, 총 크기/개수가 한도를 넘으면
+                가장 오래 안 쓴 파일부터 삭제 (사용할 때마다 .npy 의 수정 시각을 갱신)
+- 메모리 캐시 : 같은 프로세스에서 다시 열면 디스크도 읽지 않음 (LRU, 크기 한도)
+
+    data = load_csv_array("diode_sweep_record/A1.csv")  # (행, 열) float64, 읽기 전용
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+CACHE_DIR = os.path.join(
+    os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "2461_SourceMeter", "record_cache",
+)
+MAX_DISK_BYTES = 512 * 1024 * 1024   # 디스크 캐시 최대 크기
+MAX_DISK_ENTRIES = 2000              # 디스크 캐시 최대 파일 수
+MAX_MEMORY_BYTES = 256 * 1024 * 1024  # 메모리 캐시 최대 크기
+
+
+class RecordCache:
+    """CSV -> NumPy 배열 파싱 결과를 디스크(.npy) 와 메모리에 LRU 로 보관"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_disk_bytes=MAX_DISK_BYTES,
+                 max_disk_entries=MAX_DISK_ENTRIES, max_memory_bytes=MAX_MEMORY_BYTES):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_disk_entries = max_disk_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.hits = 0     # 메모리 또는 디스크 캐시에서 읽은 횟수
+        self.misses = 0   # CSV 를 파싱한 횟수
+        self._memory = OrderedDict()  # 키 -> 배열 (뒤쪽이 최근 사용)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path, skiprows):
+        stat = os.stat(path)
+        text = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{skiprows}"
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def _sidecar(self, key):
+        return os.path.join(self.cache_dir, key + ".npy")
+
+    def load(self, path, skiprows=1):
+        """CSV 를 (행, 열) float64 배열로 (캐시에 있으면 파싱하지 않음)"""
+        key = self._key(path, skiprows)
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return data
+
+        data = self._load_sidecar(key)
+        if data is None:
+            data = np.loadtxt(path, delimiter=",", skiprows=skiprows, ndmin=2)
+            self._save_sidecar(key, data)
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        data.flags.writeable = False  # 캐시한 배열을 호출한 쪽에서 바꾸지 못하게
+        self._remember(key, data)
+        return data
+
+    def _load_sidecar(self, key):
+        sidecar = self._sidecar(key)
+        try:
+            data = np.load(sidecar, allow_pickle=False)
+            os.utime(sidecar)  # LRU 용 사용 시각 갱신
+            return data
+        except (OSError, ValueError):
+            return None  # 없거나 깨진 파일은 다시 파싱
+
+    def _save_sidecar(self, key, data):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            sidecar = self._sidecar(key)
+            temp = f"{sidecar}.{os.getpid()}.tmp"
+            with open(temp, "wb") as f:
+                np.save(f, data, allow_pickle=False)
+            os.replace(temp, sidecar)  # 다른 창이 동시에 읽어도 반쯤 쓴 파일을 보지 않도록
+            self._evict_disk()
+        except OSError as e:
+            print(f"기록 캐시 저장 실패: {e}")  # 캐시가 안 돼도 로드는 계속
+
+    def _evict_disk(self):
+        """디스크 캐시가 한도를 넘으면 오래 안 쓴 .npy 부터 삭제"""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".npy"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes and count <= self.max_disk_entries:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            count -= 1
+
+    def _remember(self, key, data):
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = data
+            self._memory_bytes += data.nbytes
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, old = self._memory.popitem(last=False)
+                self._memory_bytes -= old.nbytes
+
+    def clear(self, disk=False):
+        """메모리 캐시 비우기 (disk=True 면 .npy 파일도 삭제)"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if disk and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".npy"):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_record_cache():
+    """프로세스 공용 RecordCache"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = RecordCache()
+        return _default_cache
+
+
+def load_csv_array(path, skiprows=1):
+    """공용 캐시를 거쳐 CSV 를 (행, 열) float64 배열로 읽는다"""
+    return get_record_cache().load(path, skiprows)
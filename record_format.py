@@ -0,0 +1,338 @@
+"""실시간 측정 기록용 청크 단위 바이너리 포맷 (.smurec)
+
+몇 시간짜리 고전압 측정 CSV 는 크고 다시 읽는 데 오래 걸려서,
+같은 내용을 열(column) 단위 바이너리 청크로 이어 붙여 저장한다.
+
+파일 구조 (모든 정수는 little-endian, 각 구간은 8 바이트 단위로 정렬)
+- 파일 헤더 : MAGIC(8) + 헤더 길이(uint32) + 예약(uint32) + JSON 헤더(공백으로 8 바이트 정렬)
+              {"version": 1, "time_column": "Timestamp", "codec": "zlib",
+               "columns": [{"name": "Gate Voltage (V)", "dtype": "<f8"}, ...]}
+- 청크       : CHUNK_MAGIC(4) + 행 수(uint32) + 저장 크기(uint64) + 원래 크기(uint64) + 데이터(8 바이트 정렬)
+              데이터 = 시각 열(int64, epoch ns) 다음에 각 열을 순서대로 이어 붙인 것
+              codec 이 "zlib" 이면 열마다 바이트 셔플(같은 자리 바이트끼리 모음) 후 압축
+
+청크는 덧붙이기만 하므로 기록 중 프로그램이 죽어도 이미 쓴 청크는 그대로 읽을 수 있다.
+마지막에 덜 써진 청크는 읽을 때 무시한다.
+
+    python record_format.py to-csv  C4_100V.smurec [C4_100V.csv]
+    python record_format.py from-csv C4_100V.csv   [C4_100V.smurec] [--codec none]
+"""
+import os
+import sys
+import csv
+import json
+import zlib
+import struct
+import argparse
+from datetime import datetime, timezone, timedelta
+import numpy as np
+
+MAGIC = b"SMUREC\x00\x01"
+CHUNK_MAGIC = b"CHNK"
+FORMAT_VERSION = 1
+EXTENSION = ".smurec"
+TIME_DTYPE = np.dtype("<i8")
+DEFAULT_DTYPE = "<f8"
+CODECS = ("none", "zlib")
+DEFAULT_CODEC = "zlib"
+CHUNK_ROWS = 4096  # 이 행 수가 모이면 청크 하나로 기록
+
+_FILE_HEADER = struct.Struct("<8sII")
+_CHUNK_HEADER = struct.Struct("<4sIQQ")
+
+
+def _padding(size):
+    return -size % 8
+
+
+def _shuffle(raw, itemsize):
+    """같은 자리의 바이트끼리 모은다 (float 지수부 등이 모여 압축이 잘 됨)"""
+    return np.frombuffer(raw, np.uint8).reshape(-1, itemsize).T.tobytes()
+
+
+def _unshuffle(raw, itemsize):
+    return np.frombuffer(raw, np.uint8).reshape(itemsize, -1).T.tobytes()
+
+
+# --- 시각 변환 (로컬 시각 <-> epoch ns) --------------------------------------
+
+def datetime_to_ns(timestamp):
+    """로컬 시각 datetime -> epoch ns (마이크로초 단위까지 정확)"""
+    return round(timestamp.timestamp() * 1e6) * 1000
+
+
+def _local_offset_us(epoch_s):
+    """epoch 초 시점의 로컬 시간대 UTC 오프셋 (us)"""
+    local = datetime.fromtimestamp(epoch_s)
+    utc = datetime.fromtimestamp(epoch_s, timezone.utc).replace(tzinfo=None)
+    return (local - utc) // timedelta(microseconds=1)
+
+
+def ns_to_local_datetime64(timestamps_ns):
+    """epoch ns 배열 -> 로컬 시각 datetime64[us] 배열 (파일 범위 안에서 오프셋이 같으면 벡터 연산)"""
+    timestamps_us = np.asarray(timestamps_ns, dtype=np.int64) // 1000
+    if not len(timestamps_us):
+        return timestamps_us.astype("datetime64[us]")
+    first = _local_offset_us(int(timestamps_us[0]) // 1000000)
+    last = _local_offset_us(int(timestamps_us[-1]) // 1000000)
+    if first == last:
+        return (timestamps_us + first).astype("datetime64[us]")
+    # 측정 중 서머타임이 바뀐 경우만 한 행씩 변환
+    offsets = np.array([_local_offset_us(int(t) // 1000000) for t in timestamps_us], dtype=np.int64)
+    return (timestamps_us + offsets).astype("datetime64[us]")
+
+
+def _offset_for_local_us(local_us):
+    """로컬 시각(us) 에 해당하는 UTC 오프셋 (us)"""
+    guess = local_us - _local_offset_us(local_us // 1000000)  # 로컬 시각을 UTC 로 보고 한 번 보정
+    return _local_offset_us(guess // 1000000)
+
+
+def local_datetime64_to_ns(local_times):
+    """로컬 시각 datetime64 배열 -> epoch ns 배열"""
+    local_us = np.asarray(local_times, dtype="datetime64[us]").astype(np.int64)
+    if not len(local_us):
+        return local_us
+    first = _offset_for_local_us(int(local_us[0]))
+    if first == _offset_for_local_us(int(local_us[-1])):
+        return (local_us - first) * 1000
+    offsets = np.array([_offset_for_local_us(int(t)) for t in local_us], dtype=np.int64)
+    return (local_us - offsets) * 1000
+
+
+# --- 쓰기 --------------------------------------------------------------------
+
+class RecordWriter:
+    """.smurec 파일에 행을 덧붙이는 writer (chunk_rows 행마다 청크 하나 기록)
+
+        writer = RecordWriter(path, ["Gate Voltage (V)", "Drain Current (A)"])
+        writer.append(datetime_to_ns(now), 0.0, 1.2e-9)
+        writer.close()
+    """
+
+    def __init__(self, path, columns, time_column="Timestamp", codec=DEFAULT_CODEC,
+                 dtypes=None, chunk_rows=CHUNK_ROWS):
+        if codec not in CODECS:
+            raise ValueError(f"지원하지 않는 codec: {codec} (가능: {', '.join(CODECS)})")
+        self.path = path
+        self.columns = list(columns)
+        self.dtypes = [np.dtype(d) for d in (dtypes or [DEFAULT_DTYPE] * len(self.columns))]
+        if len(self.dtypes) != len(self.columns):
+            raise ValueError("dtypes 개수가 columns 와 다릅니다")
+        self.codec = codec
+        self.chunk_rows = chunk_rows
+        self.rows_written = 0
+        self._times = []
+        self._rows = []
+
+        header = json.dumps({
+            "version": FORMAT_VERSION,
+            "time_column": time_column,
+            "codec": codec,
+            "columns": [{"name": name, "dtype": dtype.str} for name, dtype in zip(self.columns, self.dtypes)],
+        }, ensure_ascii=False).encode("utf-8")
+        header += b" " * _padding(_FILE_HEADER.size + len(header))
+        self._file = open(path, "wb")
+        self._file.write(_FILE_HEADER.pack(MAGIC, len(header), 0) + header)
+
+    def append(self, timestamp_ns, *values):
+        """행 하나 추가 (timestamp_ns = epoch ns, values = columns 순서)"""
+        self._times.append(timestamp_ns)
+        self._rows.append(values)
+        if len(self._rows) >= self.chunk_rows:
+            self.write_chunk()
+
+    def append_arrays(self, timestamps_ns, columns):
+        """열 배열로 한꺼번에 추가 (변환기에서 사용)"""
+        self.write_chunk()
+        timestamps_ns = np.asarray(timestamps_ns, dtype=TIME_DTYPE)
+        columns = [np.asarray(c, dtype=d) for c, d in zip(columns, self.dtypes)]
+        for start in range(0, len(timestamps_ns), self.chunk_rows):
+            stop = start + self.chunk_rows
+            self._write_arrays(timestamps_ns[start:stop], [c[start:stop] for c in columns])
+
+    def write_chunk(self):
+        """모아 둔 행을 청크 하나로 기록"""
+        if not self._rows:
+            return
+        values = np.array(self._rows, dtype=np.float64).reshape(len(self._rows), len(self.columns))
+        self._write_arrays(np.array(self._times, dtype=TIME_DTYPE),
+                           [values[:, i].astype(d) for i, d in enumerate(self.dtypes)])
+        self._times = []
+        self._rows = []
+
+    def _write_arrays(self, timestamps_ns, columns):
+        arrays = [timestamps_ns] + list(columns)
+        if self.codec == "zlib":
+            raw = b"".join(_shuffle(a.tobytes(), a.itemsize) for a in arrays)
+            payload = zlib.compress(raw, 6)
+        else:
+            raw = payload = b"".join(a.tobytes() for a in arrays)
+        self._file.write(_CHUNK_HEADER.pack(CHUNK_MAGIC, len(timestamps_ns), len(payload), len(raw))
+                         + payload + b"\x00" * _padding(len(payload)))
+        self.rows_written += len(timestamps_ns)
+
+    def flush(self):
+        """모아 둔 행을 기록하고 파일 버퍼를 비운다 (fsync 는 호출한 쪽에서)"""
+        self.write_chunk()
+        self._file.flush()
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        if not self._file.closed:
+            self.write_chunk()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- 읽기 --------------------------------------------------------------------
+
+class RecordFile:
+    """.smurec 파일을 memory-map 해서 읽는 reader
+
+    codec 이 "none" 이면 청크 데이터를 복사 없이 파일 view 로 돌려준다.
+
+        record = RecordFile("C4_100V.smurec")
+        data = record.read()          # {"Timestamp": epoch ns, "Gate Voltage (V)": ..., ...}
+        times = record.local_times()  # datetime64[us] (로컬 시각)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        if len(self._map) < _FILE_HEADER.size:
+            raise ValueError(f"{path}: 헤더가 없습니다")
+        magic, header_length, _ = _FILE_HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: .smurec 파일이 아닙니다")
+        header = json.loads(bytes(self._map[_FILE_HEADER.size:_FILE_HEADER.size + header_length]))
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: 지원하지 않는 버전 {header.get('version')}")
+        self.time_column = header["time_column"]
+        self.codec = header["codec"]
+        self.columns = [c["name"] for c in header["columns"]]
+        self.dtypes = [np.dtype(c["dtype"]) for c in header["columns"]]
+        self.chunks = self._scan(_FILE_HEADER.size + header_length)  # [(데이터 위치, 행 수, 저장 크기, 원래 크기)]
+        self.rows = sum(chunk[1] for chunk in self.chunks)
+
+    def _scan(self, offset):
+        """청크 목록 만들기 (덜 써진 마지막 청크는 무시)"""
+        chunks = []
+        size = len(self._map)
+        while offset + _CHUNK_HEADER.size <= size:
+            magic, rows, stored, raw = _CHUNK_HEADER.unpack_from(self._map, offset)
+            data = offset + _CHUNK_HEADER.size
+            if magic != CHUNK_MAGIC or data + stored > size:
+                break
+            chunks.append((data, rows, stored, raw))
+            offset = data + stored + _padding(stored)
+        return chunks
+
+    def read_chunk(self, index):
+        """청크 하나 -> {열 이름: 배열} (시각 열은 epoch ns int64)"""
+        data, rows, stored, raw = self.chunks[index]
+        payload = self._map[data:data + stored]
+        if self.codec == "zlib":
+            payload = np.frombuffer(zlib.decompress(payload), np.uint8)
+        result = {}
+        position = 0
+        for name, dtype in zip([self.time_column] + self.columns, [TIME_DTYPE] + self.dtypes):
+            nbytes = rows * dtype.itemsize
+            block = payload[position:position + nbytes]
+            if self.codec == "zlib":
+                block = np.frombuffer(_unshuffle(block, dtype.itemsize), np.uint8)
+            result[name] = block.view(dtype)
+            position += nbytes
+        return result
+
+    def read(self, columns=None):
+        """전체 (또는 지정한 열만) -> {열 이름: 배열}"""
+        names = [self.time_column] + self.columns if columns is None else list(columns)
+        chunks = [self.read_chunk(i) for i in range(len(self.chunks))]
+        if len(chunks) == 1:
+            return {name: chunks[0][name] for name in names}
+        dtypes = dict(zip([self.time_column] + self.columns, [TIME_DTYPE] + self.dtypes))
+        return {name: np.concatenate([c[name] for c in chunks]) if chunks else np.empty(0, dtypes[name])
+                for name in names}
+
+    def local_times(self):
+        """시각 열을 로컬 시각 datetime64[us] 로"""
+        return ns_to_local_datetime64(self.read([self.time_column])[self.time_column])
+
+    def close(self):
+        self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_record(path, columns=None):
+    """.smurec 파일 전체를 {열 이름: 배열} 로 읽는다"""
+    with RecordFile(path) as record:
+        return record.read(columns)
+
+
+# --- CSV 변환 ----------------------------------------------------------------
+
+def record_to_csv(record_path, csv_path):
+    """.smurec -> 기존 실시간 기록 CSV 형식 (Timestamp 는 '%Y-%m-%d %H:%M:%S.%f')"""
+    with RecordFile(record_path) as record:
+        data = record.read()
+        times = np.datetime_as_string(ns_to_local_datetime64(data[record.time_column]), unit="us")
+        columns = [data[name].tolist() for name in record.columns]
+        with open(csv_path, mode="w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow([record.time_column] + record.columns)
+            writer.writerows([t.replace("T", " "), *values] for t, *values in zip(times, *columns))
+        return record.rows
+
+
+def csv_to_record(csv_path, record_path, codec=DEFAULT_CODEC):
+    """기존 실시간 기록 CSV -> .smurec (첫 열은 시각, 나머지는 float)"""
+    with open(csv_path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = [row for row in reader if row]
+    times = local_datetime64_to_ns(np.array([row[0] for row in rows], dtype="datetime64[us]"))
+    values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(header) - 1)
+    with RecordWriter(record_path, header[1:], time_column=header[0], codec=codec) as writer:
+        writer.append_arrays(times, values.T)
+    return len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=".smurec <-> CSV 변환")
+    sub = parser.add_subparsers(dest="command", required=True)
+    to_csv = sub.add_parser("to-csv", help=".smurec 를 CSV 로")
+    to_csv.add_argument("source")
+    to_csv.add_argument("target", nargs="?")
+    from_csv = sub.add_parser("from-csv", help="CSV 를 .smurec 로")
+    from_csv.add_argument("source")
+    from_csv.add_argument("target", nargs="?")
+    from_csv.add_argument("--codec", choices=CODECS, default=DEFAULT_CODEC)
+    args = parser.parse_args(argv)
+
+    base = os.path.splitext(args.source)[0]
+    if args.command == "to-csv":
+        target = args.target or base + ".csv"
+        rows = record_to_csv(args.source, target)
+    else:
+        target = args.target or base + EXTENSION
+        rows = csv_to_record(args.source, target, args.codec)
+    print(f"{args.source} -> {target} ({rows} rows, "
+          f"{os.path.getsize(args.source) / 1024:.1f} KB -> {os.path.getsize(target) / 1024:.1f} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
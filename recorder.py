@@ -0,0 +1,165 @@
+"""백그라운드 스레드에서 측정값을 파일로 기록하는 레코더 (실시간 측정 모드용)
+
+GUI 스레드는 record() 로 (시각, 값들) 을 큐에 넣기만 하고,
+문자열 변환 / writerows / flush / fsync 는 레코더 스레드가 모아서 처리한다.
+디스크가 잠깐 멈춰도 측정이나 그래프 갱신이 늦어지지 않고,
+프로그램이 죽어도 마지막 flush_interval 동안의 샘플만 잃는다.
+
+    recorder = CSVRecorder(path, ["Timestamp", "Current (A)"])
+    recorder.record(datetime.now(), current)  # 큐에 넣기만 함
+    recorder.backlog                          # 아직 파일에 쓰지 않은 샘플 수
+    recorder.close()                          # 남은 샘플 기록 + fsync 후 파일 닫기
+
+CSVRecorder 는 기존 CSV 형식, BinaryRecorder 는 record_format 의 .smurec 형식으로 쓴다.
+"""
+import os
+import csv
+import time
+import queue
+import threading
+from record_format import RecordWriter, datetime_to_ns
+
+FLUSH_INTERVAL = 1.0   # s, 이 간격마다 flush + fsync
+MAX_BATCH = 5000       # 한 번에 꺼내 쓰는 최대 샘플 수
+
+_STOP = object()
+
+
+class Recorder(threading.Thread):
+    """record() 로 받은 샘플을 모아서 파일에 쓰는 기록 스레드 (형식별로 _open/_write/_sync/_close 구현)"""
+
+    def __init__(self, path, header, flush_interval=FLUSH_INTERVAL, max_batch=MAX_BATCH):
+        super().__init__(daemon=True, name="recorder")
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.rows_written = 0
+        self.error = None  # 기록 중 발생한 마지막 예외
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+
+        # 파일 열기 / 헤더 쓰기 실패는 호출한 쪽(start_record)에서 바로 알 수 있게 여기서 처리
+        self._open(path, header)
+        self._sync()
+        self.start()
+
+    @property
+    def backlog(self):
+        """큐에 쌓여 아직 파일에 쓰지 않은 샘플 수 (대략값)"""
+        return self._queue.qsize()
+
+    def record(self, timestamp, *values):
+        """샘플 하나를 기록 큐에 넣는다 (timestamp 는 datetime)"""
+        if not self._closed:
+            self._queue.put((timestamp, values))
+
+    def record_many(self, samples):
+        """[(timestamp, (값, ...)), ...] 여러 샘플을 큐에 넣는다"""
+        if not self._closed:
+            for timestamp, values in samples:
+                self._queue.put((timestamp, tuple(values)))
+
+    def _take_batch(self, timeout):
+        """큐에서 최대 max_batch 개를 꺼낸다. (샘플 목록, 종료 요청 여부)"""
+        batch = []
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return batch, False
+        while True:
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+            if len(batch) >= self.max_batch:
+                return batch, False
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return batch, False
+
+    def run(self):
+        stop = False
+        dirty = False
+        next_sync = time.monotonic() + self.flush_interval
+        while not stop:
+            batch, stop = self._take_batch(max(next_sync - time.monotonic(), 0.0))
+            try:
+                if batch:
+                    self._write(batch)
+                    dirty = True
+                # flush_interval 마다 한 번만 디스크에 반영 (샘플마다 fsync 하지 않음)
+                if time.monotonic() >= next_sync:
+                    if dirty:
+                        self._sync()
+                        dirty = False
+                    next_sync = time.monotonic() + self.flush_interval
+            except Exception as e:
+                if self.error is None or str(e) != str(self.error):  # 같은 오류는 한 번만 출력
+                    print(f"기록 오류 ({self.path}): {e}")
+                self.error = e
+        try:
+            self._sync()
+        except Exception as e:
+            self.error = e
+        finally:
+            self._close()
+
+    def close(self, timeout=10.0):
+        """남은 샘플을 모두 쓰고 파일을 닫는다"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+
+class CSVRecorder(Recorder):
+    """기존 실시간 기록 CSV 형식 (header 의 첫 열이 Timestamp)"""
+
+    def _open(self, path, header):
+        self._file = open(path, mode='w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(header)
+
+    def _write(self, batch):
+        # isoformat(timespec='microseconds') 은 strftime('%Y-%m-%d %H:%M:%S.%f') 과 같은 문자열
+        self._writer.writerows(
+            [timestamp.isoformat(' ', 'microseconds'), *values] for timestamp, values in batch
+        )
+        self.rows_written += len(batch)
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _close(self):
+        self._file.close()
+
+
+class BinaryRecorder(Recorder):
+    """.smurec 청크 형식 (시각은 epoch ns, 값은 float64 열)
+
+    flush_interval 마다 그때까지 받은 샘플을 청크 하나로 쓰고 fsync 한다.
+    """
+
+    def __init__(self, path, header, codec="zlib", **kwargs):
+        self.codec = codec
+        super().__init__(path, header, **kwargs)
+
+    def _open(self, path, header):
+        # chunk_rows 를 크게 잡아 청크 경계는 flush 시점(_sync)이 정하도록 함
+        self._writer = RecordWriter(path, header[1:], time_column=header[0], codec=self.codec,
+                                    chunk_rows=1 << 20)
+
+    def _write(self, batch):
+        for timestamp, values in batch:
+            self._writer.append(datetime_to_ns(timestamp), *values)
+        self.rows_written += len(batch)
+
+    def _sync(self):
+        self._writer.flush()
+        os.fsync(self._writer.fileno())
+
+    def _close(self):
+        self._writer.close()
@@ -0,0 +1,73 @@
+"""고정 크기 NumPy 링 버퍼 (실시간 측정 히스토리용)
+
+미리 할당한 float64 배열에 샘플을 덮어쓰므로 오래 측정해도 메모리가 늘지 않는다.
+저장 공간을 capacity 의 두 배로 잡고 각 샘플을 두 곳에 써 두기 때문에
+최근 n 개는 항상 연속된 구간이 되어 복사 없이 view 로 꺼낼 수 있다.
+
+    history = RingBuffer(100000, ("time", "current"))
+    history.append(t, i)                 # O(1)
+    times, currents = history.latest(20)  # 복사 없는 읽기 전용 view
+"""
+import numpy as np
+
+
+class RingBuffer:
+    """열(column) 여러 개를 가진 고정 크기 float64 링 버퍼"""
+
+    def __init__(self, capacity, columns=("time", "value")):
+        if capacity <= 0:
+            raise ValueError("capacity 는 1 이상이어야 합니다")
+        self.capacity = int(capacity)
+        self.columns = tuple(columns)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+        self._data = np.zeros((len(self.columns), 2 * self.capacity), dtype=np.float64)
+        self._head = 0   # 다음에 쓸 위치 (0 ~ capacity-1)
+        self._size = 0
+        self.total = 0   # 지금까지 추가된 샘플 수 (덮어쓴 것 포함)
+
+    def __len__(self):
+        return self._size
+
+    def append(self, *values):
+        """샘플 하나 추가 (columns 순서대로 값)"""
+        head = self._head
+        self._data[:, head] = values
+        self._data[:, head + self.capacity] = values
+        self._head = (head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self.total += 1
+
+    def extend(self, rows):
+        """[(값, 값, ...), ...] 여러 샘플 추가"""
+        for row in rows:
+            self.append(*row)
+
+    def _view(self, rows, n):
+        if n is None or n > self._size:
+            n = self._size
+        end = self._head + self.capacity  # 가장 최근 샘플 다음 위치 (뒤쪽 사본 기준)
+        view = self._data[rows, end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def latest(self, n=None):
+        """최근 n 개 (None 이면 전체) 를 열 순서대로 1차원 view 들의 튜플로 반환
+
+        view 는 버퍼를 그대로 가리키므로 이후 append 하면 내용이 바뀐다.
+        오래 보관할 값은 np.copy() 로 복사해서 쓴다.
+        """
+        return tuple(self._view(i, n) for i in range(len(self.columns)))
+
+    def column(self, name, n=None):
+        """열 하나의 최근 n 개 view"""
+        return self._view(self._index[name], n)
+
+    def last(self):
+        """가장 최근 샘플 (열 순서대로의 튜플), 비어 있으면 None"""
+        if not self._size:
+            return None
+        return tuple(float(v) for v in self._data[:, self._head + self.capacity - 1])
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
@@ -0,0 +1,29 @@
+"""SCPI 명령 헤더 파서 (세션 설정 캐시와 가상 장비가 같이 쓴다)
+
+    parse_command(':SOURce:VOLTage:ILIMit 0.01')  # ('SOUR:VOLT:ILIM', '0.01', False)
+    short_node('SWEep')                           # 'SWE'
+"""
+import re
+
+OPTIONAL_NODES = {"LEV", "IMM", "AMPL", "SEQ", "LAY", "DC"}
+
+
+def short_node(node):
+    """SCPI 헤더 노드를 짧은 형식으로 (SOURce -> SOUR, SWEep -> SWE)"""
+    node = re.sub(r"\d+$", "", node.upper())
+    if len(node) <= 4:
+        return node
+    return node[:3] if node[3] in "AEIOU" else node[:4]
+
+
+def parse_command(command):
+    """':SOURce:VOLTage:ILIMit 0.01' -> ('SOUR:VOLT:ILIM', '0.01', False)"""
+    command = command.strip()
+    header, _, argument = command.partition(" ")
+    is_query = header.endswith("?")
+    header = header.rstrip("?")
+    if header.startswith("*"):
+        return header.upper(), argument.strip(), is_query
+    nodes = [short_node(node) for node in header.strip(":").split(":") if node]
+    nodes = [node for node in nodes if node not in OPTIONAL_NODES]
+    return ":".join(nodes), argument.strip(), is_query
@@ -0,0 +1,749 @@
+"""시뮬레이션 SMU 백엔드 (실제 2400/2410/2461 없이 모드 테스트·벤치마크용)
+
+VISA 주소 대신 아래 형식의 주소를 쓰면 smu_session 이 이 모듈의 가상 장비를 연다.
+
+    SIM::<모델>::<DUT>[::<단자>]::INSTR
+    예) SIM::2461::DIODE::INSTR
+        SIM::2400::MOSFET::GATE::INSTR   (게이트 SMU)
+        SIM::2410::MOSFET::DRAIN::INSTR  (드레인 SMU, 같은 MOSFET 을 공유)
+        SIM::2410::LEAKAGE::INSTR        (고전압 누설전류)
+
+sweepvoltage / mosfetsweep / realtimecurrent / mosfetrealtime / Flask measure_route 가
+쓰는 SCPI 명령을 지원하고, 버스 지연(latency), NPLC 적분 시간, 노이즈를 흉내낸다.
+2400/2410 가상 장비들은 모두 같은 Trigger Link 케이블에 물려 있는 것으로 보고
+ARM/TRIG 레이어의 TLINk 입력, ILINe/OLINe, INPut/OUTPut, DIRection 을 흉내낸다.
+환경변수 SOURCEMETER_SIMULATION=1 이면 list_resources() 에 기본 가상 장비가 추가된다.
+"""
+import os
+import time
+import struct
+import threading
+import weakref
+import itertools
+from collections import deque
+import numpy as np
+import pyvisa
+from scpi import short_node, parse_command
+
+DEFAULT_ADDRESSES = [
+    "SIM::2461::DIODE::INSTR",
+    "SIM::2400::MOSFET::GATE::INSTR",
+    "SIM::2410::MOSFET::DRAIN::INSTR",
+    "SIM::2410::LEAKAGE::INSTR",
+]
+
+# 시뮬레이션 공통 설정 (configure() 로 변경)
+SIM_CONFIG = {
+    "latency": 0.0005,        # s, 버스 트랜잭션(write/query) 한 번의 지연
+    "line_frequency": 60.0,   # Hz, NPLC -> 적분 시간 환산
+    "reading_overhead": 0.0005,  # s, 리딩 하나당 고정 오버헤드
+    "noise_floor": 2e-12,     # A rms, NPLC 1 기준 바닥 노이즈
+    "noise_ratio": 1e-4,      # 측정 전류 대비 상대 노이즈 (NPLC 1 기준)
+    "range_noise": 1e-7,      # 측정 레인지 대비 노이즈 (레인지가 클수록 작은 전류의 분해능이 나빠짐)
+    "range_change_time": 0.003,  # s, 오토레인지가 레인지를 한 단계 바꿀 때의 settling 시간 (+ 재측정 1회)
+    "time_scale": 1.0,        # 모든 지연에 곱하는 배율 (0 이면 지연 없음)
+    "seed": None,
+}
+
+THERMAL_VOLTAGE = 0.02585  # V, 300 K
+
+# 모델별 전류 측정 레인지 (A)
+CURRENT_RANGES = {
+    "2461": [1e-8, 1e-7, 1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, 4.0, 7.0],
+    "2400": [1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0],
+    "2410": [1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0],
+}
+OVERFLOW_READING = 9.9e37  # 2461 레인지 초과 리딩
+DEFBUFFER_CAPACITY = 100000  # 2461 defbuffer1 기본 용량 (리딩 수)
+
+_duts = {}
+_duts_lock = threading.Lock()
+_trigger_link = weakref.WeakSet()  # 같은 Trigger Link 에 연결된 가상 장비들
+
+
+def configure(**kwargs):
+    """SIM_CONFIG 값 변경 (예: configure(latency=0.002, time_scale=0))"""
+    for key, value in kwargs.items():
+        if key not in SIM_CONFIG:
+            raise KeyError(f"알 수 없는 시뮬레이션 설정: {key}")
+        SIM_CONFIG[key] = value
+
+
+def is_simulated(visa_address):
+    return str(visa_address).upper().startswith("SIM::")
+
+
+def simulated_addresses():
+    """SOURCEMETER_SIMULATION 환경변수에 따라 노출할 가상 장비 주소 목록
+
+    '1' 이면 DEFAULT_ADDRESSES, 쉼표로 구분한 주소 목록이면 그 목록을 쓴다.
+    """
+    value = os.environ.get("SOURCEMETER_SIMULATION", "").strip()
+    if not value or value == "0":
+        return []
+    if value == "1":
+        return list(DEFAULT_ADDRESSES)
+    return [addr.strip() for addr in value.split(",") if is_simulated(addr.strip())]
+
+
+def _sleep(seconds):
+    seconds *= SIM_CONFIG["time_scale"]
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+# ---------------------------------------------------------------------------
+# DUT 모델
+# ---------------------------------------------------------------------------
+class DiodeModel:
+    """Shockley 다이오드 + 직렬저항 + 병렬 누설저항"""
+
+    def __init__(self, saturation_current=1e-12, ideality=1.8, series_resistance=5.0,
+                 leakage_resistance=1e11):
+        self.saturation_current = saturation_current
+        self.ideality = ideality
+        self.series_resistance = series_resistance
+        self.leakage_resistance = leakage_resistance
+        self.voltages = {}
+
+    def set_voltage(self, terminal, voltage):
+        self.voltages[terminal] = voltage
+
+    def current(self, terminal):
+        voltage = self.voltages.get(terminal, 0.0)
+        nvt = self.ideality * THERMAL_VOLTAGE
+        # 직렬저항 때문에 I = Is*(exp((V - I*Rs)/nVt) - 1) 를 뉴턴법으로 푼다
+        current = self.saturation_current * np.expm1(min(voltage, 0.9) / nvt)
+        for _ in range(30):
+            exponent = np.exp(min((voltage - current * self.series_resistance) / nvt, 60.0))
+            f = self.saturation_current * (exponent - 1) - current
+            df = -self.saturation_current * exponent * self.series_resistance / nvt - 1
+            step = f / df
+            current -= step
+            if abs(step) < 1e-15 + 1e-9 * abs(current):
+                break
+        return current + voltage / self.leakage_resistance
+
+
+class MOSFETModel:
+    """정사각 법칙 MOSFET (서브스레숄드 + 채널 길이 변조 + 게이트/드레인 누설)"""
+
+    def __init__(self, threshold_voltage=2.5, transconductance=0.05, channel_modulation=0.01,
+                 subthreshold_slope=1.5, gate_leakage=1e12, drain_leakage=1e11):
+        self.threshold_voltage = threshold_voltage
+        self.transconductance = transconductance
+        self.channel_modulation = channel_modulation
+        self.subthreshold_slope = subthreshold_slope
+        self.gate_leakage = gate_leakage
+        self.drain_leakage = drain_leakage
+        self.voltages = {}
+
+    def set_voltage(self, terminal, voltage):
+        self.voltages[terminal] = voltage
+
+    def drain_current(self, vgs, vds):
+        overdrive = vgs - self.threshold_voltage
+        modulation = 1 + self.channel_modulation * abs(vds)
+        # 서브스레숄드 전류는 Vth 에서 강반전 식과 이어지도록 맞춘다
+        i_at_threshold = self.transconductance * (self.subthreshold_slope * THERMAL_VOLTAGE) ** 2
+        if overdrive <= 0:
+            current = i_at_threshold * np.exp(overdrive / (self.subthreshold_slope * THERMAL_VOLTAGE))
+            current *= -np.expm1(-abs(vds) / THERMAL_VOLTAGE)
+        elif abs(vds) < overdrive:
+            current = self.transconductance * (overdrive * abs(vds) - vds ** 2 / 2) + i_at_threshold
+        else:
+            current = 0.5 * self.transconductance * overdrive ** 2 + i_at_threshold
+        return np.sign(vds) * current * modulation + vds / self.drain_leakage
+
+    def current(self, terminal):
+        vgs = self.voltages.get("GATE", 0.0)
+        vds = self.voltages.get("DRAIN", 0.0)
+        if terminal == "GATE":
+            return vgs / self.gate_leakage
+        return self.drain_current(vgs, vds)
+
+
+class LeakageModel:
+    """고전압 누설전류 (옴성 누설 + 고전압 쪽 소프트 브레이크다운)"""
+
+    def __init__(self, leakage_resistance=1e11, knee_voltage=900.0, knee_exponent=6.0):
+        self.leakage_resistance = leakage_resistance
+        self.knee_voltage = knee_voltage
+        self.knee_exponent = knee_exponent
+        self.voltages = {}
+
+    def set_voltage(self, terminal, voltage):
+        self.voltages[terminal] = voltage
+
+    def current(self, terminal):
+        voltage = self.voltages.get(terminal, 0.0)
+        return voltage / self.leakage_resistance * (1 + abs(voltage / self.knee_voltage) ** self.knee_exponent)
+
+
+DUT_MODELS = {
+    "DIODE": DiodeModel,
+    "MOSFET": MOSFETModel,
+    "LEAKAGE": LeakageModel,
+}
+
+
+def get_dut(name):
+    """이름이 같은 가상 장비끼리는 같은 DUT 를 공유한다 (게이트/드레인 SMU)"""
+    with _duts_lock:
+        if name not in _duts:
+            _duts[name] = DUT_MODELS[name]()
+        return _duts[name]
+
+
+# ---------------------------------------------------------------------------
+# SCPI 인자 파서 (헤더 파서는 scpi.py)
+# ---------------------------------------------------------------------------
+def parse_bool(argument):
+    return argument.strip().upper() in ("ON", "1")
+
+
+def parse_numbers(argument):
+    return [float(value) for value in argument.replace(" ", "").split(",") if value]
+
+
+# ---------------------------------------------------------------------------
+# 가상 장비
+# ---------------------------------------------------------------------------
+class SimulatedSMU:
+    """pyvisa MessageBasedResource 처럼 동작하는 가상 Keithley SMU"""
+
+    ROOT_NODES = {"SOUR", "SENS", "FORM", "TRIG", "ARM", "SYST", "TRAC", "OUTP", "ROUT",
+                  "DISP", "INIT", "ABOR", "READ", "FETC", "MEAS", "STAT", "CALC", "CONF"}
+
+    def __init__(self, visa_address):
+        parts = [part.upper() for part in visa_address.split("::")]
+        if len(parts) < 3 or parts[0] != "SIM":
+            raise ValueError(f"잘못된 시뮬레이션 주소: {visa_address}")
+        self.visa_address = visa_address
+        self.device_model = parts[1]
+        self.dut_name = parts[2]
+        self.terminal = parts[3] if len(parts) > 4 else parts[2]
+        if self.dut_name not in DUT_MODELS:
+            raise ValueError(f"알 수 없는 시뮬레이션 DUT: {self.dut_name}")
+        self.dut = get_dut(self.dut_name)
+
+        self.timeout = 2000
+        self.write_termination = '\n'
+        self.read_termination = '\n'
+        self.transactions = 0      # 버스 왕복 횟수 (write/query 호출 수)
+        self.readings_taken = 0    # 측정한 리딩 수
+        self._pending = b""
+        rng_seed = SIM_CONFIG["seed"]
+        self._rng = np.random.default_rng(rng_seed)
+        # Trigger Link 로 다른 장비가 이 장비의 write 안에서 다시 불러올 수 있으므로 RLock
+        self._lock = threading.RLock()
+        self.reset()
+        _trigger_link.add(self)
+
+    # --- 상태 -------------------------------------------------------------
+    def reset(self):
+        self.output = False
+        self.source_level = 0.0
+        self.current_limit = 1.05e-4
+        self.source_mode = "FIX"
+        self.sweep = {"STAR": 0.0, "STOP": 0.0, "STEP": 0.0, "POIN": 2500}
+        self.source_list = []
+        self.trigger_count = 1
+        self.elements = ["VOLT", "CURR", "RES", "TIME", "STAT"]
+        self.data_format = "ASC"
+        self.byte_order = "NORM"
+        self.nplc = 1.0
+        self.filter_count = 10
+        self.filter_enabled = False
+        self.autozero = True
+        self.current_range_auto = True
+        self.current_range = 1e-4
+        self._settle = 0.0         # 오토레인지 settling 으로 생긴 추가 대기 시간 (다음 sleep 에 포함)
+        self.range_changes = 0     # 오토레인지가 레인지를 바꾼 횟수
+        self.settings = {}         # 그 외 설정 명령은 저장만 해 둔다
+        self.errors = []
+        # 2461 defbuffer1: (current, source, time, in_limit) - 장비처럼 용량이 차면 오래된 리딩부터 덮어씀
+        self.buffer = deque(maxlen=DEFBUFFER_CAPACITY)
+        self.pending_sweep = None  # 2461 :SOUR:SWE:VOLT:LIN/LIST 로 준비된 전압 배열
+        self.fetch_buffer = []     # 2400/2410 :INIT 후 :FETC? 로 읽을 리딩
+        # 2400/2410 트리거 모델 (Trigger Link)
+        self.trigger = {
+            "ARM:SOUR": "IMM", "ARM:ILIN": 1, "ARM:OLIN": 2, "ARM:COUN": 1,
+            "TRIG:SOUR": "IMM", "TRIG:ILIN": 1, "TRIG:OLIN": 2, "TRIG:DIR": "ACC",
+            "TRIG:INP": set(), "TRIG:OUTP": set(),
+        }
+        self.run = None            # 트리거 모델 안에서 진행 중인 동작 (None = idle)
+        self._link_inputs = {}     # 받았지만 아직 쓰지 않은 Trigger Link 입력 {line: 개수}
+        self._deferred = []        # 트리거 모델 동작 중에 받은 명령 (idle 이 되면 실행)
+        self.in_limit = False
+        self.start_time = time.monotonic()
+        self._apply_level(0.0)
+
+    def _apply_level(self, voltage):
+        self.source_level = voltage
+        self.dut.set_voltage(self.terminal, voltage if self.output else 0.0)
+
+    # --- pyvisa 호환 API ----------------------------------------------------
+    def write(self, message):
+        with self._lock:
+            self.transactions += 1
+            _sleep(SIM_CONFIG["latency"])
+            self._execute_message([c for c in message.strip().split(";") if c.strip()])
+        return len(message)
+
+    def _execute_message(self, commands):
+        responses = []
+        for index, command in enumerate(commands):
+            if self.run is not None and parse_command(command)[0] not in ("ABOR", "*RST"):
+                # 트리거 모델 동작 중에는 명령이 실행되지 않고 idle 이 될 때까지 대기
+                self._deferred.extend(commands[index:])
+                break
+            response = self._execute(command)
+            if response is not None:
+                responses.append(response)
+        if len(responses) == 1:
+            self._pending = responses[0]
+        elif responses:
+            # 한 메시지 안의 여러 쿼리 응답은 ';' 로 이어서 돌려준다
+            self._pending = b";".join(r.rstrip(b"\n") for r in responses) + b"\n"
+
+    def read_raw(self):
+        with self._lock:
+            if not self._pending:
+                raise pyvisa.errors.VisaIOError(pyvisa.constants.StatusCode.error_timeout)
+            data, self._pending = self._pending, b""
+            return data
+
+    def read(self):
+        return self.read_raw().decode("latin-1").rstrip("\r\n")
+
+    def query(self, message, delay=None):
+        self.write(message)
+        return self.read()
+
+    def query_binary_values(self, message, datatype="f", is_big_endian=False, container=list,
+                            data_points=0, **kwargs):
+        self.write(message)
+        block = self.read_raw()
+        if not block.startswith(b"#"):
+            raise ValueError(f"바이너리 블록이 아닙니다: {block[:25]!r}")
+        header_length = int(block[1:2])
+        if header_length == 0:
+            offset = 2
+            data_length = len(block) - offset - len(self.read_termination)
+        else:
+            offset = 2 + header_length
+            data_length = int(block[2:offset])
+        dtype = np.dtype(datatype).newbyteorder(">" if is_big_endian else "<")
+        values = np.frombuffer(block[offset:offset + data_length], dtype=dtype)
+        return container(values)
+
+    def close(self):
+        pass
+
+    # --- 측정 -------------------------------------------------------------
+    def _integration_time(self):
+        seconds = self.nplc / SIM_CONFIG["line_frequency"]
+        if self.filter_enabled:
+            seconds *= self.filter_count
+        if self.autozero:
+            seconds *= 2 if self.device_model == "2461" else 1
+        return seconds + SIM_CONFIG["reading_overhead"]
+
+    def _range_for(self, current):
+        """|current| 를 측정할 수 있는 가장 작은 레인지"""
+        ranges = CURRENT_RANGES[self.device_model]
+        for full_scale in ranges:
+            if abs(current) <= full_scale * 1.05:
+                return full_scale
+        return ranges[-1]
+
+    def _set_current_range(self, value):
+        self.current_range_auto = False
+        self.current_range = self._range_for(value)
+
+    def _measure(self):
+        """현재 소스 전압에서 전류 리딩 하나 (전류 제한, 측정 레인지 포함)"""
+        current = self.dut.current(self.terminal) if self.output else 0.0
+        if self.current_range_auto:
+            needed = self._range_for(current)
+            if needed != self.current_range:
+                ranges = CURRENT_RANGES[self.device_model]
+                steps = abs(ranges.index(needed) - ranges.index(self._range_for(self.current_range)))
+                # 레인지를 바꾼 뒤 settling 을 기다리고 다시 측정 (적분 한 번 더)
+                self._settle += SIM_CONFIG["range_change_time"] * steps + self._integration_time()
+                self.range_changes += 1
+                self.current_range = needed
+        averaging = self.nplc * (self.filter_count if self.filter_enabled else 1)
+        sigma = (SIM_CONFIG["noise_floor"] + SIM_CONFIG["range_noise"] * self.current_range
+                 + SIM_CONFIG["noise_ratio"] * abs(current)) / np.sqrt(max(averaging, 1e-3))
+        current += self._rng.normal(0.0, sigma)
+        self.in_limit = abs(current) >= self.current_limit
+        if self.in_limit:
+            current = np.sign(current) * self.current_limit
+        if abs(current) > self.current_range * 1.05:
+            # 고정 레인지 초과: 2461 은 overflow 리딩, 2400/2410 은 레인지 끝에서 compliance
+            self.in_limit = True
+            current = np.sign(current) * (OVERFLOW_READING if self.device_model == "2461"
+                                          else self.current_range * 1.05)
+        self.readings_taken += 1
+        return current
+
+    def _settle_time(self):
+        """쌓인 오토레인지 settling 시간을 꺼낸다"""
+        settle, self._settle = self._settle, 0.0
+        return settle
+
+    def _take_readings(self, voltages):
+        """전압 배열을 차례로 소스하면서 리딩을 만든다 (적분 시간만큼 대기)"""
+        readings = []
+        for voltage in voltages:
+            self._apply_level(voltage)
+            current = self._measure()
+            readings.append((voltage, current, self.in_limit, time.monotonic() - self.start_time))
+        _sleep(self._integration_time() * len(voltages) + self._settle_time())
+        return readings
+
+    def _sweep_voltages(self):
+        """2400/2410 :SOUR:VOLT:MODE 에 따른 한 번의 트리거 동작 전압 목록"""
+        if self.source_mode == "SWE":
+            points = int(self.sweep["POIN"])
+            return list(np.linspace(self.sweep["STAR"], self.sweep["STOP"], points))[:self.trigger_count]
+        if self.source_mode == "LIST":
+            return list(self.source_list)[:self.trigger_count]
+        return [self.source_level] * self.trigger_count
+
+    def _format_2400(self, readings):
+        values = []
+        for voltage, current, in_limit, timestamp in readings:
+            status = (1 << 14) | (1 << 12) | ((1 << 3) if in_limit else 0)
+            element_values = {
+                "VOLT": voltage,
+                "CURR": current,
+                "RES": 9.91e37,
+                "TIME": timestamp,
+                "STAT": float(status),
+            }
+            values.extend(element_values[element] for element in self.elements)
+        return self._encode(values)
+
+    def _encode(self, values):
+        if self.data_format == "ASC":
+            return (",".join(f"{value:+.6E}" for value in values) + "\n").encode("latin-1")
+        order = "<" if self.byte_order == "SWAP" else ">"
+        if self.data_format == "REAL" and self.device_model == "2461":
+            code = "d"
+        else:
+            code = "f"
+        data = struct.pack(f"{order}{len(values)}{code}", *values)
+        if self.device_model == "2461":
+            length = str(len(data))
+            return f"#{len(length)}{length}".encode() + data + b"\n"
+        return b"#0" + data + b"\n"
+
+    # --- 명령 처리 ----------------------------------------------------------
+    def _error(self, code, message):
+        self.errors.append(f'{code},"{message}"')
+
+    def _execute(self, command):
+        header, argument, is_query = parse_command(command)
+        try:
+            return self._dispatch(header, argument, is_query)
+        except (ValueError, IndexError, KeyError):
+            self._error(-104, "Data type error")
+            return None
+
+    def _dispatch(self, header, argument, is_query):
+        model = self.device_model
+
+        # 공통 명령
+        if header == "*IDN":
+            return f"KEITHLEY INSTRUMENTS INC.,MODEL {model},SIM{model}{self.terminal[:2]},1.0.0\n".encode()
+        if header == "*RST":
+            self.reset()
+            return None
+        if header == "*CLS":
+            self.errors.clear()
+            return None
+        if header == "*OPC":
+            return b"1\n" if is_query else None
+        if header in ("*WAI", "*TRG", "*SRE", "*ESE"):
+            return None
+
+        root = header.split(":")[0]
+        if root not in self.ROOT_NODES:
+            self._error(-113, "Undefined header")
+            return None
+
+        if header == "SYST:ERR":
+            return ((self.errors.pop(0) if self.errors else '0,"No error"') + "\n").encode()
+
+        # 출력
+        if header in ("OUTP", "OUTP:STAT"):
+            if is_query:
+                return b"1\n" if self.output else b"0\n"
+            self.output = parse_bool(argument)
+            self._apply_level(self.source_level)
+            return None
+
+        # 소스 레벨 / 스윕 설정
+        if header == "SOUR:VOLT":
+            if is_query:
+                return f"{self.source_level:+.6E}\n".encode()
+            self._apply_level(float(argument))
+            return None
+        if header in ("SOUR:VOLT:ILIM", "SENS:CURR:PROT"):
+            if is_query:
+                return f"{self.current_limit:+.6E}\n".encode()
+            self.current_limit = float(argument)
+            return None
+        if header == "SOUR:VOLT:ILIM:TRIP" and is_query:
+            return b"1\n" if self.in_limit else b"0\n"
+        if header == "SOUR:VOLT:MODE":
+            self.source_mode = short_node(argument)  # FIX / SWE / LIST
+            return None
+        if header in ("SOUR:VOLT:STAR", "SOUR:VOLT:STOP", "SOUR:VOLT:STEP"):
+            key = header.split(":")[-1]
+            self.sweep[key] = float(argument)
+            if key == "STEP" and self.sweep["STEP"]:
+                self.sweep["POIN"] = int(round((self.sweep["STOP"] - self.sweep["STAR"]) / self.sweep["STEP"])) + 1
+            return None
+        if header == "SOUR:SWE:POIN":
+            if is_query:
+                return f"{int(self.sweep['POIN'])}\n".encode()
+            self.sweep["POIN"] = int(float(argument))
+            return None
+        if header == "SOUR:LIST:VOLT":
+            self.source_list = parse_numbers(argument)
+            return None
+        if header == "SOUR:LIST:VOLT:APP":
+            self.source_list.extend(parse_numbers(argument))
+            return None
+        if header == "SOUR:LIST:VOLT:POIN" and is_query:
+            return f"{len(self.source_list)}\n".encode()
+        if header == "TRIG:COUN":
+            self.trigger_count = int(float(argument))
+            return None
+
+        # 2461 트리거 모델 스윕
+        if header == "SOUR:SWE:VOLT:LIN":
+            args = [arg.strip() for arg in argument.split(",")]
+            self.pending_sweep = list(np.linspace(float(args[0]), float(args[1]), int(float(args[2]))))
+            return None
+        if header == "SOUR:SWE:VOLT:LIST":
+            args = [arg.strip() for arg in argument.split(",")]
+            start_index = int(float(args[0])) - 1 if args and args[0] else 0
+            self.pending_sweep = list(self.source_list[start_index:])
+            return None
+        if header == "TRAC:CLE":
+            self.buffer.clear()
+            return None
+        if header in ("TRAC:ACT", "TRAC:ACT:END") and is_query:
+            return f"{len(self.buffer)}\n".encode()
+        if header == "TRAC:DATA" and is_query:
+            return self._trace_data(argument)
+
+        # 측정 트리거
+        if header == "INIT":
+            if model == "2461":
+                voltages = self.pending_sweep if self.pending_sweep is not None else [self.source_level]
+                if self.pending_sweep is not None:
+                    self.output = True
+                self._store_2461(self._take_readings(voltages))
+            else:
+                if not self.output:
+                    self._error(803, "Output disabled")
+                    return None
+                if self._uses_trigger_link():
+                    self._start_trigger_model()
+                else:
+                    self.fetch_buffer = self._take_readings(self._sweep_voltages())
+            return None
+        if header == "ABOR":
+            self.pending_sweep = None
+            self.run = None
+            self._link_inputs.clear()
+            return None
+        if header in ("ARM:SOUR", "TRIG:SOUR", "TRIG:DIR") and not is_query:
+            self.trigger[header] = short_node(argument)
+            return None
+        if header in ("ARM:ILIN", "ARM:OLIN", "ARM:COUN", "TRIG:ILIN", "TRIG:OLIN") and not is_query:
+            self.trigger[header] = int(float(argument))
+            return None
+        if header in ("TRIG:INP", "TRIG:OUTP") and not is_query:
+            events = {short_node(e.strip()) for e in argument.split(",") if e.strip()}
+            self.trigger[header] = events - {"NONE"}
+            return None
+        if header in ("READ", "MEAS", "MEAS:CURR") and is_query:
+            if model == "2461":
+                readings = self._take_readings([self.source_level])
+                self._store_2461(readings)
+                return self._encode([readings[0][1]])
+            if not self.output:
+                self._error(803, "Output disabled")  # 2400 계열은 출력이 꺼져 있으면 응답 없음
+                return None
+            voltages = self._sweep_voltages() if header == "READ" else [self.source_level]
+            return self._format_2400(self._take_readings(voltages))
+        if header == "FETC" and is_query:
+            if model == "2461":
+                return self._encode([self.buffer[-1][0]] if self.buffer else [])
+            return self._format_2400(self.fetch_buffer)
+
+        # 포맷
+        if header in ("FORM", "FORM:DATA"):
+            if is_query:
+                return f"{self.data_format}\n".encode()
+            fmt = argument.upper().replace(" ", "")
+            self.data_format = "ASC" if fmt.startswith("ASC") else ("SRE" if fmt.startswith("SRE") else "REAL")
+            return None
+        if header == "FORM:BORD":
+            self.byte_order = "SWAP" if argument.upper().startswith("SW") else "NORM"
+            return None
+        if header in ("FORM:ELEM", "FORM:ELEM:SENS"):
+            self.elements = [short_node(e.strip()) for e in argument.split(",") if e.strip()]
+            return None
+
+        # 적분 시간 / 필터 / 오토제로
+        if header.endswith(":NPLC"):
+            if is_query:
+                return f"{self.nplc}\n".encode()
+            self.nplc = float(argument)
+            return None
+        if header.endswith("AVER:COUN"):
+            self.filter_count = int(float(argument))
+            return None
+        if header.endswith("AVER") or header.endswith("AVER:STAT"):
+            self.filter_enabled = parse_bool(argument)
+            return None
+        if header.endswith("AZER") or header.endswith("AZER:STAT"):
+            self.autozero = parse_bool(argument)
+            return None
+
+        # 전류 측정 레인지
+        if header.endswith("CURR:RANG:AUTO") and not header.startswith("SOUR"):
+            if is_query:
+                return f"{int(self.current_range_auto)}\n".encode()
+            self.current_range_auto = parse_bool(argument)
+            return None
+        if (header.endswith("CURR:RANG") or header.endswith("CURR:RANG:UPP")) and not header.startswith("SOUR"):
+            if is_query:
+                return f"{self.current_range:.6E}\n".encode()
+            self._set_current_range(float(argument))
+            return None
+
+        # 나머지 설정 명령은 저장만 (쿼리는 저장된 값 반환)
+        if is_query:
+            return f"{self.settings.get(header, '0')}\n".encode()
+        self.settings[header] = argument
+        return None
+
+    # --- Trigger Link (2400/2410) --------------------------------------------
+    def _uses_trigger_link(self):
+        return self.trigger["ARM:SOUR"] == "TLIN" or self.trigger["TRIG:SOUR"] == "TLIN"
+
+    def _start_trigger_model(self):
+        """:INIT - 트리거 모델 시작. 입력 트리거를 기다리는 곳에서 멈췄다가
+        _link_pulse() 로 입력이 들어오면 이어서 진행한다"""
+        voltages = self._sweep_voltages() * max(self.trigger["ARM:COUN"], 1)
+        self.run = {"voltages": voltages, "index": 0, "stage": "ARM", "readings": [],
+                    "bypassed": False, "active": False}
+        self._link_inputs.clear()
+        self._advance_trigger_model()
+
+    def _consume_input(self, line):
+        if self._link_inputs.get(line, 0) > 0:
+            self._link_inputs[line] -= 1
+            return True
+        return False
+
+    def _emit_output(self, line):
+        """Trigger Link 출력 펄스 - 같은 링크의 다른 장비에 전달"""
+        for other in list(_trigger_link):
+            if other is not self:
+                other._link_pulse(line)
+
+    def _link_pulse(self, line):
+        with self._lock:
+            if self.run is None:
+                return  # idle 상태에서 받은 입력은 무시
+            self._link_inputs[line] = self._link_inputs.get(line, 0) + 1
+            if not self.run["active"]:
+                self._advance_trigger_model()
+
+    def _advance_trigger_model(self):
+        run = self.run
+        run["active"] = True  # 출력 펄스에 대한 응답이 다시 들어와도 재귀 실행하지 않음
+        trig = self.trigger
+        link_in = trig["TRIG:SOUR"] == "TLIN"
+        try:
+            if run["stage"] == "ARM":
+                if trig["ARM:SOUR"] == "TLIN" and not self._consume_input(trig["ARM:ILIN"]):
+                    return
+                run["stage"] = "SOUR"
+
+            while run["index"] < len(run["voltages"]):
+                if run["stage"] == "SOUR":
+                    if link_in and "SOUR" in trig["TRIG:INP"]:
+                        if run["index"] == 0 and trig["TRIG:DIR"] == "SOUR" and not run["bypassed"]:
+                            run["bypassed"] = True  # 첫 번째 소스 이벤트 검출기 우회 (ONCE)
+                        elif not self._consume_input(trig["TRIG:ILIN"]):
+                            return
+                    self._apply_level(run["voltages"][run["index"]])
+                    if link_in and "SOUR" in trig["TRIG:OUTP"]:
+                        self._emit_output(trig["TRIG:OLIN"])
+                    run["stage"] = "DEL"
+                if run["stage"] == "DEL":
+                    if link_in and "DEL" in trig["TRIG:INP"] and not self._consume_input(trig["TRIG:ILIN"]):
+                        return
+                    if link_in and "DEL" in trig["TRIG:OUTP"]:
+                        self._emit_output(trig["TRIG:OLIN"])
+                    run["stage"] = "SENS"
+                if run["stage"] == "SENS":
+                    if link_in and "SENS" in trig["TRIG:INP"] and not self._consume_input(trig["TRIG:ILIN"]):
+                        return
+                    current = self._measure()
+                    _sleep(self._integration_time() + self._settle_time())
+                    run["readings"].append((self.source_level, current, self.in_limit,
+                                            time.monotonic() - self.start_time))
+                    run["index"] += 1
+                    run["stage"] = "SOUR"
+                    if link_in and "SENS" in trig["TRIG:OUTP"]:
+                        self._emit_output(trig["TRIG:OLIN"])
+
+            # 동작 완료 -> idle, 대기 중이던 명령 실행
+            self.fetch_buffer = run["readings"]
+            self.run = None
+            self._link_inputs.clear()
+            deferred, self._deferred = self._deferred, []
+            if deferred:
+                self._execute_message(deferred)
+        finally:
+            if self.run is not None:
+                self.run["active"] = False
+
+    def _store_2461(self, readings):
+        for voltage, current, in_limit, timestamp in readings:
+            self.buffer.append((current, voltage, timestamp, in_limit))
+
+    def _trace_data(self, argument):
+        args = [arg.strip() for arg in argument.split(",")]
+        start, end = int(float(args[0])), int(float(args[1]))
+        elements = [arg.upper() for arg in args[3:]] or ["READ"]
+        values = []
+        # 인덱스 1 = 버퍼에 남아 있는 가장 오래된 리딩
+        for current, voltage, timestamp, in_limit in itertools.islice(self.buffer, max(start - 1, 0), end):
+            for element in elements:
+                if element.startswith("SOURSTAT"):
+                    values.append(float(1 << 3) if in_limit else 0.0)  # bit 3: 소스 제한(compliance)
+                elif element.startswith("SOUR"):
+                    values.append(voltage)
+                elif element.startswith("REL"):
+                    values.append(timestamp)
+                else:
+                    values.append(current)
+        return self._encode(values)
+
+
+def open_resource(visa_address):
+    """가상 장비를 연다 (smu_session.get_session 에서 호출)"""
+    return SimulatedSMU(visa_address)
@@ -0,0 +1,292 @@
+"""프로세스 공용 SMU 세션 풀
+
+모드 창마다 pyvisa.ResourceManager() / open_resource() 를 새로 만들지 않고,
+VISA 주소별로 한 번 연 세션을 계속 재사용한다.
+- get_session(address) : 살아있는 세션을 반환 (없으면 열고 timeout/termination 설정)
+- session.lock         : 여러 명령을 한 묶음으로 보낼 때 쓰는 세션별 락
+- session.batch()      : 연속된 write 를 ';' 로 이어 한 메시지로 보내고 끝에 :SYST:ERR? 확인
+- session.apply_settings(settings) : 장비 설정 캐시(session.state)와 다른 항목만 전송
+- session.close()      : 세션을 풀에 돌려줄 뿐 VISA 연결은 유지한다
+- close_all_sessions() : 프로그램 종료 시 실제로 연결을 닫는다
+'SIM::' 으로 시작하는 주소는 simulated_smu 의 가상 장비로 연결된다.
+"""
+import os
+import threading
+import contextlib
+import pyvisa
+import simulated_smu
+from scpi import short_node, parse_command
+
+# '' = 기본 VISA 라이브러리, '@py' = pyvisa-py
+VISA_BACKEND = os.environ.get("SOURCEMETER_VISA_BACKEND", "")
+DEFAULT_TIMEOUT = 10000  # ms
+MAX_MESSAGE_LENGTH = 1000  # batch() 로 이어 붙인 메시지 하나의 최대 길이 (문자)
+MAX_ERROR_READS = 32       # check_errors() 에서 에러 큐를 비울 때 최대 조회 횟수
+
+_resource_manager = None
+_sessions = {}
+_pool_lock = threading.Lock()
+
+
+def get_resource_manager():
+    """공용 ResourceManager (처음 호출될 때 한 번만 생성)"""
+    global _resource_manager
+    with _pool_lock:
+        if _resource_manager is None:
+            _resource_manager = pyvisa.ResourceManager(VISA_BACKEND)
+        return _resource_manager
+
+
+def list_resources():
+    """연결된 VISA 주소 목록 (+ SOURCEMETER_SIMULATION 으로 켠 가상 장비)"""
+    simulated = simulated_smu.simulated_addresses()
+    try:
+        resources = tuple(get_resource_manager().list_resources())
+    except Exception:
+        if not simulated:
+            raise
+        resources = ()  # VISA 라이브러리가 없어도 가상 장비만으로 동작
+    return resources + tuple(simulated)
+
+
+class SCPIError(RuntimeError):
+    """장비 에러 큐(:SYST:ERR?)에 남은 에러"""
+
+    def __init__(self, visa_address, errors):
+        self.visa_address = visa_address
+        self.errors = errors
+        super().__init__(f"SCPI 에러 ({visa_address}): " + " / ".join(errors))
+
+
+class CommandBatch:
+    """session.batch() 안에서 write 를 모아 두었다가 ';' 로 이어서 보낸다
+
+    write 만 받으므로 instrument 대신 넘겨도 된다 (예: set_data_format(batch, ...)).
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.commands = []
+
+    def write(self, command):
+        command = command.strip()
+        # 이어 붙인 메시지에서는 앞 명령의 경로가 이어지므로 항상 루트(':')에서 시작
+        if not command.startswith((":", "*")):
+            command = ":" + command
+        self.commands.append(command)
+
+    def flush(self):
+        """모아 둔 명령을 MAX_MESSAGE_LENGTH 이하의 메시지로 나눠 전송"""
+        message = ""
+        for command in self.commands:
+            if message and len(message) + 1 + len(command) > MAX_MESSAGE_LENGTH:
+                self.session.write(message)
+                message = command
+            else:
+                message = f"{message};{command}" if message else command
+        if message:
+            self.session.write(message)
+        self.commands = []
+
+
+def setting_key(header):
+    """설정 헤더를 비교용 짧은 형식으로 (':SOURce:FUNCtion' -> 'SOUR:FUNC')"""
+    return parse_command(header)[0]
+
+
+def normalize_argument(value):
+    """설정 값을 비교용 문자열로 ('VOLTage' -> 'VOLT', '1e-2' -> '0.01', ON -> 1)"""
+    parts = []
+    for part in str(value).split(","):
+        part = part.strip().strip("'\"").upper()
+        part = {"ON": "1", "OFF": "0"}.get(part, part)
+        try:
+            parts.append(repr(float(part)))
+        except ValueError:
+            parts.append(short_node(part) if part.isalpha() else part)
+    return ",".join(parts)
+
+
+class SMUSession:
+    """VISA 주소 하나에 대한 열린 세션과 세션별 락"""
+
+    def __init__(self, visa_address, resource):
+        self.visa_address = visa_address
+        self.resource = resource
+        self.lock = threading.RLock()
+        self.device_model = None
+        self.transactions = 0  # 버스 왕복 횟수 (write/query/read 호출 수, 벤치마크용)
+        # 장비 설정 캐시 {짧은 헤더: 값}. None = 모름 (다음 apply_settings 에서 *RST)
+        self.state = None
+        self.configured_keys = set()  # 마지막 apply_settings 가 설정한 헤더 목록
+
+    @property
+    def timeout(self):
+        return self.resource.timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self.resource.timeout = value
+
+    def write(self, command):
+        with self.lock:
+            result = self._call(self.resource.write, command)
+            self._record(command)
+            return result
+
+    def _record(self, message):
+        """보낸 설정 명령을 state 에 반영 (*RST 이후는 기본값 상태로 본다)"""
+        for command in message.split(";"):
+            header, argument, is_query = parse_command(command)
+            if is_query or not header:
+                continue
+            if header == "*RST":
+                self.state = {}
+            elif self.state is not None and not header.startswith("*"):
+                self.state[header] = normalize_argument(argument)
+
+    def query(self, command):
+        with self.lock:
+            return self._call(self.resource.query, command)
+
+    def read(self):
+        with self.lock:
+            return self._call(self.resource.read)
+
+    def query_binary_values(self, command, **kwargs):
+        with self.lock:
+            return self._call(self.resource.query_binary_values, command, **kwargs)
+
+    @contextlib.contextmanager
+    def batch(self, check_errors=True):
+        """with session.batch() as batch: batch.write(...) - 블록이 끝날 때 한 번에 전송
+
+        check_errors=True 이면 전송 후 :SYST:ERR? 로 에러 큐를 확인해 SCPIError 를 낸다.
+        블록 안에서 예외가 나면 모아 둔 명령은 보내지 않는다.
+        """
+        with self.lock:
+            commands = CommandBatch(self)
+            yield commands
+            commands.flush()
+            if check_errors:
+                self.check_errors()
+
+    def apply_settings(self, settings, reset=False):
+        """[(헤더, 값), ...] 설정을 장비에 반영하고 보낸 설정 수를 반환
+
+        state 가 있고 지난번과 같은 헤더 목록이면 값이 달라진 항목만 보낸다
+        (*RST 없이 - 레인지/오토레인지 상태 유지). 처음 연결했거나 다른 모드의
+        설정이었거나 reset=True 이면 *RST 후 전체를 보낸다.
+        """
+        keys = [setting_key(header) for header, _ in settings]
+        with self.lock:
+            full = reset or self.state is None or set(keys) != self.configured_keys
+            changed = [(header, value) for (header, value), key in zip(settings, keys)
+                       if full or self.state.get(key) != normalize_argument(value)]
+            if not changed and not full:
+                return 0
+            try:
+                with self.batch() as batch:
+                    batch.write("*RST;*CLS" if full else "*CLS")
+                    for header, value in changed:
+                        batch.write(f"{header} {value}")
+            except Exception:
+                self.invalidate_state()
+                raise
+            self.configured_keys = set(keys)
+            return len(changed)
+
+    def forget_setting(self, header):
+        """설정 하나의 캐시만 버린다 (장비가 스스로 바꾼 설정 - 다음 apply_settings 에서 다시 보냄)"""
+        with self.lock:
+            if self.state is not None:
+                self.state.pop(setting_key(header), None)
+
+    def invalidate_state(self):
+        """설정 캐시를 버린다 (패널 조작 등으로 장비 상태를 알 수 없을 때)"""
+        self.state = None
+        self.configured_keys = set()
+
+    def check_errors(self):
+        """에러 큐를 비우고, 에러가 있었으면 SCPIError"""
+        errors = []
+        for _ in range(MAX_ERROR_READS):
+            response = self.query(":SYST:ERR?").strip()
+            try:
+                code = int(response.split(',')[0])
+            except ValueError:
+                code = -1
+            if code == 0:
+                break
+            errors.append(response)
+        if errors:
+            self.invalidate_state()  # 에러가 난 메시지는 뒤쪽 명령이 무시됐을 수 있다
+            raise SCPIError(self.visa_address, errors)
+
+    def _call(self, method, *args, **kwargs):
+        self.transactions += 1
+        try:
+            return method(*args, **kwargs)
+        except pyvisa.errors.InvalidSession:
+            discard_session(self.visa_address)  # 끊어진 세션은 다음 요청 때 다시 연다
+            raise
+
+    def identify(self, refresh=False):
+        """*IDN? 으로 모델명(예: '2461')을 읽고 세션에 저장"""
+        if self.device_model is None or refresh:
+            idn = self.query("*IDN?").strip()
+            self.device_model = idn.split(',')[1].replace("MODEL", "").strip()
+        return self.device_model
+
+    def close(self):
+        """세션을 풀에 반환 (VISA 연결은 닫지 않음)"""
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def get_session(visa_address, timeout=DEFAULT_TIMEOUT):
+    """VISA 주소에 해당하는 공용 세션을 반환"""
+    with _pool_lock:
+        session = _sessions.get(visa_address)
+    if session is not None:
+        return session
+
+    if simulated_smu.is_simulated(visa_address):
+        resource = simulated_smu.open_resource(visa_address)
+    else:
+        resource = get_resource_manager().open_resource(visa_address)
+    resource.timeout = timeout
+    resource.write_termination = '\n'
+    resource.read_termination = '\n'
+
+    with _pool_lock:
+        # 다른 스레드가 먼저 열었으면 그 세션을 사용
+        if visa_address in _sessions:
+            resource.close()
+        else:
+            _sessions[visa_address] = SMUSession(visa_address, resource)
+        return _sessions[visa_address]
+
+
+def discard_session(visa_address):
+    """세션을 풀에서 빼고 VISA 연결을 닫는다"""
+    with _pool_lock:
+        session = _sessions.pop(visa_address, None)
+    if session is not None:
+        try:
+            session.resource.close()
+        except Exception as e:
+            print(f"세션 종료 오류 ({visa_address}): {e}")
+
+
+def close_all_sessions():
+    """풀에 있는 모든 세션의 VISA 연결을 닫는다"""
+    with _pool_lock:
+        addresses = list(_sessions)
+    for visa_address in addresses:
+        discard_session(visa_address)
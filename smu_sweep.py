@@ -0,0 +1,664 @@
+"""Keithley SMU 스윕 엔진 (Qt 없이 동작)
+
+하드웨어 스윕: 전압 리스트 전체를 장비에 올려두고 장비 내부 트리거로 스윕을 돌린 뒤,
+측정값을 한 번의 전송으로 읽어온다. (binary=True 이면 IEEE-754 블록 전송)
+- 2461       : SCPI 트리거 모델 (:SOUR:SWE:VOLT:LIN / :LIST) + defbuffer1
+- 2400/2410  : :SOUR:VOLT:MODE SWE / LIST + :TRIG:COUN + :READ?
+
+다이오드 스윕(sweepvoltage)과 MOSFET 출력/전달 특성 스윕(mosfetsweep)의 측정 루프도
+여기 있어서 GUI, 벤치마크가 같은 경로를 사용한다.
+다이오드 스윕은 run_adaptive_sweep 으로 전류가 빨리 변하는 구간만 촘촘하게 측정할 수도 있다.
+MOSFET 스윕은 trigger_link=True 이면 게이트(2400)와 드레인(2410)을 Trigger Link 로 묶어
+곡선 하나를 장비 내부 스윕 + :FETC? 한 번으로 측정한다 (Trigger Link 케이블 필요).
+compliance=CompliancePolicy(...) 를 주면 리딩마다 compliance 상태를 같이 읽어서
+전류 제한에 걸린 곡선의 나머지를 건너뛰거나 간격을 넓히거나 스윕을 중단한다 (compliance.py).
+"""
+import numpy as np
+from binary_transfer import read_values, set_data_format, data_format_settings
+from measurement_profiles import DEFAULT_PROFILE, profile_settings, state_point_time, apply_profile
+from compliance import COMPLIANCE_CHUNK_POINTS, is_compliance, run_compliance_curve
+from async_smu import run_concurrently
+
+MAX_SWEEP_POINTS = 2500  # 2400/2410 트리거 카운트(READ? 버퍼) 최대값
+MAX_LIST_CHUNK = 100     # :SOUR:LIST:VOLT 명령 하나에 실을 수 있는 최대 값 개수
+GATE_TRIGGER_LINE = 1    # Trigger Link: 게이트(2400) 출력 -> 드레인(2410) 입력
+DRAIN_TRIGGER_LINE = 2   # Trigger Link: 드레인(2410) 출력 -> 게이트(2400) 입력
+
+# 적응형 다이오드 스윕 (run_adaptive_sweep)
+ADAPTIVE_COARSE_FACTOR = 8           # 첫 패스 간격 = 스텝 x 8
+ADAPTIVE_MAX_PASSES = 6              # 구간을 반씩 나누는 최대 횟수
+ADAPTIVE_LOG_TOLERANCE = 0.5         # 인접 점 사이 허용 log10|I| 변화 (decade)
+ADAPTIVE_CURVATURE_TOLERANCE = 0.02  # 직선 보간 허용 오차 (|I| 최대값 대비)
+ADAPTIVE_CURRENT_FLOOR = 1e-12       # log 계산용 전류 바닥값 (A)
+
+
+def format_voltage(value):
+    """SCPI 명령에 넣을 전압 문자열"""
+    return f"{float(value):.7g}"
+
+
+def is_linear(voltages):
+    """전압 배열이 등간격(선형 계단)인지 확인"""
+    if len(voltages) < 3:
+        return len(voltages) == 2
+    steps = np.diff(voltages)
+    return np.allclose(steps, steps[0], rtol=1e-6, atol=1e-9)
+
+
+def sweep_timeout_ms(n_points, per_point_ms=50, base_ms=10000):
+    """스윕 한 번을 기다릴 VISA 타임아웃 (포인트 수에 비례)"""
+    return int(base_ms + n_points * per_point_ms)
+
+
+def point_timeout_ms(instrument, device_model):
+    """현재 측정 프로파일의 포인트당 예상 시간 x 2 (최소 50 ms) - sweep_timeout_ms 의 per_point_ms"""
+    return max(50, 2000 * state_point_time(instrument, device_model))
+
+
+def write_source_list(instrument, voltages):
+    """:SOUR:LIST:VOLT 로 전압 리스트를 올린다 (100개 단위로 APPend)"""
+    for start in range(0, len(voltages), MAX_LIST_CHUNK):
+        chunk = ",".join(format_voltage(v) for v in voltages[start:start + MAX_LIST_CHUNK])
+        if start == 0:
+            instrument.write(f":SOUR:LIST:VOLT {chunk}")
+        else:
+            instrument.write(f":SOUR:LIST:VOLT:APP {chunk}")
+
+
+def _sweep_2461(instrument, voltages, source_delay, binary, status=False):
+    n_points = len(voltages)
+    with instrument.batch() as batch:
+        batch.write(':TRAC:CLE "defbuffer1"')
+
+        if is_linear(voltages):
+            batch.write(
+                f":SOUR:SWE:VOLT:LIN {format_voltage(voltages[0])}, {format_voltage(voltages[-1])}, "
+                f'{n_points}, {source_delay}, 1, BEST, OFF, OFF, "defbuffer1"'
+            )
+        else:
+            write_source_list(batch, voltages)
+            batch.write(f':SOUR:SWE:VOLT:LIST 1, {source_delay}, 1, OFF, "defbuffer1"')
+
+    # 설정 에러를 확인한 뒤 시작 (*WAI: 트리거 모델이 끝날 때까지 다음 명령 대기)
+    instrument.write(":INIT;*WAI")
+    if status:  # 리딩마다 (전류, 소스 상태)
+        return read_values(instrument, "2461", f':TRAC:DATA? 1, {n_points}, "defbuffer1", READ, SOURSTAT',
+                           2 * n_points, binary)
+    return read_values(instrument, "2461", f':TRAC:DATA? 1, {n_points}, "defbuffer1", READ',
+                       n_points, binary)
+
+
+def write_sweep_source(instrument, voltages):
+    """2400/2410 소스 스윕 설정 (등간격이면 SWE, 아니면 LIST) + :TRIG:COUN"""
+    n_points = len(voltages)
+    if is_linear(voltages):
+        # STARt/STOP/POINts 를 먼저 보낸 뒤 MODE SWE (스윕 재계산 지연 방지)
+        instrument.write(f":SOUR:VOLT:STAR {format_voltage(voltages[0])}")
+        instrument.write(f":SOUR:VOLT:STOP {format_voltage(voltages[-1])}")
+        instrument.write(f":SOUR:SWE:POIN {n_points}")
+        instrument.write(":SOUR:SWE:SPAC LIN")
+        instrument.write(":SOUR:VOLT:MODE SWE")
+    else:
+        write_source_list(instrument, voltages)
+        instrument.write(":SOUR:VOLT:MODE LIST")
+
+    instrument.write(":SOUR:SWE:RANG BEST")
+    instrument.write(f":TRIG:COUN {n_points}")
+
+
+def _sweep_2400(instrument, device_model, voltages, binary, status=False):
+    n_points = len(voltages)
+    with instrument.batch() as batch:
+        # 포인트당 전류값 하나만 받기 (status=True 이면 전류, 상태 워드)
+        batch.write(":FORMat:ELEMents CURR,STAT" if status else ":FORMat:ELEMents CURR")
+        write_sweep_source(batch, voltages)
+    return read_values(instrument, device_model, ":READ?", (2 if status else 1) * n_points, binary)
+
+
+def run_hardware_sweep(instrument, device_model, voltages, source_delay=-1, binary=False, status=False):
+    """전압 리스트를 장비 내부 스윕으로 측정하고 전류 배열을 반환
+
+    출력(:OUTP ON), 전류 제한 등 기본 설정은 호출하는 쪽에서 끝낸 상태여야 한다.
+    source_delay 는 2461 스윕의 포인트 간 지연(-1 = auto delay)이다.
+    binary=True 이면 측정값을 바이너리로 받고, 끝나면 ASCII 포맷으로 되돌린다.
+    status=True 이면 (전류 배열, compliance 플래그 배열) 을 반환한다
+    (2400/2410 은 :FORM:ELEM 이 CURR,STAT 로 남는다).
+    """
+    voltages = np.asarray(voltages, dtype=float)
+    currents = np.empty(len(voltages))
+    flags = np.zeros(len(voltages), dtype=bool)
+
+    previous_timeout = instrument.timeout
+    try:
+        if binary:
+            set_data_format(instrument, device_model, True)
+
+        for start in range(0, len(voltages), MAX_SWEEP_POINTS):
+            segment = voltages[start:start + MAX_SWEEP_POINTS]
+            instrument.timeout = max(previous_timeout or 0,
+                                     sweep_timeout_ms(len(segment), point_timeout_ms(instrument, device_model)))
+
+            if device_model == "2461":
+                readings = _sweep_2461(instrument, segment, source_delay, binary, status)
+            else:
+                readings = _sweep_2400(instrument, device_model, segment, binary, status)
+
+            if status:
+                if len(readings) != 2 * len(segment):
+                    raise ValueError(f"스윕 측정값 개수 불일치: {len(readings)} / {2 * len(segment)}")
+                readings = np.reshape(readings, (len(segment), 2))
+                flags[start:start + len(segment)] = [is_compliance(value) for value in readings[:, 1]]
+                readings = readings[:, 0]
+            if len(readings) != len(segment):
+                raise ValueError(f"스윕 측정값 개수 불일치: {len(readings)} / {len(segment)}")
+            currents[start:start + len(segment)] = readings
+    finally:
+        instrument.timeout = previous_timeout
+        restore_fixed_mode(instrument, device_model)
+        if binary:
+            set_data_format(instrument, device_model, False)
+
+    if status:
+        return currents, flags
+    return currents
+
+
+def restore_fixed_mode(instrument, device_model):
+    """스윕이 끝난 뒤 포인트 단위 측정(:SOUR:VOLT <v>)이 다시 동작하도록 되돌림"""
+    try:
+        if device_model == "2461":
+            instrument.write(":ABOR")
+            # 스윕(레인지 BEST) 이 소스 레인지를 고정해 두므로 다음 설정 때 오토레인지를 다시 켜게 함
+            instrument.forget_setting(":SOURce:VOLTage:RANGe:AUTO")
+        else:
+            instrument.write(":SOUR:VOLT:MODE FIX;:TRIG:COUN 1")
+    except Exception as e:
+        print(f"스윕 모드 해제 오류: {e}")
+
+
+def voltage_sweep_settings(device_model, current_limit, profile=DEFAULT_PROFILE):
+    """다이오드 I-V 스윕 설정 목록 (전압 소스 / 전류 측정, profile: 측정 속도/정확도 프로파일)"""
+    settings = [
+        (":SOURce:FUNCtion", "VOLTage"),       # Voltage source mode
+        (":SENSe:FUNCtion", "'CURRent'"),      # Current measurement mode
+    ] + profile_settings(device_model, profile)
+    if device_model == "2461":
+        settings += [
+            (":SOURce:VOLTage:RANGe:AUTO", "ON"),
+            (":SENSe:CURRent:RANGe:AUTO", "ON"),
+            (":SOURce:VOLTage:ILIMit", current_limit),
+        ]
+    else:
+        settings += [
+            (":FORMat:ELEMents", "CURR"),
+            (":SENS:CURR:PROT", current_limit),
+        ]
+    return settings
+
+
+def configure_voltage_sweep(instrument, device_model, current_limit, reset=False, profile=DEFAULT_PROFILE):
+    """다이오드 I-V 스윕용 설정 - 이전 스윕과 달라진 설정만 보낸다 (*RST 생략)"""
+    instrument.apply_settings(voltage_sweep_settings(device_model, current_limit, profile), reset)
+
+
+def run_point_sweep(instrument, device_model, voltages, status=False):
+    """포인트마다 전압 설정 + *OPC? + 측정 쿼리 (하드웨어 스윕 대체 경로)
+
+    status=True 이면 (currents, compliance 플래그) 를 반환한다. 2461 은 측정과 같은 메시지로
+    :SOUR:VOLT:ILIM:TRIP? 를 묻고, 2400/2410 은 :FORM:ELEM CURR,STAT 가 설정돼 있어야 한다.
+    """
+    currents = []
+    flags = []
+    for voltage in voltages:
+        try:
+            instrument.write(f":SOURce:VOLTage {voltage}")   # Set voltage
+            instrument.query("*OPC?")                       # Wait for operation completion
+
+            if device_model == "2461":
+                if status:
+                    response = instrument.query(":MEASure:CURRent?;:SOURce:VOLTage:ILIMit:TRIPped?")
+                    current, tripped = response.strip().split(';')
+                    current = float(current)
+                    flags.append(int(float(tripped)) == 1)
+                else:
+                    current = float(instrument.query(":MEASure:CURRent?"))
+            else:
+                response = instrument.query(":READ?")
+                values = response.strip().split(',')
+                current = float(values[0])
+                if status:
+                    flags.append(is_compliance(float(values[1])))
+
+            currents.append(current)
+            print(f"Voltage: {voltage}, Current: {current}")  # Debugging output
+
+        except Exception as e:
+            print(f"Error reading current at voltage {voltage}: {e}")
+            currents.append(0)  # Append zero on error
+            if status and len(flags) < len(currents):
+                flags.append(False)
+    if status:
+        return currents, flags
+    return currents
+
+
+def run_voltage_sweep(instrument, device_model, voltages, hardware_sweep=True, binary=False):
+    """다이오드 I-V 스윕 측정 (하드웨어 스윕 실패 시 포인트 단위 측정)"""
+    if hardware_sweep:
+        try:
+            currents = list(run_hardware_sweep(instrument, device_model, voltages, binary=binary))
+            print(f"Hardware sweep: {len(voltages)} points")  # Debugging output
+            return currents
+        except Exception as e:
+            print(f"하드웨어 스윕 실패, 포인트 단위 측정으로 전환: {e}")
+
+    return run_point_sweep(instrument, device_model, voltages)
+
+
+def check_diode_sweep_modes(adaptive=False, planned_range=False, compliance=None):
+    """다이오드 스윕 모드 조합 검사 (함께 쓸 수 없으면 ValueError)
+
+    Adaptive Step / Planned Range / compliance 정책은 서로 다른 측정 루프라 하나만 고를 수 있다.
+    """
+    modes = [name for name, used in (("adaptive", adaptive), ("planned_range", planned_range),
+                                     ("compliance", compliance is not None)) if used]
+    if len(modes) > 1:
+        raise ValueError(f"{' / '.join(modes)} 는 함께 쓸 수 없습니다 (하나만 선택)")
+
+
+def check_mosfet_sweep_modes(trigger_link=False, compliance=None):
+    """MOSFET 스윕 모드 조합 검사 (함께 쓸 수 없으면 ValueError)
+
+    Trigger Link 곡선은 장비 안에서 끝까지 돌므로 compliance 정책은 "abort" 만 적용할 수 있다.
+    """
+    if trigger_link and compliance is not None and compliance.action != "abort":
+        raise ValueError(f"Trigger Link 스윕에서는 compliance '{compliance.action}' 를 쓸 수 없습니다 "
+                         "(continue / abort 만 가능)")
+
+
+def run_compliance_sweep(instrument, device_model, voltages, compliance, hardware_sweep=True, binary=False):
+    """compliance 정책을 적용한 다이오드 I-V 스윕 -> (voltages, currents) (건너뛴 포인트 제외)
+
+    하드웨어 스윕은 COMPLIANCE_CHUNK_POINTS 개씩 나눠 돌리면서 청크마다 판정하고,
+    포인트 단위 측정은 포인트마다 판정한다.
+    """
+    use_hardware = hardware_sweep
+
+    def measure(chunk):
+        nonlocal use_hardware
+        if use_hardware:
+            try:
+                return run_hardware_sweep(instrument, device_model, chunk, binary=binary, status=True)
+            except Exception as e:
+                print(f"하드웨어 스윕 실패, 포인트 단위 측정으로 전환: {e}")
+                use_hardware = False
+        return run_point_sweep(instrument, device_model, chunk, status=True)
+
+    try:
+        if device_model != "2461":
+            instrument.write(":FORMat:ELEMents CURR,STAT")  # 포인트 단위 측정에서도 상태 워드 받기
+        voltages, currents, _ = run_compliance_curve(
+            measure, voltages, compliance, COMPLIANCE_CHUNK_POINTS if hardware_sweep else 1)
+    finally:
+        if device_model != "2461":
+            instrument.write(":FORMat:ELEMents CURR")
+    print(f"Compliance sweep: {len(voltages)} points")  # Debugging output
+    return voltages, currents
+
+
+def refine_indices(indices, currents, log_tolerance=ADAPTIVE_LOG_TOLERANCE,
+                   curvature_tolerance=ADAPTIVE_CURVATURE_TOLERANCE, current_floor=ADAPTIVE_CURRENT_FLOOR):
+    """측정한 격자 인덱스 사이에 더 측정할 인덱스 목록
+
+    인접 두 점 사이 log10|I| 변화가 log_tolerance (decade) 를 넘거나,
+    가운데 점이 양쪽 점을 이은 직선에서 curvature_tolerance * (|I| 최대값) 이상 벗어나면
+    그 구간(들)의 가운데 인덱스를 추가한다. 이미 간격이 1 인 구간은 나누지 않는다.
+    """
+    indices = np.asarray(indices)
+    currents = np.asarray(currents, dtype=float)
+    if len(indices) < 2:
+        return []
+    flagged = np.zeros(len(indices) - 1, dtype=bool)  # 구간 [i, i+1] 을 나눌지
+
+    log_current = np.log10(np.abs(currents) + current_floor)
+    flagged |= np.abs(np.diff(log_current)) > log_tolerance
+
+    if len(indices) >= 3:
+        # 선형 보간 오차 (곡률) - 꺾이는 점 양쪽 구간을 모두 나눈다
+        left, middle, right = indices[:-2], indices[1:-1], indices[2:]
+        weight = (middle - left) / (right - left)
+        predicted = currents[:-2] + (currents[2:] - currents[:-2]) * weight
+        scale = max(np.max(np.abs(currents)), current_floor)
+        bent = np.abs(currents[1:-1] - predicted) > curvature_tolerance * scale
+        flagged[:-1] |= bent
+        flagged[1:] |= bent
+
+    gaps = np.diff(indices)
+    flagged &= gaps > 1
+    return sorted(set((indices[:-1][flagged] + gaps[flagged] // 2).tolist()))
+
+
+def run_adaptive_sweep(instrument, device_model, start_v, end_v, step_v, coarse_factor=ADAPTIVE_COARSE_FACTOR,
+                       hardware_sweep=True, binary=False, max_passes=ADAPTIVE_MAX_PASSES,
+                       profile=DEFAULT_PROFILE, coarse_profile=None, grid=None):
+    """적응형 다이오드 I-V 스윕: 거친 간격으로 먼저 측정하고 전류가 빨리 변하는 곳만 촘촘하게
+
+    모든 측정점은 균일 스윕 격자 np.arange(start_v, end_v + step_v, step_v) 위에 있고
+    (grid 를 주면 그 전압 배열이 격자, start_v / end_v / step_v 는 무시),
+    처음에는 coarse_factor 칸 간격으로 측정한 뒤 refine_indices 가 고른 구간만 반씩 나눠
+    추가로 측정한다 (패스마다 새 점만 모아 스윕 한 번). 무릎 부근은 step_v 해상도까지 내려간다.
+    coarse_profile 을 주면 첫 패스만 그 측정 프로파일로 (예: "fast"), 나머지는 profile 로 측정한다.
+    반환: (voltages, currents) - 전압 오름차순
+    """
+    if grid is None:
+        grid = np.arange(start_v, end_v + step_v, step_v)  # 균일 스윕과 같은 격자
+    grid = np.asarray(grid, dtype=float)
+    last = len(grid) - 1
+    indices = sorted(set(range(0, last + 1, max(int(coarse_factor), 1))) | {last})
+    measured = {}
+    new_indices = indices
+    for refine_pass in range(max_passes + 1):
+        if coarse_profile:
+            apply_profile(instrument, device_model, coarse_profile if refine_pass == 0 else profile)
+        readings = run_voltage_sweep(instrument, device_model, grid[new_indices],
+                                     hardware_sweep=hardware_sweep, binary=binary)
+        measured.update(zip(new_indices, readings))
+        indices = sorted(measured)
+        new_indices = refine_indices(indices, [measured[i] for i in indices])
+        if not new_indices:
+            break
+    if coarse_profile:
+        apply_profile(instrument, device_model, profile)  # 첫 패스에서 끝났을 때도 원래 프로파일로
+    print(f"Adaptive sweep: {len(indices)} / {len(grid)} points")  # Debugging output
+    return grid[indices], [measured[i] for i in indices]
+
+
+def mosfet_smu_settings(device_model, current_limit, binary=False, profile=DEFAULT_PROFILE):
+    """MOSFET 스윕용 게이트/드레인 SMU 설정 목록"""
+    return [
+        (":SOUR:FUNC", "VOLT"),
+        (":SENS:FUNC", "'CURR'"),
+        (":FORMat:ELEMents", "CURR"),
+        (":SENS:CURR:PROT", current_limit),
+    ] + profile_settings(device_model, profile) + data_format_settings(device_model, binary)
+
+
+def configure_mosfet_smus(gate_instrument, drain_instrument, gate_ilimit, drain_ilimit, binary=False,
+                          reset=False, profile=DEFAULT_PROFILE):
+    """MOSFET 스윕용 게이트(2400) / 드레인(2410) SMU 설정 (달라진 설정만 전송, 두 장비 동시에)"""
+    run_concurrently(
+        (gate_instrument, _apply_settings, mosfet_smu_settings("2400", gate_ilimit, binary, profile), reset),
+        (drain_instrument, _apply_settings, mosfet_smu_settings("2410", drain_ilimit, binary, profile), reset),
+    )
+
+
+def _apply_settings(instrument, settings, reset):
+    return instrument.apply_settings(settings, reset)
+
+
+def _step_and_read(source_instrument, drain_instrument, voltage, query, binary, status):
+    """소스 전압 설정 -> 드레인 *OPC? -> 드레인 전류 한 점 -> (current, compliance)"""
+    source_instrument.write(f":SOUR:VOLT {voltage};:OUTP ON")
+    drain_instrument.query("*OPC?")  # 작업 완료 대기
+    values = read_values(drain_instrument, "2410", query, 2 if status else 1, binary)
+    return float(values[0]), bool(status) and is_compliance(values[1])
+
+
+def _measure_curve(source_instrument, drain_instrument, values, query, binary, compliance):
+    """MOSFET 곡선 하나를 포인트마다 측정 -> (values, currents, aborted)"""
+    def measure(chunk):
+        readings = [_step_and_read(source_instrument, drain_instrument, value, query, binary,
+                                   compliance is not None) for value in chunk]
+        return [current for current, _ in readings], [flag for _, flag in readings]
+
+    if compliance is None:
+        return np.array(values, dtype=float), np.array(measure(values)[0]), False
+    taken, currents, aborted = run_compliance_curve(measure, values, compliance)
+    return taken, np.array(currents), aborted
+
+
+def run_output_sweep(gate_instrument, drain_instrument, vgs_values, vds_values, binary=False,
+                     trigger_link=False, compliance=None):
+    """Id-Vds 출력 특성: Vgs 마다 Vds 스윕, {vgs: (vds 배열, id 배열)} 반환
+
+    trigger_link=True 이면 Trigger Link 하드웨어 스윕을 먼저 시도하고,
+    실패하면 호스트에서 포인트마다 전압을 바꾸는 기존 방식으로 측정한다.
+    compliance 정책이 있으면 드레인 리딩의 compliance 비트로 곡선별 조기 종료한다
+    (건너뛴 포인트는 배열에서 빠진다). Trigger Link 와는 "abort" 만 같이 쓸 수 있다.
+    """
+    check_mosfet_sweep_modes(trigger_link, compliance)
+    if trigger_link:
+        try:
+            return run_output_sweep_tlink(gate_instrument, drain_instrument, vgs_values, vds_values, binary,
+                                          compliance)
+        except Exception as e:
+            print(f"Trigger Link 스윕 실패, 포인트 단위 측정으로 전환: {e}")
+
+    output_data = {}
+    try:
+        if compliance is not None:
+            drain_instrument.write(":FORMat:ELEMents CURR,STAT")  # 리딩마다 상태 워드
+
+        # 각 게이트 전압(Vgs)에 대해 드레인 전압(Vds) 스윕
+        for vgs in vgs_values:
+            # 게이트 전압 설정
+            gate_instrument.write(f":SOUR:VOLT {vgs};:OUTP ON")
+
+            # 드레인 전압 스윕 + 드레인 전류 측정
+            vds_taken, ids_values, aborted = _measure_curve(drain_instrument, drain_instrument, vds_values,
+                                                            ":MEAS:CURR?", binary, compliance)
+
+            # 데이터 저장
+            output_data[vgs] = (vds_taken, ids_values)
+            if aborted:
+                break
+    finally:
+        if compliance is not None:
+            drain_instrument.write(":FORMat:ELEMents CURR")
+
+    return output_data
+
+
+def run_transfer_sweep(gate_instrument, drain_instrument, vds_values, vgs_values, binary=False,
+                       trigger_link=False, compliance=None):
+    """Id-Vgs 전달 특성: Vds 마다 Vgs 스윕, {vds: (vgs 배열, id 배열)} 반환
+
+    trigger_link=True 이면 Trigger Link 하드웨어 스윕을 먼저 시도한다 (실패 시 기존 방식).
+    compliance 정책은 run_output_sweep 과 같다.
+    """
+    check_mosfet_sweep_modes(trigger_link, compliance)
+    if trigger_link:
+        try:
+            return run_transfer_sweep_tlink(gate_instrument, drain_instrument, vds_values, vgs_values, binary,
+                                            compliance)
+        except Exception as e:
+            print(f"Trigger Link 스윕 실패, 포인트 단위 측정으로 전환: {e}")
+
+    transfer_data = {}
+    try:
+        if compliance is not None:
+            drain_instrument.write(":FORMat:ELEMents CURR,STAT")  # 리딩마다 상태 워드
+
+        # 각 드레인 전압(Vds)에 대해 게이트 전압(Vgs) 스윕
+        for vds in vds_values:
+            # 드레인 전압 설정
+            drain_instrument.write(f":SOUR:VOLT {vds};:OUTP ON")
+
+            # 게이트 전압 스윕 + 드레인 전류 측정
+            vgs_taken, ids_values, aborted = _measure_curve(gate_instrument, drain_instrument, vgs_values,
+                                                            ":READ?", binary, compliance)
+
+            # 데이터 저장
+            transfer_data[vds] = (vgs_taken, ids_values)
+            if aborted:
+                break
+    finally:
+        if compliance is not None:
+            drain_instrument.write(":FORMat:ELEMents CURR")
+
+    return transfer_data
+
+
+def restore_trigger_link(instrument):
+    """Trigger Link 설정을 IMMediate 로 되돌리고 고정 소스 모드로 (포인트 측정이 다시 동작하도록)"""
+    try:
+        with instrument.batch(check_errors=False) as batch:
+            batch.write(":ARM:SOUR IMM")
+            batch.write(":ARM:COUN 1")
+            batch.write(":TRIG:SOUR IMM")
+            batch.write(":TRIG:DIR ACC")
+            batch.write(":TRIG:INP NONE")
+            batch.write(":TRIG:OUTP NONE")
+            batch.write(":SOUR:VOLT:MODE FIX")
+            batch.write(":TRIG:COUN 1")
+    except Exception as e:
+        print(f"Trigger Link 설정 해제 오류: {e}")
+
+
+def _fetch_curve(drain_instrument, n_points, binary, status):
+    """Trigger Link 곡선 하나의 드레인 리딩 -> (전류 배열, compliance 플래그 배열 또는 None)"""
+    values = read_values(drain_instrument, "2410", ":FETC?", (2 if status else 1) * n_points, binary)
+    if len(values) != (2 if status else 1) * n_points:
+        raise ValueError(f"스윕 측정값 개수 불일치: {len(values)} / {(2 if status else 1) * n_points}")
+    if not status:
+        return values, None
+    values = values.reshape(n_points, 2)
+    return values[:, 0], np.array([is_compliance(value) for value in values[:, 1]])
+
+
+def _abort_family(flags, compliance):
+    """Trigger Link 곡선에서 연속 compliance 가 hits 이상이고 정책이 abort 인지"""
+    if flags is None or compliance is None or compliance.action != "abort":
+        return False
+    streak = 0
+    for flag in flags:
+        streak = streak + 1 if flag else 0
+        if streak >= compliance.hits:
+            print(f"Compliance {compliance.hits} 포인트 연속: 남은 곡선 생략")
+            return True
+    return False
+
+
+def run_output_sweep_tlink(gate_instrument, drain_instrument, vgs_values, vds_values, binary=False,
+                           compliance=None):
+    """Id-Vds 출력 특성 (Trigger Link 동기 스윕)
+
+    Vgs 곡선마다:
+    1. 드레인 :INIT  - ARM 레이어에서 Trigger Link 입력(GATE_TRIGGER_LINE) 대기
+    2. 게이트 :SOUR:VOLT vgs;:INIT - 소스 설정 후 출력 트리거 -> 드레인이 Vds 내부 스윕 시작
+    3. 드레인 :FETC? - 스윕이 끝나 idle 이 되면 곡선 전체를 한 번에 수신
+    곡선은 장비 안에서 끝까지 돌므로 compliance 정책은 "abort" 만 적용된다 (남은 곡선 생략).
+    """
+    vds_values = np.asarray(vds_values, dtype=float)
+    n_points = len(vds_values)
+    if n_points > MAX_SWEEP_POINTS:
+        raise ValueError(f"Trigger Link 스윕은 {MAX_SWEEP_POINTS} 포인트까지 가능합니다 ({n_points})")
+
+    output_data = {}
+    previous_timeout = drain_instrument.timeout
+    try:
+        # 게이트: 첫 소스 이벤트는 우회, 소스 설정 후 출력 트리거
+        with gate_instrument.batch() as batch:
+            batch.write(":SOUR:VOLT:MODE FIX")
+            batch.write(":ARM:SOUR IMM")
+            batch.write(":ARM:COUN 1")
+            batch.write(":TRIG:COUN 1")
+            batch.write(":TRIG:SOUR TLIN")
+            batch.write(":TRIG:DIR SOUR")
+            batch.write(":TRIG:INP SOUR")
+            batch.write(f":TRIG:ILIN {DRAIN_TRIGGER_LINE}")
+            batch.write(f":TRIG:OLIN {GATE_TRIGGER_LINE}")
+            batch.write(":TRIG:OUTP SOUR")
+            batch.write(":OUTP ON")
+
+        # 드레인: 게이트 트리거를 받으면 Vds 스윕 전체를 장비 내부에서 진행
+        with drain_instrument.batch() as batch:
+            batch.write(":FORMat:ELEMents CURR,STAT" if compliance is not None else ":FORMat:ELEMents CURR")
+            write_sweep_source(batch, vds_values)
+            batch.write(":ARM:SOUR TLIN")
+            batch.write(f":ARM:ILIN {GATE_TRIGGER_LINE}")
+            batch.write(":ARM:COUN 1")
+            batch.write(":TRIG:SOUR IMM")
+            batch.write(":OUTP ON")
+
+        per_point_ms = point_timeout_ms(gate_instrument, "2400") + point_timeout_ms(drain_instrument, "2410")
+        drain_instrument.timeout = max(previous_timeout or 0, sweep_timeout_ms(n_points, per_point_ms))
+        for vgs in vgs_values:
+            drain_instrument.write(":INIT")
+            gate_instrument.write(f":SOUR:VOLT {format_voltage(vgs)};:INIT")
+            ids_values, flags = _fetch_curve(drain_instrument, n_points, binary, compliance is not None)
+            output_data[vgs] = (vds_values, ids_values)
+            if _abort_family(flags, compliance):
+                break
+    finally:
+        drain_instrument.timeout = previous_timeout
+        restore_trigger_link(gate_instrument)
+        restore_trigger_link(drain_instrument)
+        if compliance is not None:
+            drain_instrument.write(":FORMat:ELEMents CURR")
+
+    return output_data
+
+
+def run_transfer_sweep_tlink(gate_instrument, drain_instrument, vds_values, vgs_values, binary=False,
+                             compliance=None):
+    """Id-Vgs 전달 특성 (Trigger Link 동기 스윕)
+
+    게이트가 Vgs 내부 스윕을 돌리고, 포인트마다 소스 지연 후 드레인에 트리거를 보낸다.
+    드레인은 측정을 마치면 게이트에 트리거를 돌려보내 다음 Vgs 로 넘어가게 한다.
+    Vds 곡선마다 드레인 :SOUR:VOLT vds;:INIT -> 게이트 :INIT -> 드레인 :FETC? 한 번.
+    compliance 정책은 run_output_sweep_tlink 와 같이 "abort" 만 적용된다.
+    """
+    vgs_values = np.asarray(vgs_values, dtype=float)
+    n_points = len(vgs_values)
+    if n_points > MAX_SWEEP_POINTS:
+        raise ValueError(f"Trigger Link 스윕은 {MAX_SWEEP_POINTS} 포인트까지 가능합니다 ({n_points})")
+
+    transfer_data = {}
+    previous_timeout = drain_instrument.timeout
+    try:
+        # 게이트: Vgs 스윕, 첫 포인트 외에는 드레인 측정 완료 트리거를 기다렸다가 소스
+        with gate_instrument.batch() as batch:
+            write_sweep_source(batch, vgs_values)
+            batch.write(":ARM:SOUR IMM")
+            batch.write(":ARM:COUN 1")
+            batch.write(":TRIG:SOUR TLIN")
+            batch.write(":TRIG:DIR SOUR")
+            batch.write(":TRIG:INP SOUR")
+            batch.write(f":TRIG:ILIN {DRAIN_TRIGGER_LINE}")
+            batch.write(f":TRIG:OLIN {GATE_TRIGGER_LINE}")
+            batch.write(":TRIG:OUTP DEL")
+            batch.write(":OUTP ON")
+
+        # 드레인: 고정 Vds, 게이트 트리거를 받아 측정한 뒤 트리거 출력
+        with drain_instrument.batch() as batch:
+            batch.write(":FORMat:ELEMents CURR,STAT" if compliance is not None else ":FORMat:ELEMents CURR")
+            batch.write(":SOUR:VOLT:MODE FIX")
+            batch.write(":ARM:SOUR IMM")
+            batch.write(":ARM:COUN 1")
+            batch.write(f":TRIG:COUN {n_points}")
+            batch.write(":TRIG:SOUR TLIN")
+            batch.write(":TRIG:DIR ACC")
+            batch.write(":TRIG:INP SENS")
+            batch.write(f":TRIG:ILIN {GATE_TRIGGER_LINE}")
+            batch.write(f":TRIG:OLIN {DRAIN_TRIGGER_LINE}")
+            batch.write(":TRIG:OUTP SENS")
+            batch.write(":OUTP ON")
+
+        per_point_ms = point_timeout_ms(gate_instrument, "2400") + point_timeout_ms(drain_instrument, "2410")
+        drain_instrument.timeout = max(previous_timeout or 0, sweep_timeout_ms(n_points, per_point_ms))
+        for vds in vds_values:
+            drain_instrument.write(f":SOUR:VOLT {format_voltage(vds)};:INIT")
+            gate_instrument.write(":INIT")
+            ids_values, flags = _fetch_curve(drain_instrument, n_points, binary, compliance is not None)
+            transfer_data[vds] = (vgs_values, ids_values)
+            if _abort_family(flags, compliance):
+                break
+    finally:
+        drain_instrument.timeout = previous_timeout
+        restore_trigger_link(gate_instrument)
+        restore_trigger_link(drain_instrument)
+        if compliance is not None:
+            drain_instrument.write(":FORMat:ELEMents CURR")
+
+    return transfer_data
@@ -1,17 +1,22 @@
 import sys
-import pyvisa
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QLineEdit,
-    QPushButton, QHBoxLayout, QMessageBox
+    QPushButton, QHBoxLayout, QMessageBox, QCheckBox, QComboBox
 )
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from datetime import datetime
+from smu_sweep import (configure_voltage_sweep, run_voltage_sweep, run_adaptive_sweep, run_compliance_sweep,
+                       check_diode_sweep_modes)
+from binary_transfer import supports_binary
+from smu_session import get_session
+from range_planner import run_planned_sweep, remember_sweep, forget_sweep
+from measurement_profiles import PROFILES, DEFAULT_PROFILE, describe_profile, sweep_point_count
+from compliance import CompliancePolicy, COMPLIANCE_ACTIONS
+from csv_records import save_diode_csv, sweep_timestamp
 
 # Keithley 2461 Configuration (SCPI Commands)
-rm = pyvisa.ResourceManager()
 instrument = None
 
 
@@ -27,6 +32,7 @@ class VoltageSweepApp(QMainWindow):
             raise ValueError(f"Unsupported device: {device_model}")
     
         self.visa_address = visa_address
+        self.binary_transfer = supports_binary(visa_address)  # 측정값 바이너리 전송 사용 여부
         
         # Central widget and layout
         central_widget = QWidget()
@@ -59,6 +65,37 @@ class VoltageSweepApp(QMainWindow):
 
         layout.addLayout(input_layout)
 
+        # 측정 프로파일 (NPLC / 필터 / 오토제로) + 예상 측정 시간
+        profile_layout = QHBoxLayout()
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItems(PROFILES)
+        self.profile_combo.setCurrentText(DEFAULT_PROFILE)
+        # Adaptive Step 의 첫 (거친) 패스 / Planned Range 의 저전류 구간 프로파일 ("same" = 위와 같음)
+        self.segment_profile_combo = QComboBox()
+        self.segment_profile_combo.addItems(["same"] + list(PROFILES))
+        self.estimate_label = QLabel()
+        profile_layout.addWidget(QLabel("Profile:"))
+        profile_layout.addWidget(self.profile_combo)
+        profile_layout.addWidget(QLabel("Coarse / Low-Current Profile:"))
+        profile_layout.addWidget(self.segment_profile_combo)
+        profile_layout.addWidget(self.estimate_label)
+
+        # 전류 제한에 연속 N 포인트 걸리면: continue / skip (나머지 생략) / coarse (간격 넓힘) / abort
+        self.compliance_combo = QComboBox()
+        self.compliance_combo.addItems(COMPLIANCE_ACTIONS)
+        self.compliance_hits_input = QLineEdit("3")
+        self.compliance_hits_input.setMaximumWidth(40)
+        profile_layout.addWidget(QLabel("On Compliance:"))
+        profile_layout.addWidget(self.compliance_combo)
+        profile_layout.addWidget(QLabel("after N pts:"))
+        profile_layout.addWidget(self.compliance_hits_input)
+        profile_layout.addStretch()
+        layout.addLayout(profile_layout)
+        self.profile_combo.currentTextChanged.connect(self.update_estimate)
+        for line_edit in (self.start_voltage_input, self.end_voltage_input, self.step_voltage_input):
+            line_edit.textChanged.connect(self.update_estimate)
+        self.update_estimate()
+
         # Start button
         self.start_button = QPushButton("Start Sweep")
         self.start_button.clicked.connect(self.start_sweep)
@@ -75,12 +112,56 @@ class VoltageSweepApp(QMainWindow):
         button_layout.addWidget(self.start_button)  # Start 버튼 추가
         button_layout.addWidget(self.reset_button)  # Reset 버튼 추가
         button_layout.addWidget(self.record_button)  # 버튼 레이아웃에 추가
+
+        # 하드웨어 스윕 사용 여부 (해제 시 포인트 단위 측정)
+        self.hardware_sweep_checkbox = QCheckBox("Hardware Sweep")
+        self.hardware_sweep_checkbox.setChecked(True)
+        button_layout.addWidget(self.hardware_sweep_checkbox)
+
+        # 적응형 스윕: 거칠게 측정한 뒤 전류가 빨리 변하는 구간만 Step 해상도까지 추가 측정
+        self.adaptive_sweep_checkbox = QCheckBox("Adaptive Step")
+        button_layout.addWidget(self.adaptive_sweep_checkbox)
+
+        # 레인지 계획: 이전 스윕(없으면 거친 사전 측정)으로 구간별 고정 전류 레인지를 정해 오토레인지 생략
+        self.planned_range_checkbox = QCheckBox("Planned Range")
+        button_layout.addWidget(self.planned_range_checkbox)
+
+        # Adaptive Step / Planned Range / On Compliance 는 하나만 고를 수 있음 (나머지는 비활성화)
+        self.adaptive_sweep_checkbox.toggled.connect(self.update_sweep_modes)
+        self.planned_range_checkbox.toggled.connect(self.update_sweep_modes)
+        self.compliance_combo.currentTextChanged.connect(self.update_sweep_modes)
         layout.addLayout(button_layout)  # 버튼 레이아웃을 메인 레이아웃에 추가
 
         # Matplotlib canvas for plotting
         self.canvas = FigureCanvas(Figure())
         layout.addWidget(self.canvas)
 
+    def update_estimate(self):
+        """선택한 프로파일의 포인트당 / 스윕 전체 예상 측정 시간 표시"""
+        try:
+            points = sweep_point_count(float(self.start_voltage_input.text()), float(self.end_voltage_input.text()),
+                                       float(self.step_voltage_input.text()))
+        except ValueError:
+            points = None
+        self.estimate_label.setText(describe_profile(self.device_model, self.profile_combo.currentText(), points))
+
+    def update_sweep_modes(self):
+        """선택한 스윕 모드와 같이 쓸 수 없는 컨트롤 비활성화"""
+        adaptive = self.adaptive_sweep_checkbox.isChecked()
+        planned = self.planned_range_checkbox.isChecked()
+        compliance = self.compliance_combo.currentText() != "continue"
+        self.adaptive_sweep_checkbox.setEnabled(not (planned or compliance))
+        self.planned_range_checkbox.setEnabled(not (adaptive or compliance))
+        self.compliance_combo.setEnabled(not (adaptive or planned))
+        self.compliance_hits_input.setEnabled(not (adaptive or planned))
+
+    def compliance_policy(self):
+        """선택한 compliance 처리 정책 (continue 이면 None - 상태 비트를 읽지 않음)"""
+        action = self.compliance_combo.currentText()
+        if action == "continue":
+            return None
+        return CompliancePolicy(action, hits=int(self.compliance_hits_input.text()))
+
     def reset_inputs(self):
         """Reset input fields, clear the plot, and reset the instrument state."""
         global instrument
@@ -94,11 +175,14 @@ class VoltageSweepApp(QMainWindow):
         self.canvas.figure.clf()  # Figure 전체 초기화
         self.canvas.draw()  # 캔버스 업데이트
 
+        # DUT 를 바꿀 수 있으므로 레인지 계획용 이전 스윕도 삭제
+        forget_sweep(self.visa_address)
+
         # Keithley 장비 상태 초기화
         if instrument is not None:
             try:
                 instrument.write(":OUTPut OFF")  # 출력 비활성화
-                instrument.close()  # 연결 종료
+                instrument.close()  # 세션을 풀에 반환
             except Exception as e:
                 print(f"Error resetting instrument: {e}")
             finally:
@@ -119,7 +203,16 @@ class VoltageSweepApp(QMainWindow):
                 raise ValueError("Current limit must be greater than zero.")
 
             # 데이터 측정
-            self.voltages, self.currents = perform_voltage_sweep(self, start_voltage, end_voltage, step_voltage, current_limit)
+            self.voltages, self.currents = perform_voltage_sweep(
+                self, start_voltage, end_voltage, step_voltage, current_limit,
+                hardware_sweep=self.hardware_sweep_checkbox.isChecked(),
+                binary=self.binary_transfer,
+                adaptive=self.adaptive_sweep_checkbox.isChecked(),
+                planned_range=self.planned_range_checkbox.isChecked(),
+                profile=self.profile_combo.currentText(),
+                segment_profile=self.segment_profile_combo.currentText(),
+                compliance=self.compliance_policy()
+            )
 
             # 기존 그래프 초기화
             self.canvas.figure.clf()  # Figure 전체 초기화
@@ -143,8 +236,7 @@ class VoltageSweepApp(QMainWindow):
         """Save the graph as an image and the data as a CSV file."""
         try:
             # 현재 시간 가져오기
-            now = datetime.now()
-            timestamp = now.strftime("%Y-%m-%d_%H-%M-%S")  # 형식: YYYY-MM-DD_HH-MM-SS
+            timestamp = sweep_timestamp()  # 형식: YYYY-MM-DD_HH-MM-SS
 
             # 파일 이름 설정 (시간 추가)
             image_filename = f"C:/Users/LG/Desktop/2461_SourceMeter/diode_sweep_record/graph_{timestamp}.png"
@@ -159,8 +251,7 @@ class VoltageSweepApp(QMainWindow):
                 raise ValueError("No data to save. Perform a sweep first.")
 
             # 데이터를 CSV로 저장
-            data = np.column_stack((self.voltages, self.currents))
-            np.savetxt(csv_filename, data, delimiter=",", header="Voltage (V), Current (A)", comments="")
+            save_diode_csv(csv_filename, self.voltages, self.currents)
             print(f"Data saved as {csv_filename}")
 
             # 성공 메시지 표시
@@ -170,55 +261,54 @@ class VoltageSweepApp(QMainWindow):
             QMessageBox.critical(self, "Error", f"An error occurred while saving: {e}")
 
 
-def perform_voltage_sweep(self, start_v, end_v, step_v, current_limit):
-    """Perform the voltage sweep using Keithley 2461."""
+def perform_voltage_sweep(self, start_v, end_v, step_v, current_limit, hardware_sweep=True, binary=False,
+                          adaptive=False, planned_range=False, profile=DEFAULT_PROFILE, segment_profile=None,
+                          compliance=None):
+    """Perform the voltage sweep using Keithley 2461.
+
+    hardware_sweep=True 이면 전압 리스트 전체를 장비에 올려 내부 스윕으로 측정하고,
+    실패하면 기존 포인트 단위 측정으로 되돌아간다.
+    binary=True 이면 하드웨어 스윕 결과를 IEEE-754 바이너리 블록으로 읽는다.
+    adaptive=True 이면 step_v 간격 격자에서 필요한 점만 골라 측정한다 (run_adaptive_sweep).
+    planned_range=True 이면 (균일 스윕에서) 구간별 고정 전류 레인지로 측정한다 (run_planned_sweep).
+    profile 은 측정 프로파일, segment_profile 은 Adaptive 의 첫 패스 / Planned Range 의
+    저전류 구간에만 쓸 프로파일이다 (None 또는 "same" 이면 profile 그대로).
+    compliance (CompliancePolicy) 는 균일 스윕에서 전류 제한에 걸린 뒤의 포인트를 건너뛰거나 간격을 넓힌다.
+    adaptive / planned_range / compliance 는 하나만 쓸 수 있다 (둘 이상이면 ValueError).
+    """
+    check_diode_sweep_modes(adaptive, planned_range, compliance)
+    if segment_profile == "same":
+        segment_profile = None
     global instrument
 
     try:
         # Connect to Keithley instrument if not already connected
         if instrument is None:
-            instrument = rm.open_resource(self.visa_address) 
-            instrument.timeout = 10000  # 10-second timeout
-            instrument.write_termination = '\n'
-            instrument.read_termination = '\n'
-
-            # Initialize and configure the instrument
-            instrument.write("*RST")  # Reset the device
-            instrument.write("*CLS")  # Clear status
-            instrument.write(":SOURce:FUNCtion VOLTage")          # Voltage source mode
-            instrument.write(":SENSe:FUNCtion 'CURRent'")         # Current measurement mode
-            
-            if self.device_model == "2461":
-                instrument.write(":SOURce:VOLTage:RANGe:AUTO ON")
-                instrument.write(":SENSe:CURRent:RANGe:AUTO ON")
-                instrument.write(f":SOURce:VOLTage:ILIMit {current_limit}")
-                
-            else:
-                instrument.write(":FORMat:ELEMents CURR")
-                instrument.write(f"SENS:CURR:PROT {current_limit}")
-
-            instrument.write(":OUTPut ON")                       # Enable output
-
-        voltages = np.arange(start_v, end_v + step_v, step_v)  # Voltage range array
-        currents = []
-
-        for voltage in voltages:
-            try:
-                instrument.write(f":SOURce:VOLTage {voltage}")   # Set voltage
-                instrument.query("*OPC?")                       # Wait for operation completion
-                
-                if self.device_model == "2461":
-                    current = float(instrument.query(":MEASure:CURRent?"))
-                else:
-                    response = instrument.query(":READ?")
-                    current = float(response.strip().split(',')[0])
-
-                currents.append(current)
-                print(f"Voltage: {voltage}, Current: {current}")  # Debugging output
-
-            except Exception as e:
-                print(f"Error reading current at voltage {voltage}: {e}")
-                currents.append(0)  # Append zero on error
+            instrument = get_session(self.visa_address)  # 공용 세션 (timeout/termination 설정됨)
+
+        # 이전 스윕과 달라진 설정만 전송 (처음이거나 다른 모드 뒤에는 *RST 후 전체 설정)
+        configure_voltage_sweep(instrument, self.device_model, current_limit, profile=profile)
+
+        instrument.write(":OUTPut ON")                       # Enable output
+
+        if adaptive:
+            voltages, currents = run_adaptive_sweep(instrument, self.device_model, start_v, end_v, step_v,
+                                                    hardware_sweep=hardware_sweep, binary=binary,
+                                                    profile=profile, coarse_profile=segment_profile)
+        elif planned_range:
+            voltages = np.arange(start_v, end_v + step_v, step_v)  # Voltage range array
+            voltages, currents = run_planned_sweep(instrument, self.device_model, voltages, current_limit,
+                                                   hardware_sweep=hardware_sweep, binary=binary,
+                                                   profile=profile, low_current_profile=segment_profile)
+        elif compliance is not None:
+            voltages = np.arange(start_v, end_v + step_v, step_v)  # Voltage range array
+            voltages, currents = run_compliance_sweep(instrument, self.device_model, voltages, compliance,
+                                                      hardware_sweep=hardware_sweep, binary=binary)
+        else:
+            voltages = np.arange(start_v, end_v + step_v, step_v)  # Voltage range array
+            currents = run_voltage_sweep(instrument, self.device_model, voltages,
+                                         hardware_sweep=hardware_sweep, binary=binary)
+        remember_sweep(self.visa_address, voltages, currents)  # 다음 Planned Range 스윕의 기준
 
     finally:
         if instrument is not None: